@@ -2,6 +2,7 @@ from artiq.experiment import *
 from scan_framework.models.model import *
 from scan_framework.models.hist_model import *
 from scan_framework.models.fit_model import *
+from scan_framework.scans.raw_store import RawStore
 import numpy as np
 import scipy.stats as stats
 from math import *
@@ -33,9 +34,20 @@ class ScanModel(Model):
     - **<namespace>**  All data is stored under this location which is specified in the child class.
         - **<namespace>.stats** Contains statistical data, raw data from the scan, and the list of scan points.
             - **<namespace>.points** List of scan points.
-            - **<namespace>.counts** Raw counts recorded at each scan point and repetition.
+            - **<namespace>.counts** Raw counts recorded at each scan point and repetition.  Not created when the
+              scan holds raw values in a memory-mapped file (see :code:`enable_raw_store`) or when
+              :code:`raw_data` is 'summary'.  Only holds the repeats of the most recent pass when :code:`raw_data` is
+              'last_pass'.
+            - **<namespace>.counts_file** Path of the memory-mapped file that holds the raw counts and
+              **<namespace>.counts_key** the name of the array in that file.  Only created when the scan holds raw
+              values in a memory-mapped file.
+            - **<namespace>.nvalues**, **<namespace>.sum**, and **<namespace>.sum_sq** The number, sum, and sum of
+              squares of the values measured at each scan point.  Only created when :code:`raw_data` is 'summary' or
+              when the scan holds raw values in a memory-mapped file.
             - **<namespace>.mean** Mean count values calculated at each scan point.
             - **<namespace>.error** Standard deviation of each mean value in the <namespace>.mean array.
+            - **<namespace>.repeats** Number of repeats performed at each scan point over all passes.  Only created
+              when the scan stops repeating scan points early (see :code:`enable_adaptive_repeats`).
             - **<namespace>.hist** Binned mean values at each scan point.  Each entry is the histogram at the
               corresponding scan point.
             - **<namespace>.bins** Defines the bin boundaries for histograms.
@@ -104,6 +116,8 @@ class ScanModel(Model):
     :type aggregate_histogram: bool, optional
     :param disable_validations: If True, no fit validatons will be performed, fits will always be performed and no fit param values will be validated, defaults to False
     :type disable_validations: bool, optional
+    :param raw_data: Raw values kept in the counts dataset: 'full' for every pass and repeat, 'last_pass' for the repeats of the most recent pass, or 'summary' for only the number, sum, and sum of squares of the values at each scan point, defaults to 'full'
+    :type raw_data: string, optional
 
     :param fit_map: Dictionary of fit param names to dataset name mappings.  Fit params are renamed according to this mapping before the fit is saved to the datasets.  Keys specify to a fit param name and the corresponding value in the dictionary specifies the dataset name.  Defaluts to {}
     :type fit_map: dict, optional
@@ -188,6 +202,7 @@ class ScanModel(Model):
     enable_histograms = True     #: If True, histogram data is generated for plotting by the current scan histogram applet -- this applet displays a histogram of the data collected at each scan point
     aggregate_histogram = True   #: If True, histogram data is generated for plotting by the current scan aggregate histogram applet -- this applet displays a histogram of all data collected, aggregated over all scan points
     disable_validations = False  #: If True, no fit validatons will be performed, fits will always be performed and no fit param values will be validated, defaults to False
+    raw_data = 'full'            #: Raw values kept in the counts dataset: 'full' for every pass and repeat, 'last_pass' for only the repeats of the most recent pass, or 'summary' for no raw values, only the number, sum, and sum of squares of the values measured at each scan point.  Means, errors, histograms, and fits are the same for every setting.
 
     # fitting configuration
     fit_map = {}         #: Dictionary of fit param names to dataset name mappings.  Fit params are renamed according to this mapping before the fit is saved to the datasets.  Keys specify to a fit param name and the corresponding value in the dictionary specifies the dataset name.
@@ -230,6 +245,9 @@ class ScanModel(Model):
     fit_valid_soft = None    #: Set to True by the Scan class if the fit passed soft-validation, False if it falied, None if soft-validation has not yet been performed.
     fit_valid_strong = None  #: Set to True by the Scan class if the fit passed strong-validation, False if it falied, None if strong-validation has not yet been performed.
     _fit_saved = None        #: Set to True by the Scan class after the main fit has been broadcast, saved, and persisted to the datasets.
+    _defer_counts_mirror = False  #: Set to True by write_datasets(which='mirror') when updates of the mirrored counts dataset are deferred until write_mirror() is called.
+    _counts_in_store = False      #: Set to True when the raw counts are held in the scan's memory-mapped raw data store instead of in the counts dataset.
+    _sums = None                  #: Running sums of the values measured at each scan point used by mutate_datasets_pass().
 
     type = None              #: Set by the TimeFreqScan class to either 'time' or 'frequency' to indiciate to the model if it will be processing data from a time scan or from a frequency scan.
 
@@ -237,6 +255,8 @@ class ScanModel(Model):
         """Generate a report string that displays the values of the stat datasets."""
         str = ""
         for key in ['bins', 'counts', 'error', 'hist', 'mean', 'nbins']:
+            if key == 'counts' and self.raw_data == 'summary':
+                continue
             v = self.stat_model.get(key).items()
             str += "[{0}]\n {1}\n\n".format(key, v)
         for k, v in self.get(['points']).items():
@@ -345,6 +365,7 @@ class ScanModel(Model):
         stage."""
         self.shape = shape
         self.plot_shape = plot_shape
+        self._defer_counts_mirror = False
 
         # allow below to work on either 1d or 2d scans
         if self._scan._dim == 1:
@@ -368,9 +389,22 @@ class ScanModel(Model):
         self.init_plots(dimension=dimension)
 
         # initialize stats
-        self.stat_model.init('counts', shape=shape + [self.npasses * self.nrepeats], fill_value=0, dtype=np.int32)
+        self._init_sums(shape)
+        if self.raw_data == 'full':
+            self.init_counts(shape + [self.npasses * self.nrepeats])
+        elif self.raw_data == 'last_pass':
+            self.init_counts(shape + [self.nrepeats])
+        elif self.raw_data == 'summary':
+            self._counts_in_store = False
+            self.stat_model.counts = None
+        else:
+            raise ValueError("raw_data must be 'full', 'last_pass', or 'summary'")
+        if self._has_summary():
+            self._write_summary()
         self.stat_model.init(key='mean', shape=shape, varname='means')
         self.stat_model.init('error', shape, 'errors')
+        if self._scan.enable_adaptive_repeats:
+            self.stat_model.init('repeats', shape, fill_value=0, dtype=np.int32)
         if self.enable_histograms:
             self.stat_model.write('nbins')
             self.stat_model.write('bins')
@@ -380,6 +414,26 @@ class ScanModel(Model):
         # initialize fits
         self.fit_model.init('fitline', plot_shape)
 
+    def init_counts(self, shape):
+        """Initializes the raw counts.  When the scan has a raw data store (see :code:`enable_raw_store`) the counts are
+        held in the store and only the location of the counts in the store is written to the datasets."""
+        store = self._scan._raw_store
+        self._counts_in_store = store is not None
+
+        # repeats that are skipped keep their columns and are NaN (see Scan.enable_adaptive_repeats)
+        if self._scan.enable_adaptive_repeats:
+            dtype, fill_value = np.float64, np.nan
+        else:
+            dtype, fill_value = np.int32, 0
+        if self._counts_in_store:
+            key = '{0}.counts'.format(self.namespace)
+            self.stat_model.counts = store.allocate(key, shape, dtype)
+            self.stat_model.counts[...] = fill_value
+            self.stat_model.set('counts_file', store.path)
+            self.stat_model.set('counts_key', key)
+        else:
+            self.stat_model.init('counts', shape=shape, fill_value=fill_value, dtype=dtype)
+
     def init_plots(self, dimension):
         """Initialize the plot datasets.
 
@@ -429,40 +483,63 @@ class ScanModel(Model):
             self.set('plots.dim1.x_units', self.x_units)
             self.set('plots.dim1.y_units', self.y_units)
 
-    def write_datasets(self, dimension):
+    def write_datasets(self, dimension, which='both'):
         """Writes all internal values to their datasets.  This method is called by the scan when it is resuming from a
-         pause to restore previous scan values to their datasets."""
+         pause to restore previous scan values to their datasets.
+
+        :param dimension: Dimension of the scan that the model is registered to.
+        :param which: Set to 'both' (default) to write the datasets under both the model namespace and the mirror
+                      namespace, or to 'mirror' to only write the datasets under the mirror namespace that are displayed
+                      by the current scan applets.  The scan writes only the mirrored datasets when it resumes with
+                      :code:`enable_fast_resume` set since the datasets under the model namespace are left as they
+                      are.  The counts dataset holds every value measured during the scan, so it is then not re-sent to
+                      the master.  Updates of the mirrored counts dataset are instead deferred until write_mirror() is
+                      called.
+        :type which: String ['both' or 'mirror']
+        """
+        if which == 'mirror' and not self.mirror:
+            return
 
         # don't draw plots while writing
-        self.set('plots.trigger', 0)
+        self.set('plots.trigger', 0, which=which)
 
         if dimension == 0:
+            if which == 'mirror':
+                self.set('rid', self._scan.scheduler.rid, which=which)
 
             # write scan points
-            self.stat_model.write('points')
+            self.stat_model.write('points', which=which)
             #self.write('x', 'x')
 
             # write plots
-            self.write('plots.x', varname='x')
-            self.write('plots.y', varname='y')
-            self.write('plots.fitline', varname='fitline')
-            self.set('plots.plot_title', self.plot_title)
-            self.set('plots.y_label', self.y_label)
-            self.set('plots.x_label', self.x_label)
-            self.set('plots.x_scale', self.x_scale)
-            self.set('plots.y_scale', self.y_scale)
-            self.set('plots.x_units', self.x_units)
-            self.set('plots.y_units', self.y_units)
+            self.write('plots.x', varname='x', which=which)
+            self.write('plots.y', varname='y', which=which)
+            self.write('plots.fitline', varname='fitline', which=which)
+            self.set('plots.plot_title', self.plot_title, which=which)
+            self.set('plots.y_label', self.y_label, which=which)
+            self.set('plots.x_label', self.x_label, which=which)
+            self.set('plots.x_scale', self.x_scale, which=which)
+            self.set('plots.y_scale', self.y_scale, which=which)
+            self.set('plots.x_units', self.x_units, which=which)
+            self.set('plots.y_units', self.y_units, which=which)
 
             # write stats
-            self.stat_model.write('counts')
-            self.stat_model.write('mean', 'means')
-            self.stat_model.write('error', 'errors')
+            if which == 'mirror':
+                self._defer_counts_mirror = True
+            else:
+                if self._has_counts_dataset():
+                    self.stat_model.write('counts')
+                if self._has_summary():
+                    self._write_summary()
+            self.stat_model.write('mean', 'means', which=which)
+            self.stat_model.write('error', 'errors', which=which)
+            if self._scan.enable_adaptive_repeats:
+                self.stat_model.write('repeats', which=which)
 
             if self.enable_histograms:
-                self.stat_model.write('nbins')
-                self.stat_model.write('bins')
-                self.stat_model.write('hist')
+                self.stat_model.write('nbins', which=which)
+                self.stat_model.write('bins', which=which)
+                self.stat_model.write('hist', which=which)
                 self.hist_model.init_datasets()
 
         elif dimension is 1:
@@ -470,21 +547,28 @@ class ScanModel(Model):
             #self.write('x', 'x')
 
             # write plots
-            self.write('plots.dim1.x', varname='dim1_x')
-            self.write('plots.dim1.y', varname='dim1_y')
-            self.write('plots.dim1.fitline', varname='dim1_fitline')
-            self.set('plots.dim1.plot_title', self.plot_title)
-            self.set('plots.dim1.y_label', self.y_label)
-            self.set('plots.dim1.x_label', self.x_label)
-            self.set('plots.dim1.x_scale', self.x_scale)
-            self.set('plots.dim1.y_scale', self.y_scale)
-            self.set('plots.dim1.x_units', self.x_units)
-            self.set('plots.dim1.y_units', self.y_units)
+            self.write('plots.dim1.x', varname='dim1_x', which=which)
+            self.write('plots.dim1.y', varname='dim1_y', which=which)
+            self.write('plots.dim1.fitline', varname='dim1_fitline', which=which)
+            self.set('plots.dim1.plot_title', self.plot_title, which=which)
+            self.set('plots.dim1.y_label', self.y_label, which=which)
+            self.set('plots.dim1.x_label', self.x_label, which=which)
+            self.set('plots.dim1.x_scale', self.x_scale, which=which)
+            self.set('plots.dim1.y_scale', self.y_scale, which=which)
+            self.set('plots.dim1.x_units', self.x_units, which=which)
+            self.set('plots.dim1.y_units', self.y_units, which=which)
 
         # draw plots when done writting
-        self.set('plots.trigger', 1)
+        self.set('plots.trigger', 1, which=which)
+
+    def write_mirror(self):
+        """Writes the datasets under the mirror namespace whose updates were deferred by write_datasets().  This method
+        is called by the scan when it completes, pauses, or is terminated."""
+        if self._defer_counts_mirror and self._has_counts_dataset():
+            self.stat_model.write('counts', which='mirror')
+            self._defer_counts_mirror = False
 
-    def mutate_datasets(self, i_point, point, counts):
+    def mutate_datasets(self, i_point, point, counts, offset=None):
         """Generates the mean and standard error of the mean for the measured value at the specified scan point
         and mutates the corresponding datasets.  The `points` and `counts` datasets are also mutated with the
         specified scan point value and raw values measured at the specified scan point.  If histograms are enabled,
@@ -494,27 +578,25 @@ class ScanModel(Model):
         :param i_point: scan point index
         :param point: value of scan point
         :param counts: array containing all values returned by the scan's measure() method during the specified
-                       scan point
+                       scan point.  Repeats that were skipped are NaN (see Scan.enable_adaptive_repeats).
+        :param offset: number of values in counts that were measured during previous passes.  Defaults to all but the
+                       last nrepeats values, since every pass has nrepeats values.
         """
-        dim = self._scan._dim
-
         # mutate the dataset containing the scan point values
         self.mutate_points(i_point, point)
-        # mutate the dataset containing the array of counts measured at each repetition of the scan point
-        if dim == 1:
-            # mutate the counts dataset
-            i = ((i_point, i_point + 1), (0, len(counts)))
-            self.stat_model.mutate('counts', i, counts, update_local=False)
 
-            # mutate the local counts array (so it can be written when a scan resumes)
-            self.stat_model.counts[i_point, 0:len(counts)] = counts
+        # mutate the dataset containing the array of counts measured at each repetition of the scan point
+        if self.raw_data == 'last_pass':
+            if offset is None:
+                offset = max(len(counts) - self.nrepeats, 0)
+            self._mutate_counts(i_point, offset, np.asarray(counts)[offset:])
         else:
-            # mutate the counts dataset with counts
-            i = ((i_point[0], i_point[0] + 1), (i_point[1], i_point[1] + 1), (0, len(counts)))
-            self.stat_model.mutate('counts', i, counts, update_local=False)
+            self._mutate_counts(i_point, 0, counts)
 
-            # mutate the local counts array (so it can be written when a scan resumes)
-            self.stat_model.counts[i_point[0], i_point[1], 0:len(counts)] = counts
+        # running sums used by mutate_datasets_pass()
+        self._reset_sums(i_point, counts)
+        if self._has_summary():
+            self._mutate_summary(i_point)
 
         # calculate the mean
         mean = self.calc_mean(counts)
@@ -530,28 +612,213 @@ class ScanModel(Model):
 
         # histograms
         if self.enable_histograms:
-
             # bin counts and mutate the histogram at the current scan point
             self.hist_model.reset_bins()
-            self.hist_model.mutate(counts)
+            self._mutate_hist(i_point, counts)
 
-            # mutate the time series histograms
-            if dim == 1:
-                # mutate the hist dataset
-                self.stat_model.mutate('hist', i_point, self.hist_model.bins, update_local=False)
+        return mean
 
-                # mutate the local hist array
-                self.stat_model.hist[i_point] = self.hist_model.bins
-            else:
-                # mutate the hist dataset
-                i = ((i_point[0], i_point[0]+1), (i_point[1], i_point[1] + 1))
-                self.stat_model.mutate('hist', i, self.hist_model.bins, update_local=False)
+    def mutate_datasets_pass(self, i_point, point, offset, counts, all_counts=None):
+        """Same as :code:`mutate_datasets()`, but only the values measured at the specified scan point during the
+        current pass are given.  The mean and the standard error of the mean are updated from running sums of the
+        values measured during previous passes, and only the new values are written to the `counts` dataset and
+        binned into the histogram, so the time taken does not grow with the number of passes.
+
+        The mean and error are calculated from every value measured at the scan point instead when :code:`calc_mean()`
+        or :code:`calc_error()` is overridden, or when the values measured during previous passes were not given to the
+        model in order (e.g. when the scan was rewound).
 
-                # mutate the local hist array
-                self.stat_model.hist[i_point[0], i_point[1]] = self.hist_model.bins
+        :param i_point: scan point index
+        :param point: value of scan point
+        :param offset: number of values measured at the scan point during previous passes
+        :param counts: array containing the values returned by the scan's measure() method during the current pass
+        :param all_counts: array containing every value measured at the scan point so far.  Only used when the mean and
+                           error can't be updated from the running sums.  Defaults to the counts held by the model,
+                           which requires :code:`raw_data` to be 'full'.
+        """
+        counts = np.asarray(counts)
+        idx = self._point_index(i_point)
+        end = offset + len(counts)
+
+        # models that override mutate_datasets() are given every value measured at the scan point
+        if getattr(type(self), 'mutate_datasets') is not ScanModel.mutate_datasets:
+            return self.mutate_datasets(i_point, point, self._all_counts(i_point, offset, counts, all_counts))
+
+        # mutate the dataset containing the scan point values
+        self.mutate_points(i_point, point)
+
+        # mutate only the new values of the counts dataset
+        self._mutate_counts(i_point, offset, counts)
+
+        in_order = self._sums is not None and self._sums['end'][idx] == offset
+        if in_order and not self._custom_stats():
+            # update the running sums
+            values = counts[~np.isnan(counts)] if counts.dtype.kind == 'f' else counts
+            self._sums['nvalues'][idx] += len(values)
+            self._sums['sum'][idx] += np.sum(values, dtype=np.float64)
+            self._sums['sum_sq'][idx] += np.sum(np.square(values, dtype=np.float64))
+            self._sums['end'][idx] = end
+            n = self._sums['nvalues'][idx]
+            mean = self._sums['sum'][idx] / n if n > 0 else np.nan
+            var = max(self._sums['sum_sq'][idx] / n - mean * mean, 0.0) if n > 0 else np.nan
+            error = np.sqrt(var / n) if n > 0 else np.nan
+        else:
+            # rebuild the running sums from every value measured at the scan point
+            all_counts = self._all_counts(i_point, offset, counts, all_counts)
+            self._reset_sums(i_point, all_counts)
+            mean = self.calc_mean(all_counts)
+            error = self.calc_error(all_counts)
+        if self._has_summary():
+            self._mutate_summary(i_point)
+
+        # mutate the datasets containing the mean and error at each scan point
+        self.mutate_means(i_point, mean)
+        self.mutate_errors(i_point, error)
+
+        # histograms
+        if self.enable_histograms:
+            self.hist_model.reset_bins()
+            if not in_order:
+                self._mutate_hist(i_point, all_counts)
+            else:
+                # add the new values to the histogram of the previous passes
+                if offset > 0:
+                    self.hist_model.bins[:] = self._sums['hist'][idx]
+                self._mutate_hist(i_point, counts)
 
         return mean
 
+    def _point_index(self, i_point):
+        """Returns the index of a scan point into the arrays of statistics"""
+        if self._scan._dim == 1:
+            return int(i_point)
+        return int(i_point[0]), int(i_point[1])
+
+    def _all_counts(self, i_point, offset, counts, all_counts=None):
+        """Returns every value measured at a scan point given the values measured during the current pass"""
+        if all_counts is not None:
+            return np.asarray(all_counts)
+        if self.raw_data != 'full':
+            raise ValueError("every value measured at the scan point must be given when raw_data is "
+                             "'{0}'".format(self.raw_data))
+        row = self.stat_model.counts[self._point_index(i_point)]
+        row[offset:offset + len(counts)] = counts
+        return row[:offset + len(counts)]
+
+    def _custom_stats(self):
+        """Returns True if calc_mean() or calc_error() has been overridden"""
+        return (getattr(type(self), 'calc_mean') is not ScanModel.calc_mean
+                or getattr(type(self), 'calc_error') is not ScanModel.calc_error)
+
+    def _init_sums(self, shape):
+        """Initialize the running sums of the values measured at each scan point"""
+        self._sums = {
+            'nvalues': np.zeros(shape, dtype=np.int64),
+            'sum': np.zeros(shape, dtype=np.float64),
+            'sum_sq': np.zeros(shape, dtype=np.float64),
+            # number of values measured at each scan point that have been given to the model
+            'end': np.zeros(shape, dtype=np.int64)
+        }
+        if self.enable_histograms:
+            # histogram of the values measured at each scan point.  The hist datasets are not read back, as the
+            # mirrored dataset is shared by every model.
+            self._sums['hist'] = np.zeros(list(shape) + [self.nbins], dtype=np.int64)
+
+    def _reset_sums(self, i_point, counts):
+        """Set the running sums of a scan point to the sums of every value measured at the scan point"""
+        if self._sums is None:
+            return
+        idx = self._point_index(i_point)
+        counts = np.asarray(counts)
+        values = counts[~np.isnan(counts)] if counts.dtype.kind == 'f' else counts
+        self._sums['nvalues'][idx] = len(values)
+        self._sums['sum'][idx] = np.sum(values, dtype=np.float64)
+        self._sums['sum_sq'][idx] = np.sum(np.square(values, dtype=np.float64))
+        self._sums['end'][idx] = len(counts)
+
+    def _write_summary(self):
+        """Write the running sums of every scan point to their datasets (see raw_data)"""
+        for key in ['nvalues', 'sum', 'sum_sq']:
+            self.stat_model.set(key, self._sums[key], which='main')
+
+    def _mutate_summary(self, i_point):
+        """Mutate the datasets holding the running sums of a scan point (see raw_data)"""
+        idx = self._point_index(i_point)
+        if self._scan._dim == 1:
+            i = i_point
+        else:
+            i = ((i_point[0], i_point[0] + 1), (i_point[1], i_point[1] + 1))
+        for key in ['nvalues', 'sum', 'sum_sq']:
+            self.stat_model.mutate(key, i, self._sums[key][idx], which='main', update_local=False)
+
+    def _has_summary(self):
+        """Returns True if the number, sum, and sum of squares of the values measured at each scan point are written to
+        datasets, which is the case when the raw counts are not held in the counts dataset"""
+        return self.raw_data == 'summary' or self._counts_in_store
+
+    def _has_counts_dataset(self):
+        """Returns True if the raw counts are held in the counts dataset"""
+        return self.raw_data != 'summary' and not self._counts_in_store
+
+    def _mutate_counts(self, i_point, offset, counts):
+        """Mutate the counts dataset with values measured at a scan point, starting at repeat :code:`offset`"""
+        if self.raw_data == 'summary':
+            return
+        if self.raw_data == 'last_pass':
+            # only the repeats of the most recent pass are kept, repeats that were not measured are NaN when the counts
+            # are floats (see Scan.enable_adaptive_repeats)
+            dtype = self.stat_model.counts.dtype
+            values = np.full(self.nrepeats, np.nan if dtype.kind == 'f' else 0, dtype=dtype)
+            values[:len(counts)] = counts
+            offset, counts = 0, values
+        which = 'main' if self._defer_counts_mirror else 'both'
+        end = offset + len(counts)
+        if self._counts_in_store:
+            # the counts are written to the raw data store in place
+            if self._scan._dim == 1:
+                self.stat_model.counts[i_point, offset:end] = counts
+            else:
+                self.stat_model.counts[i_point[0], i_point[1], offset:end] = counts
+        elif self._scan._dim == 1:
+            # mutate the counts dataset
+            i = ((i_point, i_point + 1), (offset, end))
+            self.stat_model.mutate('counts', i, counts, which=which, update_local=False)
+
+            # mutate the local counts array (so it can be written when a scan resumes)
+            self.stat_model.counts[i_point, offset:end] = counts
+        else:
+            # mutate the counts dataset with counts
+            i = ((i_point[0], i_point[0] + 1), (i_point[1], i_point[1] + 1), (offset, end))
+            self.stat_model.mutate('counts', i, counts, which=which, update_local=False)
+
+            # mutate the local counts array (so it can be written when a scan resumes)
+            self.stat_model.counts[i_point[0], i_point[1], offset:end] = counts
+
+    def _mutate_hist(self, i_point, counts):
+        """Bin counts into the histogram of the current scan point and mutate the histogram datasets"""
+        counts = np.asarray(counts)
+        if counts.dtype.kind == 'f':
+            # skipped repeats are NaN
+            counts = counts[~np.isnan(counts)].astype(np.int64)
+        self.hist_model.mutate(counts)
+        if self._sums is not None and 'hist' in self._sums:
+            self._sums['hist'][self._point_index(i_point)] = self.hist_model.bins
+
+        # mutate the time series histograms
+        if self._scan._dim == 1:
+            # mutate the hist dataset
+            self.stat_model.mutate('hist', i_point, self.hist_model.bins, update_local=False)
+
+            # mutate the local hist array
+            self.stat_model.hist[i_point] = self.hist_model.bins
+        else:
+            # mutate the hist dataset
+            i = ((i_point[0], i_point[0]+1), (i_point[1], i_point[1] + 1))
+            self.stat_model.mutate('hist', i, self.hist_model.bins, update_local=False)
+
+            # mutate the local hist array
+            self.stat_model.hist[i_point[0], i_point[1]] = self.hist_model.bins
+
     def mutate_plot(self, i_point, x, y, error=None, dim=None):
         """Mutate the plots.x and plots.y datasets.  This method is called by the scan to update the plot as the scan
         runs.
@@ -677,6 +944,21 @@ class ScanModel(Model):
             # mutate the local errors array
             self.stat_model.errors[i_point[0], i_point[1]] = error
 
+    def mutate_repeats(self, i_point, nrepeats):
+        """Mutate the 'repeats' dataset with the number of repeats performed at the specified scan point
+
+        :param i_point: index of the scan point
+        :param nrepeats: number of repeats performed at the scan point over all passes
+        """
+        dim = self._scan._dim
+        if dim == 1:
+            self.stat_model.mutate('repeats', i_point, nrepeats, update_local=False)
+            self.stat_model.repeats[i_point] = nrepeats
+        else:
+            i = ((i_point[0], i_point[0] + 1), (i_point[1], i_point[1] + 1))
+            self.stat_model.mutate('repeats', i, nrepeats, update_local=False)
+            self.stat_model.repeats[i_point[0], i_point[1]] = nrepeats
+
     #def rewind(self, i_point_start):
     #    """Set all internal data values to np.nan from i_point_start forward"""
     #    for i_point in range(i_point_start, self._scan.npoints):
@@ -714,8 +996,17 @@ class ScanModel(Model):
 
     # [loaders]
     def load_counts(self):
-        """Loads the internal counts variable from its dataset"""
-        self.stat_model.load('counts')
+        """Loads the internal counts variable from its dataset, or from the raw data store that holds the counts"""
+        if self.raw_data == 'summary':
+            # only the running sums of the counts were kept
+            self.stat_model.counts = None
+            return
+        path = self.stat_model.get('counts_file', default=None)
+        if path is not None:
+            key = self.stat_model.get('counts_key')
+            self.stat_model.counts = RawStore(path, mode='r').array(key)
+        else:
+            self.stat_model.load('counts')
 
     def load_xs(self):
         """Loads the internal xs variable from its dataset"""
@@ -1,3 +1,4 @@
 # These modules are imported when importing the entire scans package via "from scan_framework.scans import *"
 from .scan import *
 from .extensions import *
+from .ordering import *
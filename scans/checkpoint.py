@@ -0,0 +1,120 @@
+# On-disk checkpoints of the data collected by a scan (see Scan.enable_checkpoints).
+#
+# The data collected at each scan point is written to an HDF5 file as the host receives it, so that a scan can be
+# rebuilt and continued by a new run of the experiment (see Scan.resume_from_checkpoint()) after the worker process
+# running the scan exits unexpectedly.  Each time the checkpoint is written, only the scan points whose data has
+# changed since it was last written are written.  The number of passes completed at each scan point is written last,
+# so a scan point is never marked as completed in the file before its data has been written.
+import h5py
+import numpy as np
+
+
+def checkpoint_progress(passes, npasses):
+    """Returns the pass and the loop index at which a scan continues.
+
+    :param passes: Number of passes completed at each loop index.
+    :param npasses: Number of passes of the scan.
+    :returns: Tuple (i_pass, idx).  i_pass is npasses if all passes have completed.
+    """
+    passes = np.asarray(passes)
+    i_pass = int(passes.min()) if len(passes) else npasses
+    if i_pass >= npasses:
+        return npasses, 0
+
+    # scan points are executed in order of the loop index
+    idx = int(np.argmax(passes <= i_pass))
+    return i_pass, idx
+
+
+class Checkpoint:
+    """Checkpoint file of a scan.
+
+    Scan points are stored in the order they are executed, i.e. by loop index (idx).
+
+    :param path: Path of the checkpoint file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._index = {}
+        self._dirty = {}
+
+    @staticmethod
+    def _key(i_point):
+        return tuple(np.atleast_1d(i_point).tolist())
+
+    def _index_points(self, i_points):
+        self._index = {self._key(i_point): idx for idx, i_point in enumerate(i_points)}
+        self._dirty = {}
+
+    @property
+    def pending(self):
+        """Number of scan points whose data has not been written to the file"""
+        return len(self._dirty)
+
+    def create(self, points, i_points, data, repeats, measurements, attrs=None):
+        """Create the checkpoint file of a scan that is starting.
+
+        :param points: Value of the scan point at each loop index.
+        :param i_points: Index of the scan point at each loop index.
+        :param data: Values measured at each loop index, measurement, pass, and repeat.
+        :param repeats: Number of repeats performed at each loop index and pass.
+        :param measurements: Names of the measurements.
+        :param attrs: Dictionary of settings of the scan that are saved as attributes of the file.
+        """
+        data = np.asarray(data)
+        with h5py.File(self.path, 'w') as f:
+            f['points'] = points
+            f['i_points'] = i_points
+            f.create_dataset('data', data=data, chunks=(1,) + data.shape[1:], compression='gzip')
+            f['repeats'] = repeats
+            f['passes'] = np.zeros(len(data), dtype=np.int32)
+            f.attrs['measurements'] = list(measurements)
+            for key, value in (attrs or {}).items():
+                f.attrs[key] = value
+        self._index_points(i_points)
+
+    def load(self):
+        """Read the checkpoint file.
+
+        :returns: Dictionary with the points, i_points, data, repeats, and passes arrays and the attributes of the file.
+        """
+        with h5py.File(self.path, 'r') as f:
+            state = {key: f[key][()] for key in ['points', 'i_points', 'data', 'repeats', 'passes']}
+            attrs = dict(f.attrs)
+        attrs['measurements'] = [m.decode() if isinstance(m, bytes) else str(m) for m in attrs['measurements']]
+        state['attrs'] = attrs
+        self._index_points(state['i_points'])
+        return state
+
+    def is_last(self, i_point):
+        """Returns True if the scan point is the last scan point executed during each pass"""
+        return self._index[self._key(i_point)] == len(self._index) - 1
+
+    def update(self, i_point, i_pass, data, repeats):
+        """Record the data collected at a scan point.  The data is written to the file by write().
+
+        :param i_point: Index of the scan point.
+        :param i_pass: Index of the pass during which the data was collected.
+        :param data: Values measured at the scan point during all passes so far, indexed by measurement and repeat.
+        :param repeats: Number of repeats performed at the scan point during each pass.
+        """
+        idx = self._index[self._key(i_point)]
+        self._dirty[idx] = (i_pass + 1, np.array(data), np.array(repeats))
+
+    def write(self):
+        """Write the data of all scan points updated since the file was last written"""
+        if not self._dirty:
+            return
+        indices = sorted(self._dirty)
+        with h5py.File(self.path, 'r+') as f:
+            for idx in indices:
+                _, data, repeats = self._dirty[idx]
+                f['data'][idx] = data
+                f['repeats'][idx] = repeats
+            f.flush()
+
+            # mark scan points completed once their data is on disk
+            for idx in indices:
+                f['passes'][idx] = self._dirty[idx][0]
+        self._dirty = {}
@@ -0,0 +1,160 @@
+# Cache of compiled kernels (see Scan.enable_compile_cache).
+#
+# ARTIQ embeds the values of all attributes read by a kernel into the compiled kernel, so a compiled kernel can only be
+# reused when the kernel code is unchanged and every attribute of every object embedded in the kernel still has the
+# value it had when the kernel was compiled.  The attributes read by a kernel cannot be determined reliably from its
+# source code (e.g. attributes read through aliases or by functions the attribute is passed to), so the attributes
+# embedded in the kernel are taken from the types the compiler inferred for each embedded object.  When they are not
+# available, every attribute of the object is compared.  Kernels are cached in memory for the lifetime of the worker
+# process.
+# Compiled kernels are not cached on disk: the embedding map of a compiled kernel refers to the Python objects that
+# exist in the process that compiled it and can only be rebuilt by compiling the kernel again.
+#
+# ARTIQ has no public API to run a kernel that has already been compiled, so KernelCache._run_compiled() mirrors
+# Core.run().  Kernels are only cached under the ARTIQ versions whose Core.run() it mirrors, under any other version
+# kernels are always compiled by Core.run().
+from collections import OrderedDict
+import hashlib
+import inspect
+import logging
+import numpy as np
+from scan_framework.scans.invariants import kernel_functions
+
+logger = logging.getLogger(__name__)
+
+# types of attribute values that are compared to determine if a compiled kernel can be reused
+_value_types = (bool, int, float, str, np.bool_, np.integer, np.floating, np.ndarray, list, tuple, type(None))
+
+# major ARTIQ versions whose Core.run() is mirrored by KernelCache._run_compiled()
+supported_versions = (3, 4, 5, 6, 7)
+
+
+def artiq_major_version():
+    """Returns the major version of the installed ARTIQ package, or None if it cannot be determined"""
+    try:
+        from artiq import __version__
+        return int(__version__.split('.')[0])
+    except (ImportError, ValueError):
+        return None
+
+
+def source_hash(classes):
+    """Returns a hash of the source code of all @kernel and @portable methods of the given classes"""
+    h = hashlib.sha1()
+    for cls in classes:
+        h.update(cls.__qualname__.encode())
+        for func in kernel_functions(cls):
+            try:
+                h.update(inspect.getsource(func).encode())
+            except (OSError, TypeError):
+                h.update(func.__qualname__.encode())
+    return h.hexdigest()
+
+
+def _value_hash(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, np.ndarray):
+        return str(value.dtype), value.shape, hashlib.sha1(np.ascontiguousarray(value).tobytes()).hexdigest()
+    if isinstance(value, (list, tuple)):
+        return tuple(_value_hash(v) for v in value)
+    return repr(value)
+
+
+def embedded_attributes(embedding_map, obj):
+    """Returns the names of the attributes of an object that the compiler embedded in a kernel, or None if they are not
+    known"""
+    try:
+        instance_type = embedding_map.type_map[type(obj)][0]
+        return set(instance_type.attributes)
+    except (AttributeError, KeyError, IndexError, TypeError):
+        return None
+
+
+def fingerprint(obj, attrs=None):
+    """Returns the values of the attributes of an object that may be embedded in a kernel.
+
+    :param attrs: Names of the attributes embedded in the kernel.  Defaults to all attributes of the object.
+    """
+    values = {}
+    for cls in reversed(type(obj).__mro__):
+        values.update(vars(cls))
+    values.update(getattr(obj, '__dict__', {}))
+    if attrs is not None:
+        values = {attr: value for attr, value in values.items() if attr in attrs}
+    return tuple(sorted((attr, _value_hash(value)) for attr, value in values.items()
+                        if isinstance(value, _value_types) and not attr.startswith('__')))
+
+
+class KernelCache:
+    """Least recently used cache of compiled kernels.
+
+    :param maxsize: Maximum number of compiled kernels in the cache.
+    """
+
+    def __init__(self, maxsize=4):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.supported = artiq_major_version() in supported_versions
+
+    def clear(self):
+        self._entries.clear()
+
+    def run(self, core, function, args, classes=()):
+        """Run a kernel, compiling it only if no compiled kernel in the cache can be reused.
+
+        :param core: The core device.
+        :param function: The kernel, e.g. :code:`type(scan)._run_scan_core`.
+        :param args: Arguments of the kernel, including :code:`self`.
+        :param classes: Classes whose kernel code is run by the kernel in addition to the class of :code:`self`.
+        """
+        if not self.supported:
+            core.run(function, args, {})
+            return
+
+        obj = args[0]
+        key = (type(obj), id(obj), function.__qualname__, _value_hash(list(args[1:])),
+               source_hash([type(obj)] + list(classes)))
+
+        entry = self._entries.get(key)
+        if entry is not None and all(fingerprint(o, attrs) == f for o, attrs, f in entry['fingerprints']):
+            self.hits += 1
+            self._entries.move_to_end(key)
+            logger.debug('reusing compiled kernel {0}'.format(function.__qualname__))
+        else:
+            self.misses += 1
+            compiled = core.compile(function, args, {})
+            embedding_map = compiled[0]
+            objects = [o for o in getattr(embedding_map, 'object_forward_map', {}).values() if not callable(o)]
+            if not any(o is obj for o in objects):
+                objects.append(obj)
+            fingerprints = []
+            for o in objects:
+                attrs = embedded_attributes(embedding_map, o)
+                fingerprints.append((o, attrs, fingerprint(o, attrs)))
+
+            # the objects are referenced by the entry so their ids are not reused while it is in the cache
+            entry = {'compiled': compiled, 'fingerprints': fingerprints}
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        self._run_compiled(core, entry['compiled'])
+
+    def _run_compiled(self, core, compiled):
+        """Load and run a compiled kernel and serve its RPCs.  Mirrors :code:`Core.run()` of the ARTIQ versions in
+        supported_versions."""
+        embedding_map, library, symbolizer, demangler = compiled
+        if getattr(core, 'first_run', False):
+            core.comm.check_system_info()
+            core.first_run = False
+        core.comm.load(library)
+        core.comm.run()
+        core.comm.serve(embedding_map, symbolizer, demangler)
+
+
+# compiled kernels of the worker process
+kernel_cache = KernelCache()
@@ -418,10 +418,12 @@ class ReloadingScan(Scan):
         #offset = self._data.address(pos=[i_measurement, i_point])
         #offset =
         #offset = offset + i_pass * self.nrepeats
+        nrepeats = self._repeats[self._data_row][self._i_pass]
+        offset = self._data_offset()
         sum_ = 0.0
-        for i in range(self.nrepeats):
-            sum_ += self._data[self._idx][i_measurement][self.nrepeats*self._i_pass + i]
-        mean = sum_ / self.nrepeats
+        for i in range(nrepeats):
+            sum_ += self._data[self._data_row][i_measurement][offset + i]
+        mean = sum_ / nrepeats
         if mean >= self.ion_threshold:
             present = True
         else:
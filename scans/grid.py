@@ -0,0 +1,56 @@
+# Construction of the arrays of scan points looped over by a scan.
+#
+# Scan points are given as lists, NumPy arrays, or ARTIQ scannables (e.g. RangeScan).  The values of each dimension are
+# converted to a single NumPy array without building intermediate Python lists, and the grids of 2D scans are built
+# with NumPy instead of nested Python loops, so scans with many scan points are set up quickly.
+import numpy as np
+
+
+def scan_values(points):
+    """Returns the values of a dimension of a scan as a 1D float64 array.
+
+    :param points: List, array, or ARTIQ scannable of the values.  The values of a RangeScan that is not randomized
+                   are generated directly with np.linspace().
+    """
+    if isinstance(points, np.ndarray):
+        return np.array(points, dtype=np.float64).reshape(-1)
+
+    # RangeScan
+    if all(hasattr(points, key) for key in ['start', 'stop', 'npoints']) and not getattr(points, 'randomize', False):
+        npoints = int(points.npoints)
+        if npoints == 1:
+            return np.array([points.start], dtype=np.float64)
+        return np.linspace(points.start, points.stop, npoints, dtype=np.float64)
+
+    # ExplicitScan and CenterScan hold their values in a list
+    sequence = getattr(points, 'sequence', None)
+    if sequence is not None:
+        return np.array(sequence, dtype=np.float64).reshape(-1)
+
+    if isinstance(points, (list, tuple)):
+        return np.array(points, dtype=np.float64).reshape(-1)
+    return np.fromiter(iter(points), dtype=np.float64)
+
+
+def grid_points(values0, values1):
+    """Returns the scan points of a 2D scan over every pair of values of dimension 0 and dimension 1.
+
+    :param values0: 1D array of the values of dimension 0.
+    :param values1: 1D array of the values of dimension 1.
+    :returns: Tuple (points, points_flat, i_points).  points has shape (n0, n1, 2) and holds the scan point at each
+              index.  points_flat has shape (n0 * n1, 2) and holds the scan points with dimension 1 varying fastest.
+              i_points has shape (n0 * n1, 2) and holds the index of each scan point in points_flat.
+    """
+    values0 = np.asarray(values0, dtype=np.float64)
+    values1 = np.asarray(values1, dtype=np.float64)
+    shape = (len(values0), len(values1))
+
+    points = np.empty(shape + (2,), dtype=np.float64)
+    points[:, :, 0] = values0[:, np.newaxis]
+    points[:, :, 1] = values1[np.newaxis, :]
+    points_flat = points.reshape(-1, 2)
+
+    i_points = np.empty(shape + (2,), dtype=np.int64)
+    i_points[:, :, 0] = np.arange(shape[0], dtype=np.int64)[:, np.newaxis]
+    i_points[:, :, 1] = np.arange(shape[1], dtype=np.int64)[np.newaxis, :]
+    return points, points_flat.copy(), i_points.reshape(-1, 2)
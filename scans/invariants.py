@@ -0,0 +1,169 @@
+# Inference of kernel invariants.
+#
+# The source code of every @kernel and @portable method of a class is analyzed to find the attributes that kernel code
+# reads and the attributes that kernel code assigns to (including assignments to elements of an attribute).  Attributes
+# that are read but never assigned to by kernel code of any of the analyzed objects can safely be made kernel
+# invariants, which allows the compiler to treat them as constants.
+import ast
+import inspect
+import textwrap
+import numpy as np
+
+# types of attribute values that are made kernel invariants
+_invariant_types = (bool, int, float, str, np.bool_, np.integer, np.floating, np.ndarray, list, tuple)
+
+# attribute accesses of each analyzed class
+_cache = {}
+
+
+class _AttributeAccess(ast.NodeVisitor):
+    """Finds attributes of self that are read and assigned to in a single method"""
+
+    def __init__(self, self_name, access):
+        self.self_name = self_name
+        self.access = access
+
+    def _attribute_path(self, node):
+        """Returns the chain of attribute names of self.a.b..., or None if node is not an attribute of self"""
+        path = []
+        while isinstance(node, ast.Attribute):
+            path.insert(0, node.attr)
+            node = node.value
+        if isinstance(node, ast.Name) and node.id == self.self_name and path:
+            return path
+        return None
+
+    def _store(self, target):
+        # elements of an attribute
+        while isinstance(target, ast.Subscript):
+            target = target.value
+        if isinstance(target, (ast.Tuple, ast.List)):
+            for elt in target.elts:
+                self._store(elt)
+            return
+        path = self._attribute_path(target)
+        if path is not None:
+            self.access['writes'].add(tuple(path[:2]))
+
+    def visit_Assign(self, node):
+        for target in node.targets:
+            self._store(target)
+        self.generic_visit(node)
+
+    def visit_AugAssign(self, node):
+        self._store(node.target)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node):
+        self._store(node.target)
+        self.generic_visit(node)
+
+    def visit_For(self, node):
+        self._store(node.target)
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node):
+        path = self._attribute_path(node)
+        if path is not None:
+            # only the outermost attribute of a chain is visited, self.a.b reads both self.a and self.a.b
+            self.access['reads'].add(tuple(path[:1]))
+            if len(path) > 1:
+                self.access['reads'].add(tuple(path[:2]))
+            return
+        self.generic_visit(node)
+
+
+def kernel_functions(cls):
+    """Returns all @kernel and @portable methods of a class, including methods of base classes that are overridden since
+    they can still be called with super()"""
+    functions = []
+    for klass in cls.__mro__:
+        for func in vars(klass).values():
+            info = getattr(func, 'artiq_embedded', None)
+            if info is not None and info.function is not None and info.function not in functions:
+                functions.append(info.function)
+    return functions
+
+
+def attribute_access(cls):
+    """Returns the attributes of self read and assigned to by the kernel code of a class.
+
+    :returns: A dictionary with 'reads' and 'writes' keys.  Each value is a set of tuples that contains either the name
+              of an attribute of self, or the name of an attribute of self and the name of one of its attributes.
+              Returns None if the source code of a kernel method is not available.
+    """
+    if cls in _cache:
+        return _cache[cls]
+    access = {'reads': set(), 'writes': set()}
+    for func in kernel_functions(cls):
+        try:
+            source = textwrap.dedent(inspect.getsource(func))
+        except (OSError, TypeError):
+            access = None
+            break
+        tree = ast.parse(source)
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                if node.args.args:
+                    _AttributeAccess(node.args.args[0].arg, access).visit(node)
+                break
+    _cache[cls] = access
+    return access
+
+
+def kernel_attributes(objects):
+    """Returns the attributes of each object that are read and assigned to by kernel code of any of the objects.
+
+    :param objects: The objects whose kernel code is analyzed.
+    :returns: Two dictionaries, the attributes read and the attributes assigned to.  Each maps :code:`id(obj)` to a
+              tuple of the object and the set of names of its attributes.  Returns None if the source code of the kernel
+              code of one of the objects is not available.
+    """
+    reads = {}
+    writes = {}
+    for obj in objects:
+        access = attribute_access(type(obj))
+        if access is None:
+            return None
+        for kind, found in [('reads', reads), ('writes', writes)]:
+            for path in access[kind]:
+                target, attr = obj, path[0]
+                if len(path) > 1:
+                    target, attr = getattr(obj, path[0], None), path[1]
+                    if target is None:
+                        continue
+                found.setdefault(id(target), (target, set()))[1].add(attr)
+    return reads, writes
+
+
+def infer_kernel_invariants(objects, exclude=()):
+    """Infer the kernel invariants of a group of objects whose kernel code runs together (e.g. a scan and its models).
+
+    An attribute of one of the objects is inferred to be a kernel invariant if kernel code of any of the objects reads
+    it, kernel code of none of the objects assigns to it, and its value is a number, string, list, or array.
+
+    :param objects: The objects to analyze.
+    :param exclude: Names of attributes that are never inferred to be kernel invariants.
+    :returns: A list of (object, attributes) tuples with the set of attributes of each object that were inferred to be
+              kernel invariants.  Objects for which no kernel invariants could be inferred are not included.
+    """
+    attributes = kernel_attributes(objects)
+    if attributes is None:
+        return []
+    reads, writes = attributes
+
+    inferred = []
+    for key, (target, attrs) in reads.items():
+        # objects that are not analyzed may have kernel code that assigns to their attributes
+        if not any(target is obj for obj in objects):
+            continue
+        written = writes.get(key, (target, set()))[1]
+        invariants = set(getattr(target, 'kernel_invariants', set()))
+        found = set()
+        for attr in attrs - written - invariants - set(exclude):
+            # methods and devices are not kernel invariants
+            if isinstance(getattr(target, attr, None), _invariant_types):
+                found.add(attr)
+        if found:
+            inferred.append((target, found))
+    return inferred
@@ -0,0 +1,82 @@
+# Orderings in which scan points are executed.
+#
+# Each ordering is a function that takes the number of scan points and returns a permutation of the scan point
+# indices 0...npoints-1.  Scan points are executed in the order given by the permutation, while all datasets remain
+# indexed by the actual index of each scan point.
+import numpy as np
+
+
+def sequential_order(npoints):
+    """Execute scan points in the order they were specified."""
+    return np.arange(npoints, dtype=np.int64)
+
+
+def bit_reversed_order(npoints):
+    """Execute scan points in bit-reversed order of their index.  e.g. for 8 scan points the order is
+    0, 4, 2, 6, 1, 5, 3, 7.  Every prefix of the order covers the full range of scan points approximately uniformly."""
+    if npoints <= 1:
+        return sequential_order(npoints)
+    nbits = int(np.ceil(np.log2(npoints)))
+    indices = np.arange(2 ** nbits, dtype=np.int64)
+    reversed_ = np.zeros_like(indices)
+    for bit in range(nbits):
+        reversed_ |= ((indices >> bit) & 1) << (nbits - 1 - bit)
+    return reversed_[reversed_ < npoints]
+
+
+def stratified_order(npoints, nstrata=None, seed=None):
+    """Split the scan points into nstrata strata of neighbouring scan points and execute a randomly chosen, not yet
+    executed, scan point from each stratum in turn.
+
+    :param nstrata: Number of strata.  Defaults to the square root of the number of scan points.
+    :param seed: Seed of the random number generator.
+    """
+    if npoints <= 1:
+        return sequential_order(npoints)
+    if nstrata is None:
+        nstrata = int(np.ceil(np.sqrt(npoints)))
+    nstrata = min(max(nstrata, 1), npoints)
+    rng = np.random.RandomState(seed)
+    strata = [rng.permutation(stratum) for stratum in np.array_split(np.arange(npoints, dtype=np.int64), nstrata)]
+    order = []
+    for i in range(max(len(stratum) for stratum in strata)):
+        for stratum in strata:
+            if i < len(stratum):
+                order.append(stratum[i])
+    return np.array(order, dtype=np.int64)
+
+
+def coarse_to_fine_order(npoints):
+    """Execute every 2^k-th scan point, starting with the largest power of two less than the number of scan points,
+    then fill in the scan points in between by halving the step until every scan point has been executed.  e.g. for
+    9 scan points the order is 0, 8, 4, 2, 6, 1, 3, 5, 7.  The last scan point is always part of the first, coarsest
+    pass, so both ends of the scan range are covered first, e.g. for 10 scan points the order is
+    0, 8, 9, 4, 2, 6, 1, 3, 5, 7."""
+    if npoints <= 2:
+        return sequential_order(npoints)
+    step = 1
+    while step * 2 < npoints:
+        step *= 2
+    executed = np.zeros(npoints, dtype=bool)
+    order = []
+    coarsest = True
+    while step >= 1:
+        for i in range(0, npoints, step):
+            if not executed[i]:
+                executed[i] = True
+                order.append(i)
+        if coarsest and not executed[npoints - 1]:
+            executed[npoints - 1] = True
+            order.append(npoints - 1)
+        coarsest = False
+        step //= 2
+    return np.array(order, dtype=np.int64)
+
+
+#: Orderings that can be selected by name with the point_order attribute of a scan.
+point_orders = {
+    'sequential': sequential_order,
+    'bit_reversed': bit_reversed_order,
+    'stratified': stratified_order,
+    'coarse_to_fine': coarse_to_fine_order
+}
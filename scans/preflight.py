@@ -0,0 +1,109 @@
+# Pre-flight estimate of the resources used by a scan (see Scan.enable_preflight).
+#
+# The memory used by the arrays of a scan on the core device and on the host, the number of bytes sent to the ARTIQ
+# master at each scan point, and the number of RPCs made by the core are estimated from the size of the scan before the
+# scan is compiled, so a scan that is too large can be detected before a long compile or an out of memory error on the
+# core device.  All sizes are in bytes.
+
+# sizes of the elements of the arrays of a scan
+_INT32 = 4
+_INT64 = 8
+_FLOAT64 = 8
+
+
+def estimate_resources(npoints, nmeasurements, npasses, nrepeats, point_dim=1, nbins=0, nmodels=1, nmirrored=None,
+                       nbroadcast=0, nhistograms=0, ncalcs=0, chunk_size=0, ring_size=0, batch_points=1,
+                       pause_check_points=1, mutate=True, pausing=True, raw_store=False,
+                       incremental_stats=False, pass_only_data=False):
+    """Estimate the resources used by a scan.
+
+    :param npoints: Number of scan points.
+    :param nmeasurements: Number of measurements at each scan point.
+    :param npasses: Number of passes.
+    :param nrepeats: Number of repeats at each scan point during each pass.
+    :param point_dim: Number of values of each scan point, i.e. 1 for 1D scans and 2 for 2D scans.
+    :param nbins: Number of histogram bins.
+    :param nmodels: Number of models that hold the raw values of a measurement.
+    :param nmirrored: Number of those models whose datasets are mirrored to the current_scan namespace.  Defaults to
+                      nmodels.
+    :param nbroadcast: Number of those models whose datasets under the model namespace are broadcast.
+    :param nhistograms: Number of those models that generate histograms.
+    :param ncalcs: Number of calculations performed at each scan point.
+    :param chunk_size: Number of scan points held on the core (see Scan.point_chunk_size), 0 for all scan points.
+    :param ring_size: Number of scan points whose data is held on the core (see Scan.data_ring_size), 0 for all.
+    :param batch_points: Number of scan points whose data is sent to the host in a single RPC.
+    :param pause_check_points: Number of scan points between checks of pause, 0 if pause is checked on a timer.
+    :param mutate: False if the data of each scan point is not sent to the host.
+    :param pausing: False if the scan never checks pause.
+    :param raw_store: True if raw values are held in a memory-mapped file on the host (see Scan.enable_raw_store).
+    :param incremental_stats: True if models only update the values of the counts dataset measured during the
+                              current pass (see Scan.enable_incremental_stats).
+    :param pass_only_data: True if the core only holds the data of the current pass (see
+                           Scan.enable_pass_only_data).
+    :returns: Dictionary with the estimates.
+    """
+    if nmirrored is None:
+        nmirrored = nmodels
+    chunked = 0 < chunk_size < npoints
+    pass_only = ring_size > 0 or (mutate and npasses > 1 and (pass_only_data or incremental_stats))
+    point_rows = chunk_size if chunked else npoints
+    data_rows = point_rows
+    data_columns = npasses * nrepeats
+    if ring_size > 0:
+        data_rows = min(ring_size, data_rows)
+    if pass_only:
+        data_columns = nrepeats
+
+    # arrays held on the core device
+    core_data_bytes = data_rows * (nmeasurements * data_columns + npasses) * _INT32
+    core_points_bytes = point_rows * point_dim * (_FLOAT64 + _INT64)
+
+    # the raw values of every scan point, pass, and repeat are held in memory by the scan (or the host when only some
+    # of them are held on the core), by each model, and by each model's counts dataset and its mirror, unless they are
+    # held in the raw data store
+    counts_bytes = npoints * npasses * nrepeats * _INT32
+    host_copies = 0
+    if not raw_store:
+        host_copies += nmeasurements + nmodels + nmodels + nmirrored
+
+    # bytes sent to the master at each scan point
+    broadcast_bytes = 0
+    if mutate:
+        copies = nbroadcast + nmirrored
+        if not raw_store:
+            broadcast_bytes += copies * (1 if incremental_stats else npasses) * nrepeats * _INT32
+        broadcast_bytes += copies * 3 * _FLOAT64
+        broadcast_bytes += nmirrored * 2 * _FLOAT64
+        broadcast_bytes += nhistograms * nbins * _INT32 * 2
+
+    # rpcs made by the core over the whole scan
+    npoints_run = npoints * npasses
+    rpcs = 0
+    if mutate:
+        rpcs += -(-npoints_run // max(batch_points, 1))
+        if ncalcs > 0 and batch_points <= 1:
+            rpcs += npoints_run
+    if pausing and pause_check_points > 0:
+        rpcs += -(-npoints_run // pause_check_points)
+    if chunked:
+        rpcs += 2 * npasses * -(-npoints // chunk_size)
+
+    return {
+        'core_data_bytes': core_data_bytes,
+        'core_points_bytes': core_points_bytes,
+        'core_bytes': core_data_bytes + core_points_bytes,
+        'counts_bytes': counts_bytes,
+        'host_copies': host_copies,
+        'host_bytes': counts_bytes * host_copies,
+        'broadcast_bytes_per_point': broadcast_bytes,
+        'rpcs': rpcs,
+    }
+
+
+def format_bytes(n):
+    """Returns a number of bytes as a human readable string"""
+    for unit in ['B', 'kB', 'MB', 'GB']:
+        if abs(n) < 1000:
+            return '{0:.3g} {1}'.format(n, unit)
+        n /= 1000
+    return '{0:.3g} TB'.format(n)
@@ -0,0 +1,83 @@
+# Memory-mapped store of the raw values measured by a scan (see Scan.enable_raw_store).
+#
+# Every array of raw values of a scan (e.g. the counts of each model) is held in a single file that is mapped into
+# memory.  Values written to an array are written to the file by the operating system, so they are not held in the
+# memory of the worker process and are still in the file if the worker process exits unexpectedly.  The key, offset,
+# shape, and data type of each array are written to a JSON index next to the file so the arrays can be read back, e.g.
+# with RawStore(path, mode='r').array(key).
+import json
+import os
+import numpy as np
+
+# offset of each array in the file is a multiple of this many bytes
+ALIGNMENT = 64
+
+
+class RawStore:
+    """Arrays stored in a single memory-mapped file.
+
+    :param path: Path of the file.  The index of the arrays is written to :code:`<path>.json`.
+    :param mode: 'w' to create a new file, 'r+' to add arrays to an existing file, or 'r' to only read arrays.
+    """
+
+    def __init__(self, path, mode='w'):
+        self.path = path
+        self.mode = mode
+        self._arrays = {}
+        if mode == 'w':
+            open(path, 'wb').close()
+            self._index = {}
+            self._write_index()
+        else:
+            with open(self.index_path) as f:
+                self._index = json.load(f)
+
+    @property
+    def index_path(self):
+        return self.path + '.json'
+
+    def keys(self):
+        return list(self._index)
+
+    def _write_index(self):
+        with open(self.index_path, 'w') as f:
+            json.dump(self._index, f)
+
+    def allocate(self, key, shape, dtype=np.int32):
+        """Add an array to the file.  All elements of the array are zero.
+
+        :param key: Name of the array.
+        :param shape: Shape of the array.
+        :param dtype: Data type of the elements of the array.
+        :returns: The array, mapped to the file.
+        """
+        if self.mode == 'r':
+            raise ValueError('{0} was opened read-only'.format(self.path))
+        if key in self._index:
+            raise KeyError('{0} already holds an array named {1}'.format(self.path, key))
+        dtype = np.dtype(dtype)
+        shape = tuple(int(n) for n in np.atleast_1d(shape))
+        size = int(np.prod(shape)) * dtype.itemsize
+
+        # the file is extended without writing to it, so the new array reads as zeros
+        offset = -(-os.path.getsize(self.path) // ALIGNMENT) * ALIGNMENT
+        with open(self.path, 'r+b') as f:
+            f.truncate(offset + max(size, 1))
+
+        self._index[key] = {'offset': offset, 'shape': list(shape), 'dtype': dtype.str}
+        self._write_index()
+        return self.array(key)
+
+    def array(self, key):
+        """Returns an array of the file, mapped to the file"""
+        if key not in self._arrays:
+            entry = self._index[key]
+            self._arrays[key] = np.memmap(self.path, dtype=np.dtype(entry['dtype']), offset=entry['offset'],
+                                          shape=tuple(entry['shape']), mode='r' if self.mode == 'r' else 'r+')
+        return self._arrays[key]
+
+    def flush(self):
+        """Write all changes to the arrays to the file"""
+        for array in self._arrays.values():
+            if self.mode != 'r':
+                array.flush()
@@ -3,6 +3,17 @@ import numpy as np
 from time import time, sleep
 import inspect
 import cProfile, pstats
+from scan_framework.scans.ordering import point_orders
+from scan_framework.scans.worker import HostWorker
+from scan_framework.scans.invariants import infer_kernel_invariants
+from scan_framework.scans.compile_cache import kernel_cache
+from scan_framework.scans.checkpoint import Checkpoint, checkpoint_progress
+from scan_framework.scans.raw_store import RawStore
+from scan_framework.scans.preflight import estimate_resources, format_bytes
+from scan_framework.scans.grid import scan_values, grid_points
+from scan_framework.scans.timing import PhaseTimer, Tracer, CORE_PHASES, BIN_EDGES, PHASE_BEFORE_PASS, \
+    PHASE_SET_SCAN_POINT, PHASE_MEASURE, PHASE_SCAN_POINT, PHASE_WARMUP
+import os
 
 
 # allows @portable methods that use delay_mu to compile
@@ -16,6 +27,21 @@ class Paused(Exception):
     pass
 
 
+# policies that decide when warm-up points are run (see Scan.warmup_policy), identified on the core by these values
+WARMUP_EVERY_PASS = 0
+WARMUP_FIRST_PASS = 1
+WARMUP_RESUME = 2
+WARMUP_IDLE = 3
+WARMUP_CUSTOM = 4
+warmup_policies = {
+    'every_pass': WARMUP_EVERY_PASS,
+    'first_pass': WARMUP_FIRST_PASS,
+    'resume': WARMUP_RESUME,
+    'idle': WARMUP_IDLE,
+    'custom': WARMUP_CUSTOM,
+}
+
+
 class FitGuess(NumberValue):
     def __init__(self, fit_param=None, param_index=None, use_default=True, use=True, i_result=None, *args, **kwargs):
         self.i_result = i_result
@@ -46,22 +72,73 @@ class Scan(HasEnvironment):
 
     # Feature: dataset mutating
     enable_mutate = True          #: Mutate mean values and standard errors datasets after each scan point.  Used to monitor progress of scan while it is running.
+    enable_incremental_stats = False  #: Pass only the values measured during the current pass to the models, which update means, errors, and histograms from running sums of the previous passes.
 
     # Feature: fitting
     enable_fitting = True         #: Set to True to perform fits at the end of the scan and show scan arguments needed for fitting.
 
+    # Feature: batched dataset mutating
+    batch_points = 1              #: Number of scan points whose data is sent to the host in a single RPC.  Set to 1 to mutate datasets after every scan point.
+    batch_time = 0.0              #: Maximum time in seconds that data for a scan point is held on the core before the batch is sent to the host.  Set to 0 to only send a batch once it holds :code:`batch_points` scan points.
+
+    # Feature: chunked scan points
+    point_chunk_size = 0          #: Set to a value > 0 to keep only this many scan points and the data collected at them on the core device.  The core fetches the next chunk of scan points from the host once it has completed the current chunk.  Used for scans whose points or data don't fit in the memory of the core device.
+
+    # Feature: current pass data
+    enable_pass_only_data = False  #: With multiple passes, hold only the data collected during the current pass on the core device and send only that data to the host after each scan point, so the data sent does not grow with the number of passes.  The host then holds its own copy of the data of every pass.  Also enabled by :code:`enable_incremental_stats` and :code:`data_ring_size`.
+
+    # Feature: data ring buffer
+    data_ring_size = 0            #: Set to a value > 0 to hold the data collected during the current pass at only the most recent :code:`data_ring_size` scan points on the core device.  The host holds the data of every scan point, pass, and repeat.
+
+    # Feature: raw data store
+    enable_raw_store = False      #: Hold the raw values measured at each scan point in the memory-mapped file :code:`<raw_store_dir>/<rid>-<scan name>.raw` instead of in memory and in the :code:`stats.counts` datasets of each model.
+    raw_store_dir = 'raw'         #: Directory that raw data files are written to.
+
+    # Feature: pre-flight resource check
+    enable_preflight = True       #: Estimate the memory, dataset traffic, and RPCs used by the scan before it is compiled.
+    core_memory_limit = 16000000  #: Warn when the arrays of the scan are estimated to use more than this many bytes of memory on the core device.
+    host_memory_limit = 2000000000  #: Warn when the raw values of the scan are estimated to use more than this many bytes of memory on the host.
+    auto_storage = False          #: When a memory limit is exceeded, hold only some of the data or scan points on the core (see :code:`data_ring_size` and :code:`point_chunk_size`) or hold raw values in a memory-mapped file on the host (see :code:`enable_raw_store`).
+
+    # Feature: host worker thread
+    enable_host_worker = False    #: Update models in a background thread on the host.  RPCs from the core only queue the data sent by the core so the core is not stalled while the host updates statistics, plots, and fits.
+    host_worker_queue_size = 100  #: Maximum number of RPCs waiting to be processed by the host worker thread.  The core stalls once the queue is full.
+
     # Feature: pausing/terminating
     enable_pausing = True         #: Check pause via :code:`self.scheduler.check_pause()` and automatically yield/terminate the scan when needed.
+    pause_check_points = 1        #: Check pause once every :code:`pause_check_points` scan points.  The scan yields at most this many scan points after a higher priority experiment is submitted.
+    pause_check_time = 0.0        #: Set to a value > 0 to instead check pause only when this many seconds have elapsed since the last check.  The scan yields at most :code:`pause_check_time` plus the duration of one scan point after a higher priority experiment is submitted.
+    enable_fast_resume = False    #: When a paused scan resumes, don't re-run :code:`prepare_scan()` or rewrite the datasets of the models.  Only the datasets displayed by the current scan applets are re-sent to the master.
 
     # Feature: count monitoring
     enable_count_monitor = True   #: Update the '/counts' dataset with the average of all values returned by 'measure()' during a single scan point.
     counts_perc = -1              #: Set to a value >= 0 to round the '/counts' dataset to the specified number of digits.
+    count_monitor_interval = 0.1  #: Minimum time in seconds between updates of the count monitor datasets.  Scan point averages are aggregated on the core in between updates.  Set to 0 to update after every scan point.
+
+    # Feature: progress monitoring
+    enable_progress = False       #: Publish the throughput and estimated time remaining of the scan to the :code:`current_scan.progress` datasets while the scan is running.
+    progress_interval = 1.0       #: Minimum time in seconds between updates of the :code:`current_scan.progress` datasets.
+
+    # Feature: checkpointing
+    enable_checkpoints = False     #: Write the data collected at each scan point to :code:`<checkpoint_dir>/<rid>-<scan name>.checkpoint.h5` so the scan can be continued by :code:`resume_from_checkpoint()` if the experiment exits before the scan completes.
+    checkpoint_points = 0          #: Write the checkpoint once data for this many scan points has been received since it was last written.  Set to 0 to only write the checkpoint at the end of each pass.
+    checkpoint_dir = 'checkpoints' #: Directory that checkpoint files are written to.
+
+    # Feature: adaptive repeats
+    enable_adaptive_repeats = False  #: Stop repeating a scan point once the standard error of the mean of every measurement is below :code:`target_error`.  :code:`nrepeats` is then the maximum number of repeats.
+    target_error = 0.0               #: Standard error of the mean at which a scan point stops being repeated when :code:`enable_adaptive_repeats` is True.
+    min_repeats = 10                 #: Minimum number of repeats performed at each scan point when :code:`enable_adaptive_repeats` is True.
 
     # Feature: reporting
     enable_reporting = True       #: Print useful information to the Log window before a scan starts (i.e. number of passes, etc.) and when a fit is performed (fitted values, etc.)
 
+    # Feature: point ordering
+    point_order = 'sequential'    #: Order in which scan points are executed: 'sequential', 'bit_reversed', 'stratified', 'coarse_to_fine', or a function that returns a permutation of the scan point indices (see :mod:`~scan_framework.scans.ordering`).  Datasets are always indexed by scan point.
+
     # Feature: warm-up points
     nwarmup_points = 0            #: Number of warm-up points
+    warmup_policy = 'every_pass'  #: When warm-up points are run: 'every_pass' before every pass and when the scan resumes, 'first_pass' only before the first pass, 'resume' when the scan starts and each time it resumes after being paused, 'idle' when no scan point has been measured for :code:`warmup_idle_time`, or 'custom' when the :meth:`warmup_due()` interface method returns True.
+    warmup_idle_time = 1.0        #: Time in seconds without a measurement after which warm-up points are run again when :code:`warmup_policy` is 'idle'.
 
     # Feature: auto tracking
     enable_auto_tracking = True   #: Auto center the scan range around the last fitted value.
@@ -72,6 +149,20 @@ class Scan(HasEnvironment):
     # Feature: profiling/timing
     enable_profiling = False  #: Profile the execution of the scan to find bottlenecks.
     enable_timing = False  #: Enable automatic timing of certain events.  Currently only compilation time is timed.
+    enable_instrumentation = False  #: Time every phase of the scan (compilation, callbacks, measurements, RPCs, fits) and save the durations to the :code:`<scan_namespace>.timing` datasets.
+    instrumentation_buffer_size = 256  #: Number of phase timings buffered on the core device before they are sent to the host.
+    enable_trace = False  #: Write a timeline of every phase of the scan on the core and on the host to :code:`<trace_dir>/<rid>-<scan name>.trace.json` in the Chrome Trace Event Format.
+    trace_dir = 'traces'  #: Directory that trace files are written to.
+
+    # Feature: kernel invariant inference
+    enable_invariant_inference = False  #: Make attributes of the scan and its models that kernel code reads but never assigns to kernel invariants.
+    dynamic_attributes = []             #: Names of attributes that are never inferred to be kernel invariants, e.g. attributes assigned to by kernel code of other objects.
+
+    # Feature: compile cache
+    enable_compile_cache = False  #: Reuse the compiled scan kernel when the scan runs on the core again in the same worker process (e.g. with :code:`CoreScanRunner`) and neither the kernel code nor any value embedded in the kernel has changed.
+
+    # Feature: scan datasets
+    scan_namespace = None  #: Namespace of datasets created by the scan itself (e.g. timing).  Defaults to the name of the scan class.
 
     # ------------------- Scan State Variables ---------------------
     # Available in callbacks to determine the current state of the scan
@@ -118,6 +209,9 @@ class Scan(HasEnvironment):
         self.calculations = []
         self._ncalcs = 0
         self._model_registry = []
+        self._measurement_models = {}
+        self._calculation_models = {}
+        self._dimension_models = {}
         self._plot_shape = None
         self.min_point = None
         self.max_point = None
@@ -125,6 +219,9 @@ class Scan(HasEnvironment):
         self._points = None
         self._warmup_points = None
         self.warming_up = False
+        self._warmup_policy = np.int32(WARMUP_EVERY_PASS)
+        self._warmup_idle_mu = np.int64(0)
+        self._t_measured_mu = np.int64(0)
 
         # this stores "flat" idx point index when a scan is paused.  the idx index is then restored from
         # this variable when the scan resumes.
@@ -132,6 +229,84 @@ class Scan(HasEnvironment):
         self._i_pass = np.int32(0)
         self._i_measurement = np.int32(0)
 
+        # scan points held on the core and the row of self._data at the current scan point (see point_chunk_size)
+        self._chunked = False
+        self._window_points = None
+        self._window_i_points = None
+        self._window_start = np.int32(0)
+        self._window_end = np.int32(0)
+        self._data_row = np.int32(0)
+        self._prepared_idx = np.int32(-1)
+        self._ring_size = np.int32(0)
+        self._pass_only = False
+        self._point_index = {}
+        self._host_data = None
+        self._host_repeats = None
+        self._raw_store = None
+        self._resources = None
+
+        # storage modes used by the scan, which auto_storage may change from the settings of the scan
+        self._point_chunk_size = 0
+        self._data_ring_size = 0
+        self._enable_raw_store = False
+
+        # batches of scan points whose data has not yet been sent to the host (see batch_points)
+        self._batching = False
+        self._batch_start = np.int32(0)
+        self._batch_row = np.int32(0)
+        self._batch_count = np.int32(0)
+        self._batch_i_pass = np.int32(0)
+        self._batch_t0 = np.int64(0)
+        self._batch_time_mu = np.int64(0)
+
+        # scan point averages aggregated on the core between updates of the count monitor
+        self._cm_n = np.int32(0)
+        self._cm_sum = 0.0
+        self._cm_min = 0.0
+        self._cm_max = 0.0
+        self._cm_t0 = np.int64(0)
+        self._cm_interval_mu = np.int64(0)
+        self._counts = None
+
+        # time the progress datasets were last updated (see enable_progress) and the progress seen by the host
+        self._pg_t0 = np.int64(0)
+        self._pg_interval_mu = np.int64(0)
+        self._pg_start = None
+        self._pg_last = None
+        self._pg_offset = None
+
+        # number of scan points and time since pause was last checked (see pause_check_points)
+        self._pause_check_count = np.int32(0)
+        self._pause_check_t0 = np.int64(0)
+        self._pause_check_time_mu = np.int64(0)
+
+        # thread that updates models on the host (see enable_host_worker)
+        self._host_worker = None
+        self._inferred_invariants = []
+
+        # checkpoint file written while the scan runs and the file the scan is restored from (see enable_checkpoints)
+        self._checkpoint = None
+        self._restore_path = None
+        self._restored = None
+
+        # callbacks of the scan loop that are overridden.  callbacks that are not overridden are not called.
+        self._has_before_measure = True
+        self._has_lab_before_measure = True
+        self._has_after_measure = True
+        self._has_lab_after_measure = True
+        self._has_analyze_data = True
+        self._has_after_scan_point = True
+        self._has_private_after_scan_point = True
+
+        # durations of each phase of the scan and timings buffered on the core (see enable_instrumentation)
+        self._timer = PhaseTimer(enabled=False)
+        self._trace_written = False
+        self._instrumented = False
+        self._tm_n = np.int32(0)
+        self._tm_phases = None
+        self._tm_starts = None
+        self._tm_ends = None
+
         super().__init__(managers_or_parent, *args, **kwargs)
 
     # private: for scan.py
@@ -168,15 +343,19 @@ class Scan(HasEnvironment):
             self._load_points()
             self._logger.debug('loaded points')
 
+        # host state and datasets are kept as they were when the scan paused
+        fast_resume = resume and self.enable_fast_resume
+
         # this expects that self.npoints is available
-        self.prepare_scan()
-        self.lab_prepare_scan()
+        if not fast_resume:
+            self.prepare_scan()
+            self.lab_prepare_scan()
 
         if not resume:
             # display scan info
             if self.enable_reporting:
                 self.report(location='top')
-        else:
+        elif not fast_resume:
             # display scan info
             if self.enable_reporting:
                 self.report()
@@ -197,9 +376,28 @@ class Scan(HasEnvironment):
             self._offset_points(self._x_offset)
             self._logger.debug("offset points by {0}".format(self._x_offset))
 
+            # estimate the resources used by the scan and choose storage modes
+            self._preflight()
+
             # initialize storage
+            self._init_raw_store()
             self._init_storage()
 
+            # clear state left over from a previous run of the scan loop
+            self._reset_loop_state()
+
+            # continue a scan from its checkpoint file
+            self._checkpoint = None
+            self._restored = None
+            if self._restore_path is not None:
+                self._restore_checkpoint()
+
+            # batch dataset mutates
+            self._init_batching()
+
+            # stop repeating scan points early
+            self._init_adaptive_repeats()
+
             # attach scan to models (expects self.npoints has been set)
             self._attach_to_models()
 
@@ -258,7 +456,13 @@ class Scan(HasEnvironment):
                             #     entry['datasets_initialized'] = True
 
                     # datasets are only written when resuming a scan
-                    if resume:
+                    if fast_resume:
+                        # other experiments may have replaced the datasets displayed by the current scan applets
+                        self._rebroadcast_datasets(entry)
+
+                        # debug logging
+                        self._logger.debug("rebroadcast datasets of model '{0}' {1}".format(entry['model'], entry))
+                    elif resume:
                         # restore data when resuming a scan by writing the model's local variables to it's datasets
                         self._write_datasets(entry)
 
@@ -267,6 +471,37 @@ class Scan(HasEnvironment):
 
         self._ncalcs = len(self.calculations)
 
+        # scan points held on the core
+        self._init_point_window()
+
+        # index the registered models for fast lookups during the scan
+        self._compile_model_registry()
+
+        # rebuild the datasets of the models from the data restored from the checkpoint file
+        if self._restored is not None:
+            self._replay_checkpoint()
+
+        # how often to check pause
+        self._init_pausing()
+
+        # when to run warm-up points
+        self._init_warmup(resume)
+
+        # how often to update the count monitor
+        self._init_count_monitor()
+
+        # how often to update the progress datasets
+        self._init_progress()
+
+        # buffers for timings of phases that run on the core
+        self._init_instrumentation()
+
+        # compile the core loop without disabled features or callbacks that do nothing
+        self._specialize_loop()
+
+        # make attributes that kernel code never changes kernel invariants
+        self._infer_kernel_invariants()
+
         if not (hasattr(self, 'scheduler')):
             raise NotImplementedError('The scan has no scheduler attribute.  Did you forget to call super().build()?')
 
@@ -280,11 +515,18 @@ class Scan(HasEnvironment):
         nmeasurements = self.nmeasurements
         nrepeats = self.nrepeats
         measurements = self.measurements
-        points = self._points_flat
+        points = self._window_points
         wupoints = self._warmup_points
-        i_points = self._i_points
+        i_points = self._window_i_points
         npasses = self.npasses
 
+        # the first scan point executed is prepared when it is executed
+        self._prepared_idx = -1
+
+        # progress is measured from the first scan point executed by this run of the scan
+        if self.enable_progress:
+            self._start_progress()
+
         try:
             # callback
             self._before_loop(resume)
@@ -292,14 +534,24 @@ class Scan(HasEnvironment):
             self.initialize_devices()
 
             # iterate of passes
+            first = True
             while self._i_pass < npasses:
                 # update offset into self.dataptr[] where data begins for this pass
                 last_pass = self._i_pass == npasses - 1
-                poffset = self._i_pass * nrepeats
+                poffset = self._data_offset()
+
+                # always check pause at the first scan point of each pass
+                self._reset_pause_check()
 
                 # callback
                 if not resume or self._idx == 0:
+                    t0 = self._phase_start()
                     self.before_pass(self._i_pass)
+                    self._phase_end(PHASE_BEFORE_PASS, t0)
+
+                # warm-up points are only run when the warm-up policy requires them
+                warmup = nwarmup_points > 0 and self._warmup_due(resume, first)
+                first = False
 
                 # inner loop
                 self._point_loop(points,
@@ -312,7 +564,8 @@ class Scan(HasEnvironment):
                                  nrepeats,
                                  nmeasurements,
                                  measurements,
-                                 last_pass=last_pass)
+                                 last_pass=last_pass,
+                                 warmup=warmup)
 
                 # update loop counter
                 self._idx = 0
@@ -323,26 +576,39 @@ class Scan(HasEnvironment):
 
         except Paused:
             self._paused = True
+
+            # send data for all completed scan points to the host before yielding
+            self._flush_batch()
         finally:
+            if self.enable_count_monitor:
+                self._flush_count_monitor()
+            if self._instrumented:
+                self._flush_phases()
             self.cleanup()
 
     # private: for scan.py
     @portable
     def _point_loop(self, points, warmup_points, i_points, npoints, nwarmup_points, ncalcs, poffset, nrepeats,
-                    nmeasurements, measurements, last_pass=False):
+                    nmeasurements, measurements, last_pass=False, warmup=True):
         # -- warm-up points
-        self.warming_up = True
-        for wupoint in warmup_points:
-            for i_measurement in range(nmeasurements):
-                self.measurement = measurements[i_measurement]
-                self.warmup(wupoint)
-        self.warming_up = False
+        if warmup:
+            t0 = self._phase_start()
+            self.warming_up = True
+            for wupoint in warmup_points:
+                for i_measurement in range(nmeasurements):
+                    self.measurement = measurements[i_measurement]
+                    self.warmup(wupoint)
+            self.warming_up = False
+            self._phase_end(PHASE_WARMUP, t0)
+            if self._warmup_policy == WARMUP_IDLE:
+                self._t_measured_mu = self._timestamp_mu()
 
         # -- loop over the scan points
         while self._idx < npoints - 1:
             # lookup the scan point (point) and the scan point index (i_point) at the current loop index (idx)
-            point = points[self._idx]
-            self._i_point = i_points[self._idx]
+            row = self._select_row()
+            point = points[row]
+            self._i_point = i_points[row]
 
             # repeat measurement on scan point
             self._repeat_loop(point, self._i_point, nrepeats, nmeasurements, measurements, poffset, ncalcs,
@@ -350,11 +616,15 @@ class Scan(HasEnvironment):
             self._idx += 1
 
         # last scan point is special (optimization)
-        point = points[npoints - 1]
-        self._i_point = i_points[npoints - 1]
+        row = self._select_row()
+        point = points[row]
+        self._i_point = i_points[row]
         self._repeat_loop(point, self._i_point, nrepeats, nmeasurements, measurements, poffset, ncalcs,
                           last_point=True, last_pass=last_pass)
 
+        # send any data that is still waiting to be sent to the host at the end of the pass
+        self._flush_batch()
+
         # -- reset loop counter
         self._idx = 0
 
@@ -365,21 +635,39 @@ class Scan(HasEnvironment):
 
         # check for higher priority experiment or termination requested
         if self.enable_pausing:
+            if self._pause_check_due():
+                # cost: 3.6 ms
+                if self.enable_host_worker:
+                    check_pause = self._check_pause()
+                else:
+                    check_pause = self.scheduler.check_pause()
+                if check_pause:
+                    # yield
+                    raise Paused
+
+        t_point = self._phase_start()
 
-            # cost: 3.6 ms
-            check_pause = self.scheduler.check_pause()
-            if check_pause:
-                # yield
-                raise Paused
+        # callback: the scan point is prepared now unless it was prepared during the previous scan point
+        if self._has_prepare_next_point:
+            if self._prepared_idx != self._idx:
+                self.prepare_next_point(i_point, point)
+            self._prepared_idx = -1
 
         # dynamically offset the scan point
         point = self.offset_point(i_point, point)
 
         # callback
+        t0 = self._phase_start()
         self.set_scan_point(i_point, point)
+        self._phase_end(PHASE_SET_SCAN_POINT, t0)
 
         # iterate over repeats
         counts = np.int32(0)
+        nrepeats_done = nrepeats
+        if self.enable_adaptive_repeats:
+            for i_measurement in range(nmeasurements):
+                self._sums[i_measurement] = 0.0
+                self._sums_sq[i_measurement] = 0.0
         for i_repeat in range(nrepeats):
             # iterate over measurements
             for i_measurement in range(nmeasurements):
@@ -387,56 +675,87 @@ class Scan(HasEnvironment):
                 self.measurement = measurements[i_measurement]
 
                 # callback
-                self.before_measure(point, self.measurement)
-                self.lab_before_measure(point, self.measurement)
+                if self._has_before_measure:
+                    self.before_measure(point, self.measurement)
+                if self._has_lab_before_measure:
+                    self.lab_before_measure(point, self.measurement)
 
                 # perform a single measurement and store the result
+                t0 = self._phase_start()
                 count = self.do_measure(point)
-                self._data[self._idx][i_measurement][poffset + i_repeat] = count
+                self._phase_end(PHASE_MEASURE, t0)
+                self._data[self._data_row][i_measurement][poffset + i_repeat] = count
                 counts += count
 
+                # running sums used to stop repeating the scan point early
+                if self.enable_adaptive_repeats:
+                    value = float(count)
+                    self._sums[i_measurement] += value
+                    self._sums_sq[i_measurement] += value * value
+
                 # callback
-                self.after_measure(point, self.measurement)
-                self.lab_after_measure(point, self.measurement)
+                if self._has_after_measure:
+                    self.after_measure(point, self.measurement)
+                if self._has_lab_after_measure:
+                    self.lab_after_measure(point, self.measurement)
+
+            # stop repeating once the error target is met
+            if self.enable_adaptive_repeats:
+                if i_repeat + 1 >= self.min_repeats and self._target_error_met(i_repeat + 1, nmeasurements):
+                    nrepeats_done = i_repeat + 1
+                    break
+
+        # record the number of repeats performed
+        self._repeats[self._data_row][self._i_pass] = nrepeats_done
+
+        # callback: prepare the next scan point while the last measurement is still being executed
+        if self._has_prepare_next_point:
+            self._prepare_next_point()
 
         # update the dataset used to monitor counts
-        mean = counts / (nrepeats*nmeasurements)
+        mean = counts / (nrepeats_done*nmeasurements)
 
         # cost: 18 ms per point
         # mutate dataset values
-        if self.enable_mutate:
-            length = (self._i_pass + 1) * nrepeats
-            for i_measurement in range(nmeasurements):
-                # get data for model
-                data = self._data[self._idx][i_measurement][:length]
-
-                # get the name of the measurement
-                measurement = self.measurements[i_measurement]
-
-                # rpc to host
-                # send data to the model
-                self.mutate_datasets(i_point, measurement, point, data)
-            # self._logger.info("i_pass = ")
-            # self._logger.info(i_pass)
-            # self._logger.info("idx = ")
-            # self._logger.info(idx)
+        if self.enable_mutate and self._batching:
+            # data is sent to the host in batches of scan points
+            self._batch_point()
+        elif self.enable_mutate:
+            # rpc to host
+            # send data for all measurements to the models in a single rpc
+            if self.enable_adaptive_repeats:
+                self._mutate_all_repeats(i_point, point, self._i_pass, self._data[self._data_row],
+                                         self._repeats[self._data_row])
+            else:
+                self._mutate_all(i_point, point, self._i_pass, self._data[self._data_row])
 
         # perform calculations
-        if ncalcs > 0:
+        # (calculations are performed by _mutate_batch() when scan points are batched)
+        if self._ncalcs > 0 and not (self.enable_mutate and self._batching):
             # rpc to host
-            self._calculate_all(i_point, point)
+            self._calculate_point(i_point, point)
 
         # analyze data
-        self._analyze_data(i_point, last_pass, last_point)
+        if self._has_analyze_data:
+            self._analyze_data(i_point, last_pass, last_point)
 
         # callback
-        self.after_scan_point(i_point, point)
-        self._after_scan_point(i_point, point, mean)
+        if self._has_after_scan_point:
+            self.after_scan_point(i_point, point)
+        if self._has_private_after_scan_point:
+            self._after_scan_point(i_point, point, mean)
 
-        # rpc to host
         if self.enable_count_monitor:
-            # cost: 2.7 ms
-            self._set_counts(mean)
+            self._monitor_counts(mean)
+
+        if self.enable_progress:
+            self._track_progress()
+
+        # time of the last measurement (see warmup_policy)
+        if self._warmup_policy == WARMUP_IDLE:
+            self._t_measured_mu = self._timestamp_mu()
+
+        self._phase_end(PHASE_SCAN_POINT, t_point)
 
     # private: for scan.py
     def _private_map_arguments(self):
@@ -475,17 +794,720 @@ class Scan(HasEnvironment):
     # private: for scan.py
     def _init_storage(self):
         """initialize memory to record counts on core device"""
+        if self.point_chunk_size < 0:
+            raise ValueError('point_chunk_size must be >= 0')
+        if self.data_ring_size < 0:
+            raise ValueError('data_ring_size must be >= 0')
+        self._chunked = 0 < self._point_chunk_size < self.npoints
+        nrows = self._point_chunk_size if self._chunked else self.npoints
+        ncolumns = self.nrepeats * self.npasses
+
+        self._ring_size = np.int32(0)
+        if self._data_ring_size > 0:
+            self._ring_size = np.int32(min(self._data_ring_size, nrows))
+            nrows = self._ring_size
+
+        # only the repeats of the current pass are held on the core and sent to the host (see enable_pass_only_data)
+        self._pass_only = self._ring_size > 0 or (self.enable_mutate and self.npasses > 1 and
+                                                  (self.enable_pass_only_data or self.enable_incremental_stats))
+        if self._pass_only:
+            ncolumns = self.nrepeats
+
+        #: 3D array of counts measured at each scan point, measurement, pass, and repeat.  Only holds the repeats of
+        #: the current pass when enable_pass_only_data, enable_incremental_stats, or data_ring_size is set, in which
+        #: case the data of every pass is held by the host (see _scan_data()).
+        self._data = np.zeros((nrows, self.nmeasurements, ncolumns), dtype=np.int32)
+
+        #: 2D array of the number of repeats performed at each scan point and pass
+        self._repeats = np.full((nrows, self.npasses), self.nrepeats, dtype=np.int32)
+
+        # the number of repeats is only sent by the core when repeats can be skipped (see enable_adaptive_repeats)
+        self._all_repeats = np.full(self.npasses, self.nrepeats, dtype=np.int32)
+
+        # the host holds the data of every scan point and pass when the core only holds some of them
+        self._host_data = None
+        self._host_repeats = None
+        if not (self._chunked or self._pass_only) and self._raw_store is not None:
+            # the core holds every scan point and pass, its data is held in the raw data store on the host
+            self._data = self._raw_store.allocate('data', self._data.shape, np.int32)
+            self._repeats = self._raw_store.allocate('repeats', self._repeats.shape, np.int32)
+            self._repeats[:] = self.nrepeats
+        elif self._chunked or self._pass_only:
+            shape = (self.npoints, self.nmeasurements, self.nrepeats * self.npasses)
+            if self._raw_store is not None:
+                self._host_data = self._raw_store.allocate('data', shape, np.int32)
+                self._host_repeats = self._raw_store.allocate('repeats', (self.npoints, self.npasses), np.int32)
+                self._host_repeats[:] = self.nrepeats
+            else:
+                self._host_data = np.zeros(shape, dtype=np.int32)
+                self._host_repeats = np.full((self.npoints, self.npasses), self.nrepeats, dtype=np.int32)
 
-        #: 3D array of counts measured at each scan point, measurement, pass, and repeat
-        self._data = np.array([
-            [
-                [
-                    np.int32(0) for k in range(self.nrepeats * self.npasses)
-                ] for j in range(self.nmeasurements)
-            ] for i in range(self.npoints)
-        ], dtype=np.int32)
+        # running sums of the values measured for each measurement at the current scan point
+        self._sums = np.zeros(self.nmeasurements, dtype=np.float64)
+        self._sums_sq = np.zeros(self.nmeasurements, dtype=np.float64)
         self._logger.debug('initialized storage')
 
+    # private: for scan.py
+    def _estimate_resources(self):
+        """Estimate the resources used by the scan with its current settings"""
+        models = [entry['model'] for entry in self._model_registry if entry['measurement']]
+        return estimate_resources(
+            npoints=self.npoints,
+            nmeasurements=self.nmeasurements,
+            npasses=self.npasses,
+            nrepeats=self.nrepeats,
+            point_dim=1 if np.ndim(self._points_flat) == 1 else np.shape(self._points_flat)[1],
+            nbins=self.nbins,
+            nmodels=len(models),
+            nmirrored=len([m for m in models if getattr(m, 'mirror', False)]),
+            nbroadcast=len([m for m in models if getattr(m, 'broadcast', False)]),
+            nhistograms=len([m for m in models if getattr(m, 'enable_histograms', False)]),
+            ncalcs=len(self.calculations),
+            chunk_size=self._point_chunk_size,
+            ring_size=self._data_ring_size,
+            batch_points=self.batch_points,
+            pause_check_points=self.pause_check_points if self.pause_check_time <= 0 else 0,
+            mutate=self.enable_mutate,
+            pausing=self.enable_pausing,
+            raw_store=self._enable_raw_store,
+            incremental_stats=self.enable_incremental_stats,
+            pass_only_data=self.enable_pass_only_data
+        )
+
+    # private: for scan.py
+    def _preflight(self):
+        """Estimate the resources used by the scan before it is compiled.  Warns when the memory used on the core or on
+        the host is estimated to exceed core_memory_limit or host_memory_limit and, if auto_storage is set, switches to
+        storage modes that use less memory.  The storage modes used by the scan are held in _point_chunk_size,
+        _data_ring_size, and _enable_raw_store so the settings of the scan are left as they are."""
+        self._point_chunk_size = self.point_chunk_size
+        self._data_ring_size = self.data_ring_size
+        self._enable_raw_store = self.enable_raw_store
+        self._resources = None
+        if not self.enable_preflight or self.fit_only:
+            return
+        resources = self._estimate_resources()
+
+        if resources['core_bytes'] > self.core_memory_limit:
+            self.logger.warning('{0} is estimated to use {1} of memory on the core device'.format(
+                self._name, format_bytes(resources['core_bytes'])))
+            if self.auto_storage:
+                # hold the data of only the most recent scan points on the core
+                if self._data_ring_size == 0:
+                    self._data_ring_size = min(self.npoints, max(self.batch_points, 16))
+                    resources = self._estimate_resources()
+                    self.logger.warning('holding data of {0} scan points on the core (data_ring_size)'.format(
+                        self._data_ring_size))
+
+                # hold only some of the scan points on the core
+                if resources['core_bytes'] > self.core_memory_limit and self._point_chunk_size == 0:
+                    point_bytes = max(resources['core_points_bytes'] // max(self.npoints, 1), 1)
+                    free = max(self.core_memory_limit - resources['core_data_bytes'], 0)
+                    self._point_chunk_size = int(max(free // 2 // point_bytes, 1))
+                    resources = self._estimate_resources()
+                    self.logger.warning('holding {0} scan points on the core (point_chunk_size)'.format(
+                        self._point_chunk_size))
+
+        if resources['host_bytes'] > self.host_memory_limit:
+            self.logger.warning('{0} is estimated to use {1} of memory on the host for raw values'.format(
+                self._name, format_bytes(resources['host_bytes'])))
+            if self.auto_storage and not self._enable_raw_store:
+                self._enable_raw_store = True
+                resources = self._estimate_resources()
+                self.logger.warning('holding raw values in a memory-mapped file (enable_raw_store)')
+
+        self._resources = resources
+        if self.enable_reporting:
+            self.report(location='preflight')
+
+    # private: for scan.py
+    def _init_raw_store(self):
+        """Create the memory-mapped file that holds the raw values measured by the scan"""
+        self._raw_store = None
+        if self._enable_raw_store and not self.fit_only:
+            os.makedirs(self.raw_store_dir, exist_ok=True)
+            path = os.path.join(self.raw_store_dir, '{0:09}-{1}.raw'.format(self.scheduler.rid, self._name))
+            self._raw_store = RawStore(path)
+            self._logger.info('writing raw data to {0}'.format(path))
+
+    # private: for scan.py
+    def _map_raw_store(self):
+        """Hold the data of the scan in the raw data store again after the core wrote it back to the scan"""
+        if self._raw_store is None or self._host_data is not None:
+            return
+        for key in ['data', 'repeats']:
+            array = self._raw_store.array(key)
+            value = getattr(self, '_' + key)
+            if value is not array:
+                array[:] = value
+                setattr(self, '_' + key, array)
+
+    # private: for scan.py
+    def _flush_raw_store(self):
+        if self._raw_store is not None:
+            self._raw_store.flush()
+
+    # private: for scan.py
+    def _reset_loop_state(self):
+        """Reset variables that the scan loop always sets before using them.  Their values are embedded in the
+        compiled kernel, so resetting them allows a compiled kernel to be reused (see enable_compile_cache)."""
+        self._batch_start = np.int32(0)
+        self._batch_row = np.int32(0)
+        self._batch_i_pass = np.int32(0)
+        self._batch_t0 = np.int64(0)
+        self._cm_sum = 0.0
+        self._cm_min = 0.0
+        self._cm_max = 0.0
+        self._cm_t0 = np.int64(0)
+        self._pause_check_count = np.int32(0)
+        self._pause_check_t0 = np.int64(0)
+        self._pg_t0 = np.int64(0)
+        if isinstance(getattr(self, '_i_point', None), np.ndarray):
+            self._i_point = np.zeros_like(self._i_point)
+        else:
+            self._i_point = np.int64(0)
+
+    # private: for scan.py
+    def _compile_model_registry(self):
+        """Index the model registry by measurement, calculation, and dimension so the models that handle data at each
+        scan point can be looked up without iterating over every registered model."""
+        self._measurement_models = {}
+        self._calculation_models = {}
+        self._dimension_models = {}
+        for entry in self._model_registry:
+            # resolved once so that mutate_datasets() does not inspect the model at every scan point
+            entry['accepts_offset'] = self._accepts_offset(entry['model'])
+            if entry['measurement']:
+                self._measurement_models.setdefault(entry['measurement'], []).append(entry)
+            if entry['calculation']:
+                self._calculation_models.setdefault(entry['calculation'], []).append(entry)
+            self._dimension_models.setdefault(entry['dimension'], []).append(entry)
+
+    # private: for scan.py
+    def _init_batching(self):
+        """Determine if data for multiple scan points should be sent to the host in a single RPC"""
+        self._batching = self.batch_points > 1
+        if self._batching and self._is_overridden('offset_point'):
+            # the host replays each batch using the scan points stored in self._points_flat, which are not
+            # the points returned by offset_point()
+            self.logger.warning("Batching of scan points is not supported when offset_point() is implemented.  "
+                                "Datasets will be mutated after every scan point.")
+            self._batching = False
+        self._batch_count = np.int32(0)
+        self._batch_time_mu = np.int64(0)
+        if self._batching and self.batch_time > 0:
+            self._batch_time_mu = np.int64(self.core.seconds_to_mu(self.batch_time))
+        self._logger.debug('batching {0} (batch_points={1}, batch_time={2})'.format(self._batching,
+                                                                                   self.batch_points,
+                                                                                   self.batch_time))
+
+    # private: for scan.py
+    def _init_adaptive_repeats(self):
+        """Validate settings used to stop repeating scan points early"""
+        if self.enable_adaptive_repeats:
+            if self.target_error <= 0:
+                raise ValueError('target_error must be greater than 0 when enable_adaptive_repeats is True.')
+            if not 1 <= self.min_repeats <= self.nrepeats:
+                raise ValueError('min_repeats must be between 1 and nrepeats when enable_adaptive_repeats is True.')
+            self._target_error_sq = float(self.target_error ** 2)
+            self._logger.debug('adaptive repeats: target_error={0}, min_repeats={1}, max_repeats={2}'.format(
+                self.target_error, self.min_repeats, self.nrepeats))
+        else:
+            self._target_error_sq = 0.0
+
+    # private: for scan.py
+    @portable
+    def _target_error_met(self, n, nmeasurements) -> TBool:
+        """Returns True if the standard error of the mean of every measurement at the current scan point
+        is less than or equal to target_error.  The error is calculated the same way as in ScanModel.calc_error().
+
+        :param n: Number of repeats performed so far at the current scan point.
+        """
+        for i_measurement in range(nmeasurements):
+            mean = self._sums[i_measurement] / n
+            var = self._sums_sq[i_measurement] / n - mean * mean
+            # square of the standard error of the mean
+            if var / n > self._target_error_sq:
+                return False
+        return True
+
+    # private: for scan.py
+    def _init_pausing(self):
+        """Determine how often the scheduler is asked if the scan should pause"""
+        if self.pause_check_points < 1:
+            raise ValueError('pause_check_points must be greater than or equal to 1.')
+        self._pause_check_time_mu = np.int64(0)
+        if self.enable_pausing and self.pause_check_time > 0:
+            self._pause_check_time_mu = np.int64(self.core.seconds_to_mu(self.pause_check_time))
+            self._logger.debug('checking pause every {0} s'.format(self.pause_check_time))
+        elif self.enable_pausing:
+            self._logger.debug('checking pause every {0} scan points'.format(self.pause_check_points))
+
+    # private: for scan.py
+    def _init_warmup(self, resume):
+        """Determine when warm-up points are run"""
+        if self.warmup_policy not in warmup_policies:
+            raise ValueError("Unknown warmup_policy '{0}'.  Must be one of {1}".format(self.warmup_policy,
+                                                                                     list(warmup_policies.keys())))
+        self._warmup_policy = np.int32(warmup_policies[self.warmup_policy])
+        self._warmup_idle_mu = np.int64(0)
+        if self._warmup_policy == WARMUP_IDLE:
+            if self.warmup_idle_time <= 0:
+                raise ValueError('warmup_idle_time must be greater than 0.')
+            self._warmup_idle_mu = np.int64(self.core.seconds_to_mu(self.warmup_idle_time))
+
+        # the time of the last measurement is kept when the scan resumes
+        if not resume:
+            self._t_measured_mu = np.int64(0)
+
+    # private: for scan.py
+    @portable
+    def _warmup_due(self, resume, first) -> TBool:
+        """Returns True if the warm-up points should be run before the scan points of the current pass.
+
+        :param resume: True if this run of the scan loop resumed a paused scan.
+        :param first: True at the first pass executed by this run of the scan loop.
+        """
+        if self._warmup_policy == WARMUP_FIRST_PASS:
+            return first and not resume
+        elif self._warmup_policy == WARMUP_RESUME:
+            return first
+        elif self._warmup_policy == WARMUP_IDLE:
+            # the rtio counter starts over if the core device was restarted while the scan was paused
+            idle = self._timestamp_mu() - self._t_measured_mu
+            return self._t_measured_mu == 0 or idle < 0 or idle >= self._warmup_idle_mu
+        elif self._warmup_policy == WARMUP_CUSTOM:
+            return self.warmup_due(self._i_pass, first and resume)
+        return True
+
+    # private: for scan.py
+    @portable
+    def _reset_pause_check(self):
+        """Make the next call to _pause_check_due() return True"""
+        self._pause_check_count = self.pause_check_points - 1
+        if self._pause_check_time_mu > 0:
+            self._pause_check_t0 = self._timestamp_mu() - self._pause_check_time_mu
+
+    # private: for scan.py
+    @portable
+    def _pause_check_due(self) -> TBool:
+        """Returns True if the scheduler should be asked if the scan should pause at the current scan point."""
+        if self._pause_check_time_mu > 0:
+            # time based checks
+            t = self._timestamp_mu()
+            if t - self._pause_check_t0 >= self._pause_check_time_mu:
+                self._pause_check_t0 = t
+                return True
+            return False
+        else:
+            # scan point based checks
+            self._pause_check_count += 1
+            if self._pause_check_count >= self.pause_check_points:
+                self._pause_check_count = 0
+                return True
+            return False
+
+    # private: for scan.py
+    def _init_count_monitor(self):
+        """Determine how often the count monitor datasets are updated"""
+        self._cm_n = np.int32(0)
+        self._cm_interval_mu = np.int64(0)
+        if self.enable_count_monitor and self.count_monitor_interval > 0:
+            self._cm_interval_mu = np.int64(self.core.seconds_to_mu(self.count_monitor_interval))
+
+    # private: for scan.py
+    @portable
+    def _monitor_counts(self, mean):
+        """Aggregate the average value measured at a scan point and update the count monitor datasets if
+        count_monitor_interval has elapsed since they were last updated."""
+        if self._cm_n == 0:
+            self._cm_min = mean
+            self._cm_max = mean
+        elif mean < self._cm_min:
+            self._cm_min = mean
+        elif mean > self._cm_max:
+            self._cm_max = mean
+        self._cm_sum += mean
+        self._cm_n += 1
+
+        if self._cm_interval_mu == 0:
+            self._flush_count_monitor()
+        else:
+            t = self._timestamp_mu()
+            if t - self._cm_t0 >= self._cm_interval_mu:
+                self._flush_count_monitor()
+                self._cm_t0 = t
+
+    # private: for scan.py
+    @portable
+    def _flush_count_monitor(self):
+        """Update the count monitor datasets with all scan point averages aggregated since the last update"""
+        if self._cm_n > 0:
+            # rpc to host
+            # cost: 2.7 ms
+            self._publish_counts(self._cm_sum / self._cm_n, self._cm_min, self._cm_max)
+            self._cm_n = 0
+            self._cm_sum = 0.0
+
+    # private: for scan.py
+    def _write_mirrors(self):
+        """Write the mirrored datasets of each model whose updates were deferred when the scan resumed.  Models only
+        write them once, so this can be called again when the scan is terminated."""
+        for entry in self._model_registry:
+            if hasattr(entry['model'], 'write_mirror'):
+                entry['model'].write_mirror()
+
+    # private: for scan.py
+    def _persist_counts(self):
+        """Persist the last value of the count monitor once the scan has completed"""
+        if self.enable_count_monitor and self._counts is not None:
+            self.set_dataset('counts', self._counts, broadcast=True, persist=True)
+
+    # private: for scan.py
+    def _init_progress(self):
+        """Determine how often the progress datasets are updated"""
+        self._pg_interval_mu = np.int64(0)
+        if self.enable_progress and self.progress_interval > 0:
+            self._pg_interval_mu = np.int64(self.core.seconds_to_mu(self.progress_interval))
+
+    # private: for scan.py
+    @portable
+    def _start_progress(self):
+        t = self._timestamp_mu()
+        self._pg_t0 = t
+        # rpc to host
+        self._begin_progress(self._i_pass, self._idx, t)
+
+    # private: for scan.py
+    @portable
+    def _track_progress(self):
+        """Update the progress datasets if progress_interval has elapsed since they were last updated"""
+        t = self._timestamp_mu()
+        if t - self._pg_t0 >= self._pg_interval_mu:
+            # rpc to host
+            self._publish_progress(self._i_pass, self._idx + 1, t)
+            self._pg_t0 = t
+
+    # private: for scan.py
+    def _accepts_offset(self, model):
+        """Returns True if the mutate_datasets() method of a model accepts the offset of the current pass.  Models that
+        override mutate_datasets() may not."""
+        try:
+            return 'offset' in inspect.signature(model.mutate_datasets).parameters
+        except (TypeError, ValueError):
+            return False
+
+    # private: for scan.py
+    def _is_overridden(self, method):
+        """Return True if a child class has overridden the specified method of the Scan class"""
+        return getattr(type(self), method) is not getattr(Scan, method)
+
+    # private: for scan.py
+    def _specialize_loop(self):
+        """Determine which callbacks of the scan loop are overridden and make the feature flags and callback flags
+        checked by the scan loop kernel invariants.  The compiler then removes disabled features and calls to
+        callbacks that do nothing from the compiled scan loop."""
+        self._has_before_measure = self._is_overridden('before_measure')
+        self._has_lab_before_measure = self._is_overridden('lab_before_measure')
+        self._has_after_measure = self._is_overridden('after_measure')
+        self._has_lab_after_measure = self._is_overridden('lab_after_measure')
+        self._has_analyze_data = self._is_overridden('_analyze_data')
+        self._has_after_scan_point = self._is_overridden('after_scan_point')
+        self._has_private_after_scan_point = self._is_overridden('_after_scan_point')
+        self._has_prepare_next_point = self._is_overridden('prepare_next_point')
+
+        # copy the class's invariants so the invariants of other instances of the scan class are not changed
+        self.kernel_invariants = set(self.kernel_invariants) | {
+            'enable_mutate', 'enable_pausing', 'enable_count_monitor', 'enable_adaptive_repeats', 'enable_progress',
+            'enable_host_worker', '_batching', '_chunked', '_ring_size', '_pass_only', '_instrumented', '_ncalcs',
+            '_warmup_policy', '_has_before_measure', '_has_lab_before_measure', '_has_after_measure',
+            '_has_lab_after_measure', '_has_analyze_data', '_has_after_scan_point', '_has_private_after_scan_point',
+            '_has_prepare_next_point'
+        }
+
+    # private: for scan.py
+    def _infer_kernel_invariants(self):
+        """Add attributes of the scan and its models that kernel code reads but never assigns to the kernel invariants
+        of the scan and models"""
+        self._inferred_invariants = []
+        if not self.enable_invariant_inference:
+            return
+        objects = [self] + [entry['model'] for entry in self._model_registry]
+        # _analyzed is assigned to by the kernel code of CoreScanRunner
+        exclude = set(self.dynamic_attributes) | {'_analyzed'}
+        self._inferred_invariants = infer_kernel_invariants(objects, exclude=exclude)
+        for obj, attrs in self._inferred_invariants:
+            obj.kernel_invariants = set(getattr(obj, 'kernel_invariants', set())) | attrs
+        if self.enable_reporting:
+            self.report(location='invariants')
+
+    # private: for scan.py
+    @portable
+    def _batch_point(self):
+        """Add the current scan point to the batch of scan points waiting to be sent to the host.  The batch is sent
+        once it holds batch_points scan points or once it has been held for longer than batch_time."""
+        if self._batch_count == 0:
+            self._batch_start = self._idx
+            self._batch_row = self._data_row
+            self._batch_i_pass = self._i_pass
+            if self._batch_time_mu > 0:
+                self._batch_t0 = self._timestamp_mu()
+        self._batch_count += 1
+
+        if self._batch_count >= self.batch_points:
+            self._flush_batch()
+        elif self._ring_size > 0 and self._data_row == self._ring_size - 1:
+            # batches must not wrap around the ring
+            self._flush_batch()
+        elif self._batch_time_mu > 0:
+            if self._timestamp_mu() - self._batch_t0 >= self._batch_time_mu:
+                self._flush_batch()
+
+    # private: for scan.py
+    @portable
+    def _flush_batch(self):
+        """Send data of all batched scan points to the host"""
+        if self._batch_count > 0:
+            row = self._batch_row
+            # rpc to host
+            if self.enable_adaptive_repeats:
+                self._mutate_batch_repeats(self._batch_start, self._batch_i_pass,
+                                           self._data[row:row + self._batch_count],
+                                           self._repeats[row:row + self._batch_count])
+            else:
+                self._mutate_batch(self._batch_start, self._batch_i_pass, self._data[row:row + self._batch_count])
+            self._batch_count = 0
+
+    # private: for scan.py
+    def _init_point_window(self):
+        """Select the scan points held on the core.  Without chunking, the core holds every scan point."""
+        self._window_start = np.int32(0)
+        self._data_row = np.int32(0)
+
+        # loop index of each scan point, used to place the data sent by the core in self._host_data
+        self._point_index = {}
+        if self._host_data is not None:
+            self._point_index = {self._point_key(i_point): idx for idx, i_point in enumerate(self._i_points)}
+
+        if not self._chunked:
+            self._window_points = self._points_flat
+            self._window_i_points = self._i_points
+            self._window_end = np.int32(self.npoints)
+            return
+
+        # the core fetches the chunk that holds the first scan point it executes
+        self._window_points = np.zeros((self._point_chunk_size,) + self._points_flat.shape[1:],
+                                       dtype=self._points_flat.dtype)
+        self._window_i_points = np.zeros((self._point_chunk_size,) + self._i_points.shape[1:],
+                                         dtype=self._i_points.dtype)
+        self._window_end = np.int32(0)
+        self._logger.debug('executing scan points in chunks of {0}'.format(self._point_chunk_size))
+
+    # private: for scan.py
+    def _scan_data(self):
+        """Returns the arrays that hold the data and number of repeats of every scan point on the host"""
+        if self._host_data is not None:
+            return self._host_data, self._host_repeats
+        return self._data, self._repeats
+
+    # private: for scan.py
+    def _point_key(self, i_point):
+        return tuple(np.atleast_1d(i_point).tolist())
+
+    # private: for scan.py
+    @portable
+    def _window_row(self) -> TInt32:
+        """Returns the row of the scan points held on the core, and of self._data, that holds the scan point at the
+        current loop index.  Fetches the chunk of scan points that starts at the current loop index from the host
+        when the scan point is not held on the core."""
+        if self._chunked:
+            if self._idx < self._window_start or self._idx >= self._window_end:
+                # batches must not span chunks
+                self._flush_batch()
+                self._load_window(self._idx)
+        return self._idx - self._window_start
+
+    # private: for scan.py
+    @portable
+    def _select_row(self) -> TInt32:
+        """Select the row of self._data that holds the data of the scan point at the current loop index.  Returns the
+        row of the scan points held on the core that holds the scan point."""
+        row = self._window_row()
+        if self._ring_size > 0:
+            self._data_row = self._idx % self._ring_size
+        else:
+            self._data_row = row
+        return row
+
+    # private: for scan.py
+    @portable
+    def _prepare_next_point(self):
+        """Pass the scan point at the next loop index to prepare_next_point().  A scan point that is not held on the
+        core (e.g. the first scan point of the next chunk) is instead prepared when it is executed."""
+        idx = self._idx + 1
+        if idx < self._window_end:
+            row = idx - self._window_start
+            self.prepare_next_point(self._window_i_points[row], self._window_points[row])
+            self._prepared_idx = idx
+
+    # private: for scan.py
+    @portable
+    def _data_offset(self) -> TInt32:
+        """Returns the column of self._data that holds the first repeat of the current pass"""
+        if self._pass_only:
+            return 0
+        return self._i_pass * self.nrepeats
+
+    # interface: for extensions (required)
+    @portable
+    def _load_window(self, start):
+        """Fetch the chunk of scan points that starts at loop index :code:`start` from the host"""
+        pass
+
+    # RPC
+    # private: for scan.py
+    def _get_point_chunk(self, start) -> TList(TFloat):
+        """Returns the values of the scan points of the chunk that starts at loop index :code:`start`, flattened"""
+        return self._points_flat[start:start + self._point_chunk_size].flatten().tolist()
+
+    # RPC
+    # private: for scan.py
+    def _get_i_point_chunk(self, start) -> TList(TInt64):
+        """Returns the indices of the scan points of the chunk that starts at loop index :code:`start`, flattened"""
+        return self._i_points[start:start + self._point_chunk_size].flatten().tolist()
+
+    # private: for scan.py
+    def _merge_point_data(self, i_point, i_pass, data, repeats):
+        """Copy the data collected at a scan point during a pass into the data held by the host.  Returns the data
+        collected at the scan point during all passes."""
+        idx = self._point_index[self._point_key(i_point)]
+        columns = slice(i_pass * self.nrepeats, (i_pass + 1) * self.nrepeats)
+        data = np.asarray(data)
+
+        # rows on the core only hold the current pass
+        if self._pass_only:
+            self._host_data[idx, :, columns] = data
+        else:
+            self._host_data[idx, :, columns] = data[:, columns]
+        self._host_repeats[idx, i_pass] = repeats[i_pass]
+        return self._host_data[idx], self._host_repeats[idx]
+
+    # private: for scan.py
+    @portable
+    def _timestamp_mu(self) -> TInt64:
+        """Returns the current time in machine units.  Used to enforce time budgets during the scan loop."""
+        if self.run_on_core:
+            return self.core.get_rtio_counter_mu()
+        else:
+            return self._host_timestamp_mu()
+
+    # private: for scan.py
+    def _host_timestamp_mu(self) -> TInt64:
+        return np.int64(self.core.seconds_to_mu(time()))
+
+    # private: for scan.py
+    def _init_instrumentation(self):
+        """Allocate the buffers that hold timings of phases that run on the core"""
+        self._instrumented = self.enable_instrumentation or self.enable_trace
+        if self._instrumented and self.instrumentation_buffer_size < 1:
+            raise ValueError('instrumentation_buffer_size must be at least 1')
+        size = self.instrumentation_buffer_size if self._instrumented else 1
+        self._tm_n = np.int32(0)
+        self._tm_phases = np.zeros(size, dtype=np.int32)
+        self._tm_starts = np.zeros(size, dtype=np.int64)
+        self._tm_ends = np.zeros(size, dtype=np.int64)
+
+    # private: for scan.py
+    @portable
+    def _phase_start(self) -> TInt64:
+        """Returns the start time of a phase that runs on the core"""
+        if self._instrumented:
+            return self._timestamp_mu()
+        return np.int64(0)
+
+    # private: for scan.py
+    @portable
+    def _phase_end(self, phase, t0):
+        """Buffer the timing of a phase that runs on the core.  The buffer is sent to the host once it is full."""
+        if self._instrumented:
+            self._tm_phases[self._tm_n] = phase
+            self._tm_starts[self._tm_n] = t0
+            self._tm_ends[self._tm_n] = self._timestamp_mu()
+            self._tm_n += 1
+            if self._tm_n == len(self._tm_phases):
+                self._flush_phases()
+
+    # private: for scan.py
+    @portable
+    def _flush_phases(self):
+        """Send all buffered timings of phases that ran on the core to the host"""
+        if self._tm_n > 0:
+            n = self._tm_n
+            self._receive_phases(self._tm_phases[:n], self._tm_starts[:n], self._tm_ends[:n])
+            self._tm_n = 0
+
+    # private: for scan.py
+    def _write_timing(self):
+        """Save statistics and a histogram of the durations of each phase to the timing datasets"""
+        namespace = self.scan_namespace if self.scan_namespace is not None else self._name
+        self.set_dataset('{0}.timing.columns'.format(namespace), self._timer.stats_columns())
+        self.set_dataset('{0}.timing.bin_edges'.format(namespace), BIN_EDGES)
+        for phase in self._timer.durations:
+            self.set_dataset('{0}.timing.stats.{1}'.format(namespace, phase), self._timer.stats(phase))
+            self.set_dataset('{0}.timing.hist.{1}'.format(namespace, phase), self._timer.histogram(phase))
+
+    # private: for scan.py
+    def _write_trace(self):
+        """Write the timeline of the scan to the trace file of the current RID.  Runs when the scan completes, is
+        terminated, or fails, so errors are logged instead of raised."""
+        self._trace_written = True
+        if self._timer.tracer is None:
+            return
+        path = os.path.join(self.trace_dir, '{0:09}-{1}.trace.json'.format(self.scheduler.rid, self._name))
+        try:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            self._timer.tracer.write(path)
+        except OSError as e:
+            self._logger.warning('could not write trace to {0}: {1}'.format(path, e))
+            return
+        self._logger.info('wrote trace to {0}'.format(path))
+
+    # private: for scan.py
+    def _init_host_worker(self):
+        """Start the thread that updates models on the host"""
+        if self.enable_host_worker and self._host_worker is None:
+            if self.host_worker_queue_size < 1:
+                raise ValueError('host_worker_queue_size must be at least 1')
+            self._host_worker = HostWorker(maxsize=self.host_worker_queue_size)
+            self._logger.debug('started host worker thread')
+
+    # private: for scan.py
+    def _host_task(self, func, *args):
+        """Run func(*args) on the host worker thread, or immediately when the host worker is not running"""
+        if self._host_worker is not None:
+            # arrays may be views of data that the scan loop overwrites before the worker processes them (e.g. rows of
+            # the data ring when the scan runs on the host)
+            args = [np.array(arg, copy=True) if isinstance(arg, np.ndarray) else arg for arg in args]
+
+            # time spent waiting for space in the queue
+            with self._timer.time('host_worker_submit'):
+                self._host_worker.submit(func, *args)
+        else:
+            func(*args)
+
+    # private: for scan.py
+    def _drain_host_worker(self):
+        """Wait until the host worker has processed all data sent by the core"""
+        if self._host_worker is not None:
+            self._host_worker.drain()
+
+    # private: for scan.py
+    def _stop_host_worker(self):
+        if self._host_worker is not None:
+            self._host_worker.stop()
+            self._host_worker = None
+            self._logger.debug('stopped host worker thread')
+
     # private: for scan.py
     def _attach_to_models(self):
         """Attach the scan to all models"""
@@ -562,17 +1584,25 @@ class Scan(HasEnvironment):
     def _timeit(self, event):
         if event == 'compile':
             elapsed = time() - self._profile_times['before_compile']
-            self._logger.warning('core scan compiled in {0} sec'.format(elapsed))
+            self._timer.add('compile', elapsed)
+            if self.enable_timing:
+                self._logger.warning('core scan compiled in {0} sec'.format(elapsed))
 
     # private: for scan.py
     @portable
     def _rewind(self, num_points):
         """Rewind the cursor from the current pass and point indices by the specified number of points.  The cursor can
           be rewound into a previous pass.  The cursor cannot be rewound past the first point of the first pass.
+          Rewound scan points are measured again, and their data is sent to the host again, so the cursor can be
+          rewound by more scan points than are held on the core (see :code:`point_chunk_size` and
+          :code:`data_ring_size`).
 
           :param num_points: The current cursor will be moved to this number of scan points before its current value.
         """
 
+        # batches must contain consecutive scan points
+        self._flush_batch()
+
         # get new i_point, i_pass indices
         if num_points > 0:
             self._idx -= num_points
@@ -619,11 +1649,25 @@ class Scan(HasEnvironment):
             # start the profiler (if it's enabled)
             self._profile(start=True)
 
+            # durations of each phase are accumulated over all runs of a paused scan
+            if not resume:
+                self._timer = PhaseTimer(enabled=self.enable_instrumentation or self.enable_trace,
+                                         tracer=Tracer() if self.enable_trace else None)
+                self._trace_written = False
+
             # initialize the scan
-            self._initialize(resume)
+            with self._timer.time('initialize'):
+                self._initialize(resume)
 
             # run the scan
             if not self.fit_only:
+                # update models in a background thread
+                self._init_host_worker()
+
+                # write the data collected at each scan point to disk
+                if not resume:
+                    self._init_checkpoint()
+
                 if resume:
                     self._logger.debug(
                         'resuming scan at (i_pass, i_point) = ({0}, {1})'.format(self._i_pass, self._i_point))
@@ -631,16 +1675,27 @@ class Scan(HasEnvironment):
                     self._logger.debug(
                         'starting scan at (i_pass, i_point) = ({0}, {1})'.format(self._i_pass, self._i_point))
                 if self.run_on_core:
-                    if self.enable_timing:
+                    if self.enable_timing or self._instrumented:
                         self._profile_times = {
                             'before_compile': time()
                         }
                     self._logger.debug("compiling core scan...")
-                    self._run_scan_core(resume)
+                    self._run_core(resume)
+                    self._map_raw_store()
                 else:
                     self._run_scan_host(resume)
                 self._logger.debug("scan completed")
 
+                # all data must be in the models before the scan yields or the data is analyzed
+                self._drain_host_worker()
+                self._write_checkpoint()
+                self._flush_raw_store()
+
+                if not self._paused:
+                    self._persist_counts()
+                    self._finish_progress()
+                    self._write_mirrors()
+
                 # yield to other experiments
                 if self._paused:
                     self._yield()  # self.run(resume=True) is called after other experiments finish and this scan resumes
@@ -657,7 +1712,8 @@ class Scan(HasEnvironment):
 
             # perform fits
             self._logger.debug("executing _analyze")
-            self._analyze()
+            with self._timer.time('analyze'):
+                self._analyze()
 
             self.after_analyze()
             self.lab_after_analyze()
@@ -666,12 +1722,46 @@ class Scan(HasEnvironment):
             self._logger.debug("executing lab_after_scan callback")
             self.lab_after_scan()
 
+            # save and report the durations of each phase of the scan
+            if self.enable_instrumentation and not self.fit_only:
+                self._write_timing()
+                if self.enable_reporting:
+                    self.report(location='timing')
+
         finally:
+            self._stop_host_worker()
+
+            # the mirrored datasets are also written when the scan is terminated or fails
+            if not self.fit_only:
+                self._write_mirrors()
+
+            # the trace is also written when the scan is terminated or fails
+            if self.enable_trace and not self.fit_only and not self._trace_written:
+                self._write_trace()
+
             # stop the profiler (if it's enabled)
             self._profile(stop=True)
 
         # callback with default behavior: for child class
 
+    # helper: for child class (optional)
+    def resume_from_checkpoint(self, path):
+        """Helper method
+
+        Rebuilds a scan from the checkpoint file written by a previous run of the scan (see :code:`enable_checkpoints`)
+        and continues the scan at the first scan point that had not completed when the checkpoint was last written.
+        The data in the checkpoint file is passed to the models as if it had just been measured, and data collected
+        from then on is written to the same checkpoint file.  Call instead of :code:`run()`.  The scan must have the
+        same scan points, passes, repeats, and measurements as the scan that wrote the checkpoint.
+
+        :param path: Path of the checkpoint file.
+        """
+        self._restore_path = path
+        try:
+            self.run()
+        finally:
+            self._restore_path = None
+
     # interface: for child class or extension (required)
     def get_scan_points(self):
         """Interface method (required - except when inheriting from TimeFreqScan, TimeScan, or FreqScan)
@@ -684,6 +1774,33 @@ class Scan(HasEnvironment):
         """
         raise NotImplementedError('The get_scan_points() method needs to be implemented.')
 
+    # interface: for child class (optional)
+    def get_point_order(self, npoints):
+        """Interface method (optional, has default behavior)
+
+        Returns the order in which scan points are executed as a permutation of the scan point indices.  By default,
+        the ordering selected by the :code:`point_order` attribute is returned.  For 2D scans, the order of the
+        dimension 0 scan points is returned and the dimension 1 scan points are always executed sequentially.
+
+        :param npoints: Number of scan points to order.
+        :returns: Permutation of :code:`range(npoints)`
+        :rtype: A Python list or a numpy array of integers
+        """
+        if callable(self.point_order):
+            return self.point_order(npoints)
+        if self.point_order not in point_orders:
+            raise ValueError("Unknown point_order '{0}'.  Must be one of {1}".format(self.point_order,
+                                                                                   list(point_orders.keys())))
+        return point_orders[self.point_order](npoints)
+
+    # private: for scan.py
+    def _load_point_order(self, npoints):
+        """Returns the validated scan point order"""
+        order = np.array(self.get_point_order(npoints), dtype=np.int64)
+        if not np.array_equal(np.sort(order), np.arange(npoints)):
+            raise ValueError('get_point_order() must return a permutation of range({0})'.format(npoints))
+        return order
+
     # interface: for child class (optional)
     def get_warmup_points(self):
         """Interface method (optional, has default behavior)
@@ -712,7 +1829,10 @@ class Scan(HasEnvironment):
 
         Logs details about the scan to the log window.
         Runs during initialization after the scan points and warmup points have been loaded but before datasets
-        have been initialized.
+        have been initialized.  When :code:`enable_instrumentation` is True, also runs with :code:`location='timing'`
+        after the scan completes to log a summary of the time spent in each phase of the scan.  Runs with
+        :code:`location='invariants'` at the end of initialization to log the inferred kernel invariants and with
+        :code:`location='preflight'` before storage is allocated to log the estimated resources used by the scan.
         """
 
         if location == 'top' or location == 'both':
@@ -733,6 +1853,26 @@ class Scan(HasEnvironment):
             self._logger.debug('fit_only {0}'.format(self.fit_only))
             self._report()
 
+        if location == 'preflight' and self._resources is not None:
+            r = self._resources
+            self._logger.debug('core memory {0} (data {1}, points {2})'.format(format_bytes(r['core_bytes']),
+                                                                             format_bytes(r['core_data_bytes']),
+                                                                             format_bytes(r['core_points_bytes'])))
+            self._logger.debug('host memory {0} ({1} copies of {2} raw values)'.format(
+                format_bytes(r['host_bytes']), r['host_copies'], format_bytes(r['counts_bytes'])))
+            self._logger.debug('{0} broadcast per scan point, {1} rpcs'.format(
+                format_bytes(r['broadcast_bytes_per_point']), r['rpcs']))
+
+        if location == 'invariants':
+            for obj, attrs in self._inferred_invariants:
+                self._logger.debug('inferred kernel invariants of {0}: {1}'.format(obj.__class__.__name__,
+                                                                                  ', '.join(sorted(attrs))))
+
+        if location == 'timing':
+            self.logger.info('TIMING {}'.format(self._name))
+            for line in self._timer.summary():
+                self.logger.info(line)
+
     # interface: for child class (required)
     @portable
     def measure(self, point):
@@ -758,6 +1898,21 @@ class Scan(HasEnvironment):
         """
         return self.do_measure(point)
 
+    # interface: for child class (optional)
+    @portable
+    def warmup_due(self, i_pass, resumed) -> TBool:
+        """Interface method  (optional)
+
+        Returns True if the warm-up points should be run before the scan points of the current pass.  Only called when
+        :code:`warmup_policy` is set to 'custom'.  If this method is not implemented, warm-up points are run before
+        every pass.
+
+        :param i_pass: Index of the current pass.
+        :param resumed: True if the scan has just resumed after being paused.
+        :returns: True to run the warm-up points.
+        """
+        return True
+
     # interface: for child class (optional)
     @rpc(flags={"async"})
     def mutate_datasets(self, i_point, measurement, point, data):
@@ -778,24 +1933,261 @@ class Scan(HasEnvironment):
         :param i_point: Index of the current scan point.
         :param measurement: Name of the current measurement (For multiple measurements).
         :param point: Value of the current scan point.
-        :param data: List of integers containing the values returned by :code:`measure()` at each repetition of the current scan point.
+        :param data: List of integers containing the values returned by :code:`measure()` at each repetition of the current scan point.  When :code:`enable_adaptive_repeats` is set, the values are floats and repeats that were skipped are NaN.
         """
         self.measurement = measurement
 
-        for entry in self._model_registry:
-            # model registered for this measurement
-            if entry['measurement'] and entry['measurement'] == measurement:
-                # grab the model for the measurement from the registry
-                # if measurement in self._model_registry['measurements']:
-                #    entry = self._model_registry['measurements'][measurement]
+        # every pass has nrepeats values, the last nrepeats values were measured during the current pass
+        offset = max(len(data) - self.nrepeats, 0)
 
-                # mutate the stats for this measurement with the data passed from the core device
+        # every model registered for this measurement
+        for entry in self._measurement_models.get(measurement, ()):
+            # mutate the stats for this measurement with the data passed from the core device
+            if entry['accepts_offset']:
+                mean = entry['model'].mutate_datasets(i_point, point, data, offset=offset)
+            else:
                 mean = entry['model'].mutate_datasets(i_point, point, data)
-                self._mutate_plot(entry, i_point, point, mean)
+            self._mutate_plot(entry, i_point, point, mean)
+
+            # record the number of repeats performed at the scan point
+            if self.enable_adaptive_repeats:
+                entry['model'].mutate_repeats(i_point, int(np.count_nonzero(~np.isnan(data))))
+
+    # RPC
+    # private: for scan.py
+    @rpc(flags={"async"})
+    def _mutate_batch(self, start, i_pass, data):
+        """Mutates datasets for a batch of scan points in the order the scan points were executed.
+        :code:`mutate_datasets()` is called for each scan point and measurement exactly as it would have been called
+        had the scan points not been batched, followed by any calculations.
+
+        :param start: Value of the loop index (idx) at the first scan point of the batch.
+        :param i_pass: Index of the pass during which the batch was collected.
+        :param data: Data collected for each scan point in the batch.  Indexed by scan point, measurement, and repeat.
+        """
+        self._host_task(self._mutate_points, start, i_pass, data, None)
+
+    # RPC
+    # private: for scan.py
+    @rpc(flags={"async"})
+    def _mutate_batch_repeats(self, start, i_pass, data, repeats):
+        """Same as :code:`_mutate_batch()`, but also given the number of repeats performed at each scan point of the
+        batch (see enable_adaptive_repeats).
+
+        :param repeats: Number of repeats performed at each scan point in the batch.  Indexed by scan point and pass.
+        """
+        self._host_task(self._mutate_points, start, i_pass, data, repeats)
+
+    # private: for scan.py
+    def _mutate_points(self, start, i_pass, data, repeats):
+        for i in range(len(data)):
+            i_point = self._i_points[start + i]
+            point = self._points_flat[start + i]
+            self._mutate_point(i_point, point, i_pass, data[i], self._all_repeats if repeats is None else repeats[i])
+            if self._ncalcs > 0:
+                self._run_calculations(i_point, point)
+
+    # RPC
+    # private: for scan.py
+    @rpc(flags={"async"})
+    def _mutate_all(self, i_point, point, i_pass, data):
+        """Mutates datasets of all measurements at a single scan point.
+
+        :param i_point: Index of the scan point.
+        :param point: Value of the scan point.
+        :param i_pass: Index of the current pass.
+        :param data: 2D array of the data collected at the scan point, indexed by measurement and repeat.  Only holds
+                     the repeats of the current pass when the core only holds the current pass (see
+                     enable_pass_only_data).
+        """
+        self._host_task(self._mutate_point, i_point, point, i_pass, data, self._all_repeats)
+
+    # RPC
+    # private: for scan.py
+    @rpc(flags={"async"})
+    def _mutate_all_repeats(self, i_point, point, i_pass, data, repeats):
+        """Same as :code:`_mutate_all()`, but also given the number of repeats performed at the scan point during each
+        pass (see enable_adaptive_repeats).
+
+        :param repeats: Number of repeats performed at the scan point during each pass.
+        """
+        self._host_task(self._mutate_point, i_point, point, i_pass, data, repeats)
+
+    # RPC
+    # private: for scan.py
+    @rpc(flags={"async"})
+    def _calculate_point(self, i_point, point):
+        """Performs calculations at a single scan point"""
+        self._host_task(self._run_calculations, i_point, point)
+
+    # private: for scan.py
+    def _run_calculations(self, i_point, point):
+        with self._timer.time('calculate_all'):
+            self._calculate_all(i_point, point)
+
+    # RPC
+    # private: for scan.py
+    @rpc(flags={"async"})
+    def _receive_phases(self, phases, starts, ends):
+        """Receives timings of phases that ran on the core.
+
+        :param phases: Index into CORE_PHASES of each phase.
+        :param starts: Start time of each phase in machine units.
+        :param ends: End time of each phase in machine units.
+        """
+        starts = np.array(starts) * self.core.ref_period
+        ends = np.array(ends) * self.core.ref_period
+        for phase, start, end in zip(phases, starts, ends):
+            self._timer.add_core(CORE_PHASES[phase], start, end - start)
+
+        # the timings were sent right after the last phase ended
+        if len(ends) > 0:
+            self._timer.sync(ends[-1])
+
+    # RPC
+    # private: for scan.py
+    def _init_checkpoint(self):
+        """Create the checkpoint file of the scan, or continue writing the file the scan was restored from"""
+        if self._checkpoint is not None or not self.enable_checkpoints:
+            return
+        if not self.enable_mutate:
+            raise ValueError('enable_checkpoints requires enable_mutate since data is only checkpointed once it has '
+                             'been sent to the host')
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        path = os.path.join(self.checkpoint_dir, '{0:09}-{1}.checkpoint.h5'.format(self.scheduler.rid, self._name))
+        self._checkpoint = Checkpoint(path)
+        data, repeats = self._scan_data()
+        self._checkpoint.create(self._points_flat, self._i_points, data, repeats, self.measurements,
+                                attrs={'scan': self._name, 'npasses': self.npasses, 'nrepeats': self.nrepeats})
+        self._logger.info('writing checkpoints to {0}'.format(path))
+
+    # private: for scan.py
+    def _update_checkpoint(self, i_point, i_pass, data, repeats):
+        """Record the data collected at a scan point and write the checkpoint at the end of each pass or once
+        checkpoint_points scan points have been recorded"""
+        self._checkpoint.update(i_point, i_pass, data, repeats)
+        if self._checkpoint.is_last(i_point) or 0 < self.checkpoint_points <= self._checkpoint.pending:
+            self._write_checkpoint()
+
+    # private: for scan.py
+    def _write_checkpoint(self):
+        if self._checkpoint is not None:
+            with self._timer.time('write_checkpoint'):
+                self._checkpoint.write()
+
+    # private: for scan.py
+    def _restore_checkpoint(self):
+        """Restore the scan points, data, and position of the scan loop from the checkpoint file"""
+        checkpoint = Checkpoint(self._restore_path)
+        state = checkpoint.load()
+        attrs = state['attrs']
+        data, repeats = self._scan_data()
+        if (state['data'].shape != data.shape or state['i_points'].shape != np.shape(self._i_points)
+                or attrs['measurements'] != list(self.measurements) or attrs['npasses'] != self.npasses
+                or attrs['nrepeats'] != self.nrepeats):
+            raise ValueError('The checkpoint file {0} was written by a scan with different scan points, passes, '
+                             'repeats, or measurements'.format(self._restore_path))
+
+        # the scan points are restored since their order may be random
+        self._points_flat = state['points'].astype(self._points_flat.dtype)
+        self._i_points = state['i_points'].astype(self._i_points.dtype)
+        for idx, i_point in enumerate(self._i_points):
+            self._points[tuple(np.atleast_1d(i_point))] = self._points_flat[idx]
+        data[:] = state['data']
+        repeats[:] = state['repeats']
+        i_pass, idx = checkpoint_progress(state['passes'], self.npasses)
+        self._i_pass = np.int32(i_pass)
+        self._idx = np.int32(idx)
+        self._restored = (checkpoint, state['passes'])
+        self._logger.info('restored scan from {0} at (i_pass, idx) = ({1}, {2})'.format(self._restore_path, i_pass,
+                                                                                      idx))
+
+    # private: for scan.py
+    def _replay_checkpoint(self):
+        """Pass the data restored from the checkpoint file to the models as if it had just been measured"""
+        checkpoint, passes = self._restored
+        self._restored = None
+        data, repeats = self._scan_data()
+        if not self.fit_only and self.enable_mutate:
+            for idx in range(self.npoints):
+                if passes[idx] > 0:
+                    i_point = self._i_points[idx]
+                    point = self._points_flat[idx]
+                    # models updated incrementally are given the data of each pass in turn
+                    first_pass = 0 if self.enable_incremental_stats else passes[idx] - 1
+                    for i_pass in range(first_pass, passes[idx]):
+                        self._mutate_point(i_point, point, i_pass, data[idx], repeats[idx], merge=False)
+                    if self._ncalcs > 0:
+                        self._run_calculations(i_point, point)
+
+        # data collected from here on is added to the same file
+        self._checkpoint = checkpoint
+
+    # private: for scan.py
+    def _check_pause(self) -> TBool:
+        """Check pause while the host worker is not communicating with the ARTIQ master"""
+        if self._host_worker is not None:
+            with self._host_worker.lock:
+                return self.scheduler.check_pause()
+        return self.scheduler.check_pause()
+
+    # private: for scan.py
+    def _mutate_point(self, i_point, point, i_pass, data, repeats, merge=True):
+        """Splits the data collected at a scan point by measurement and passes the data collected over all passes so far
+        to :code:`mutate_datasets()` once for each measurement.  With :code:`enable_incremental_stats`, only the data
+        collected during the current pass is passed to the models instead, unless :code:`mutate_datasets()` has been
+        overridden.
+
+        :param merge: Set to False if data is already the row of the scan point in the data held by the host, e.g. when
+                      data restored from a checkpoint is replayed.
+        """
+        if merge and self._host_data is not None:
+            data, repeats = self._merge_point_data(i_point, i_pass, data, repeats)
+        incremental = self.enable_incremental_stats and not self._is_overridden('mutate_datasets')
+        for i_measurement in range(self.nmeasurements):
+            with self._timer.time('mutate_datasets'):
+                if incremental:
+                    self._mutate_pass(i_point, self.measurements[i_measurement], point, i_pass,
+                                      data[i_measurement], repeats)
+                else:
+                    self.mutate_datasets(i_point, self.measurements[i_measurement], point,
+                                         self._get_point_data(data[i_measurement], i_pass, repeats))
+        if self._checkpoint is not None:
+            self._update_checkpoint(i_point, i_pass, data, repeats)
+
+    # private: for scan.py
+    def _get_point_data(self, data, i_pass, repeats):
+        """Returns the values measured at a scan point over all passes so far.  Every pass has nrepeats columns and
+        repeats that were skipped because the error target was met are NaN (see enable_adaptive_repeats)."""
+        values = data[:(i_pass + 1) * self.nrepeats]
+        if not self.enable_adaptive_repeats:
+            return values
+        values = np.array(values, dtype=np.float64)
+        skipped = np.arange(self.nrepeats) >= np.asarray(repeats[:i_pass + 1])[:, np.newaxis]
+        values[skipped.reshape(-1)] = np.nan
+        return values
+
+    # private: for scan.py
+    def _mutate_pass(self, i_point, measurement, point, i_pass, data, repeats):
+        """Same as the default :code:`mutate_datasets()`, but only the data collected during the current pass is passed
+        to each model registered for the measurement (see enable_incremental_stats)."""
+        self.measurement = measurement
+
+        # number of values measured at the scan point during previous passes
+        offset = i_pass * self.nrepeats
+        all_data = self._get_point_data(data, i_pass, repeats)
+        pass_data = all_data[offset:]
+        for entry in self._measurement_models.get(measurement, ()):
+            model = entry['model']
 
-                # keep a record on the host of the data collected for this pass, measurement, and scan point
-                # for i_repetition in range(len(data)):
-                #    self._data.set(pos=[i_measurement, i_point, i_repetition], value=np.int32(data[i_repetition]))
+            # models that don't keep every raw value need all of them when the running sums can't be updated
+            mean = model.mutate_datasets_pass(i_point, point, offset, pass_data,
+                                              all_counts=None if model.raw_data == 'full' else all_data)
+            self._mutate_plot(entry, i_point, point, mean)
+
+            # record the number of repeats performed at the scan point
+            if self.enable_adaptive_repeats:
+                model.mutate_repeats(i_point, int(np.sum(repeats[:i_pass + 1])))
 
     # interface: for child class (optional)
     def analyze(self):
@@ -825,39 +2217,129 @@ class Scan(HasEnvironment):
             self.logger.warning("Scan terminated.")
             self._terminated = True
 
+    # RPC
+    # private: for scan.py
+    @rpc(flags={"async"})
+    def _publish_counts(self, mean, min_, max_):
+        """Updates the count monitor datasets with scan point averages aggregated on the core.
+
+        :param mean: Mean of the scan point averages since the last update.
+        :param min_: Smallest scan point average since the last update.
+        :param max_: Largest scan point average since the last update.
+        """
+        self._host_task(self._update_counts, mean, min_, max_)
+
+    # private: for scan.py
+    def _update_counts(self, mean, min_, max_):
+        if self.counts_perc >= 0:
+            min_ = round(min_, self.counts_perc)
+            max_ = round(max_, self.counts_perc)
+        with self._timer.time('set_counts'):
+            self._set_counts(mean)
+        self.set_dataset('counts_min', min_, broadcast=True)
+        self.set_dataset('counts_max', max_, broadcast=True)
+
     # interface: for child class (optional)
     # RPC
     @rpc(flags={"async"})
     def _set_counts(self, counts):
         """Interface method  (optional)
 
-        Runs after a scan point completes.  By default, this method sets the :code:`counts` dataset
+        Runs each time the count monitor is updated.  By default, this method sets the :code:`counts` dataset
         to the value passed in on the :code:`counts` parameter of this method.  It therefore also
-        updates the count monitor dataset with the average value measured at the current scan point
-        while the scan is running.
+        updates the count monitor dataset with the average value measured at recent scan points
+        while the scan is running.  The :code:`counts` dataset is broadcast while the scan is running and is only
+        persisted once the scan completes.
 
-        :param counts: Average value of all values returned from :code:`measure()` during the current scan point.
+        :param counts: Mean of the average values returned from :code:`measure()` at each scan point completed
+                       since the count monitor was last updated.
 
         Notes
             - Does not run if :code:`self.enable_count_monitor == False`
+            - Runs at most once every :code:`self.count_monitor_interval` seconds.
         """
         if self.counts_perc >= 0:
             counts = round(counts, self.counts_perc)
-        self.set_dataset('counts', counts, broadcast=True, persist=True)
+        self._counts = counts
+        self.set_dataset('counts', counts, broadcast=True)
+
+    # RPC
+    # private: for scan.py
+    @rpc(flags={"async"})
+    def _begin_progress(self, i_pass, idx, t_mu):
+        """Records the number of scan points completed and the time on the core when the scan starts or resumes"""
+        completed = i_pass * self.npoints + idx
+        t = t_mu * self.core.ref_period
+        self._pg_start = (completed, t)
+        self._pg_last = (completed, t)
+        self._pg_offset = time() - t
+        self._host_task(self._set_progress, 'completed', completed / (self.npasses * self.npoints))
+
+    # RPC
+    # private: for scan.py
+    @rpc(flags={"async"})
+    def _publish_progress(self, i_pass, idx, t_mu):
+        """Updates the progress datasets.
+
+        :param i_pass: Index of the current pass.
+        :param idx: Number of scan points completed during the current pass.
+        :param t_mu: Time on the core when the last scan point completed.
+        """
+        t = t_mu * self.core.ref_period
+
+        # how far the host is behind the core.  RPCs arrive some time after they are sent, so the smallest difference
+        # seen between the host and core clocks is used as the offset between the clocks.
+        offset = time() - t
+        self._pg_offset = min(self._pg_offset, offset)
+        lag = offset - self._pg_offset
+        backlog = self._host_worker.backlog if self._host_worker is not None else 0
+
+        completed = i_pass * self.npoints + idx
+        self._host_task(self._update_progress, completed, t, lag, backlog)
+
+    # private: for scan.py
+    def _update_progress(self, completed, t, lag, backlog):
+        total = self.npasses * self.npoints
+        last_completed, last_t = self._pg_last
+        start_completed, start_t = self._pg_start
+        self._pg_last = (completed, t)
+
+        self._set_progress('completed', completed / total)
+        self._set_progress('rpc_backlog', backlog)
+        self._set_progress('host_lag', lag)
+
+        # rate over the last interval shows slowdowns immediately
+        if t > last_t:
+            self._set_progress('points_per_second', max(completed - last_completed, 0) / (t - last_t))
+
+        # the average rate since the scan started or resumed is used for estimates
+        if t > start_t and completed > start_completed:
+            rate = (completed - start_completed) / (t - start_t)
+            self._set_progress('seconds_per_pass', self.npoints / rate)
+            self._set_progress('eta', (total - completed) / rate)
+
+    # private: for scan.py
+    def _finish_progress(self):
+        """Show the scan as complete in the progress datasets"""
+        if self.enable_progress:
+            self._set_progress('completed', 1.0)
+            self._set_progress('eta', 0.0)
+            self._set_progress('rpc_backlog', 0)
+
+    # private: for scan.py
+    def _set_progress(self, key, value):
+        self.set_dataset('current_scan.progress.{0}'.format(key), value, broadcast=True)
 
     # interface: for child class (optional)
     @rpc(flags={"async"})
     def _calculate_all(self, i_point, point):
         # for every registered calculation....
         for calculation in self.calculations:
-            for entry in self._model_registry:
-                # models that are registered for the calculation...
-                if entry['calculation'] and entry['calculation'] == calculation:
-                    # entry = self._model_registry['calculations'][calculation]
-
-                    # perform the calculation
-                    if self.before_calculate(i_point, point, calculation):
-                        self._calculate(i_point, point, calculation, entry)
+            # models that are registered for the calculation...
+            for entry in self._calculation_models.get(calculation, ()):
+                # perform the calculation
+                if self.before_calculate(i_point, point, calculation):
+                    self._calculate(i_point, point, calculation, entry)
 
     # interface: for child class
     def _get_fit_guess(self, fit_function):
@@ -922,7 +2404,9 @@ class Scan(HasEnvironment):
 
                         # perform the fit
                         self._logger.debug('performing fit on model \'{0}\''.format(entry['name']))
-                        fit_performed, valid, main_fit_saved, errormsg = self._fit(entry, save, use_mirror, dimension, i)
+                        with self._timer.time('fit_data'):
+                            fit_performed, valid, main_fit_saved, errormsg = self._fit(entry, save, use_mirror,
+                                                                                       dimension, i)
 
                         entry['fit_valid'] = valid
 
@@ -948,6 +2432,10 @@ class Scan(HasEnvironment):
     def _write_datasets(self, entry):
         pass
 
+    # interface: for extensions (required)
+    def _rebroadcast_datasets(self, entry):
+        pass
+
     # interface: for extensions (required)
     def _load_points(self):
         pass
@@ -1209,7 +2697,7 @@ class Scan(HasEnvironment):
         :param resume: Set to True if the scan is being resumed after being paused and to False if the scan is being
                        started for the first time.
         """
-        if self.enable_timing:
+        if self.enable_timing or self._instrumented:
             self._timeit('compile')
         self._logger.debug("running scan on core device")
         self.lab_before_scan_core()
@@ -1217,6 +2705,15 @@ class Scan(HasEnvironment):
         self.after_scan_core()
         self.lab_after_scan_core()
 
+    # private: for scan.py
+    def _run_core(self, resume=False):
+        """Run _run_scan_core() on the core device, reusing a previously compiled kernel when possible"""
+        if self.enable_compile_cache:
+            classes = [type(entry['model']) for entry in self._model_registry]
+            kernel_cache.run(self.core, type(self)._run_scan_core, (self, resume), classes=classes)
+        else:
+            self._run_scan_core(resume)
+
     # helper method: for scan.py or child class
     def _run_scan_host(self, resume=False):
         """Helper Method:
@@ -1233,18 +2730,14 @@ class Scan(HasEnvironment):
 
     # helper: for child class
     def simulate_measure(self, point, measurement):
-        for entry in self._model_registry:
-            if entry['measurement'] and entry['measurement'] == measurement:
-                model = entry['model']
-                #model = self._model_registry['measurements'][measurement]['model']
-                if hasattr(model, '_simulation_args'):
-                    simulation_args = model._simulation_args
-                else:
-                    simulation_args = model.simulation_args
-                # self._logger.debug('simulating measurement')
-                # self._logger.debug('simulation_args = {0}'.format(simulation_args))
-                value = model.simulate(point, self.noise_level, simulation_args)
-                return value
+        for entry in self._measurement_models.get(measurement, ()):
+            model = entry['model']
+            if hasattr(model, '_simulation_args'):
+                simulation_args = model._simulation_args
+            else:
+                simulation_args = model.simulation_args
+            value = model.simulate(point, self.noise_level, simulation_args)
+            return value
         return None
 
     # -------------------- Callbacks --------------------
@@ -1259,7 +2752,7 @@ class Scan(HasEnvironment):
         but before datasets have been initialized.
 
         Notes
-            - Will be re-run when a scan is resumed after being paused.
+            - Will be re-run when a scan is resumed after being paused, unless :code:`enable_fast_resume` is set.
             - Always runs on the host.
         """
         pass
@@ -1275,7 +2768,7 @@ class Scan(HasEnvironment):
 
         Notes
             - Runs after the :code:`prepare_scan()` callback.
-            - Will be re-run when a scan is resumed after being paused.
+            - Will be re-run when a scan is resumed after being paused, unless :code:`enable_fast_resume` is set.
             - Always runs on the host.
 
         :returns: None
@@ -1359,6 +2852,30 @@ class Scan(HasEnvironment):
         """
         return point
 
+    # callback: for child class
+    @portable
+    def prepare_next_point(self, i_point, point):
+        """User callback
+
+        Allows the work of :code:`set_scan_point()` to be done ahead of time, e.g. computing DDS tuning words or
+        staging device settings, so that :code:`set_scan_point()` only needs to apply them.  Runs after the last
+        measurement at the previous scan point, before the data of the previous scan point is sent to the host,
+        while the core still has slack.  The first scan point of each pass, the first scan point executed after the
+        scan resumes, and the first scan point of each chunk of scan points (see :code:`point_chunk_size`) are
+        instead prepared at the start of the scan point itself.
+
+        :param i_point: Index of the scan point that will be executed next.
+        :param point: Value of the scan point that will be executed next, before :code:`offset_point()` is applied.
+
+        Notes
+            - Runs on the host or the core device.
+            - Runs once before :code:`set_scan_point()` is called for the same scan point.  A scan point that was
+              prepared before the scan paused is prepared again when the scan resumes.
+            - Runs after the :code:`after_measure()` callbacks of the previous scan point and before its
+              :code:`after_scan_point()` callback.
+        """
+        pass
+
     # callback: for child class
     @portable
     def set_scan_point(self, i_point, point):
@@ -1698,21 +3215,17 @@ class Scan1D(Scan):
         self._i_point = np.int64(0)
 
     def _load_points(self):
-        # grab the points
+        # grab the points (ARTIQ scan arguments are converted directly to arrays)
         if self._points is None:
-            points = list(self.get_scan_points())
+            points = scan_values(self.get_scan_points())
         else:
-            points = list(self._points)
+            points = scan_values(self._points)
 
         # warmup points
         if self._warmup_points is None:
-            warmup_points = self.get_warmup_points()
+            warmup_points = scan_values(self.get_warmup_points())
         else:
-            warmup_points = list(self._warmup_points)
-        warmup_points = [p for p in warmup_points]
-
-        # this turn's ARTIQ scan arguments into lists
-        points = [p for p in points]
+            warmup_points = scan_values(self._warmup_points)
 
         # total number of scan points
         self.npoints = np.int32(len(points))
@@ -1730,15 +3243,20 @@ class Scan1D(Scan):
         # initialize 1D data structures...
 
         # 1D array of scan points (these are saved to the stats.points dataset)
-        self._points = np.array(points, dtype=np.float64)
+        self._points = points
 
         # flattened 1D array of scan points (these are looped over on the core)
-        self._points_flat = np.array(points, dtype=np.float64)
-        self._warmup_points = np.array(warmup_points, dtype=np.float64)
+        self._points_flat = points.copy()
+        self._warmup_points = warmup_points
 
         # flattened 1D array of point indices as tuples
         # (these are used on the core to map the flat idx index to the 2D point index)
-        self._i_points = np.array(range(self.npoints), dtype=np.int64)
+        self._i_points = np.arange(self.npoints, dtype=np.int64)
+
+        # execute scan points in the requested order
+        order = self._load_point_order(self.npoints)
+        self._points_flat = self._points_flat[order]
+        self._i_points = self._i_points[order]
 
     def _mutate_plot(self, entry, i_point, point, mean):
         model = entry['model']
@@ -1787,6 +3305,20 @@ class Scan1D(Scan):
         entry['model'].write_datasets(dimension=0)
         entry['datasets_written'] = True
 
+    def _rebroadcast_datasets(self, entry):
+        entry['model'].write_datasets(dimension=0, which='mirror')
+
+    @portable
+    def _load_window(self, start):
+        # rpc to host
+        points = self._get_point_chunk(start)
+        i_points = self._get_i_point_chunk(start)
+        for i in range(len(points)):
+            self._window_points[i] = points[i]
+            self._window_i_points[i] = i_points[i]
+        self._window_start = start
+        self._window_end = start + len(points)
+
 
 class Scan2D(Scan):
     """Extension of the :class:`~scan_framework.scans.scan.Scan` class for 2D scans.  All 2D scans should inherit from
@@ -1811,12 +3343,11 @@ class Scan2D(Scan):
             warmup_points = self.get_warmup_points()
         else:
             warmup_points = list(self._warmup_points)
-        warmup_points = [p for p in warmup_points]
-        self._warmup_points = np.array(warmup_points, dtype=np.float64)
+        self._warmup_points = np.array(list(warmup_points), dtype=np.float64)
         self.nwarmup_points = np.int32(len(warmup_points))
 
-        # this turn's ARTIQ scan arguments into lists
-        points = [p for p in points[0]], [p for p in points[1]]
+        # this turn's ARTIQ scan arguments into arrays
+        points = scan_values(points[0]), scan_values(points[1])
 
         # total number of scan points over both dimensions
         self.npoints = np.int32(len(points[0]) * len(points[1]))
@@ -1830,21 +3361,18 @@ class Scan2D(Scan):
 
         # initialize 2D data structures...
 
-        # 2D array of scan points (these are saved to the stats.points dataset)
-        self._points = np.array([
-            [[x1, x2] for x2 in points[1]] for x1 in points[0]
-        ], dtype=np.float64)
-
-        # flattened 1D array of scan points (these are looped over on the core)
-        self._points_flat = np.array([
-            [x1, x2] for x1 in points[0] for x2 in points[1]
-        ], dtype=np.float64)
-
-        # flattened 1D array of point indices as tuples
+        # 2D array of scan points (these are saved to the stats.points dataset),
+        # flattened 1D array of scan points (these are looped over on the core),
+        # and flattened 1D array of point indices as tuples
         # (these are used on the core to map the flat idx index to the 2D point index)
-        self._i_points = np.array([
-            (i1, i2) for i1 in range(self._shape[0]) for i2 in range(self._shape[1])
-        ], dtype=np.int64)
+        self._points, self._points_flat, self._i_points = grid_points(points[0], points[1])
+
+        # execute dimension 0 scan points in the requested order.  each dimension 1 sub-scan is always executed
+        # sequentially so that its fit is performed once all of its scan points have completed.
+        order = self._load_point_order(self._shape[0])
+        order = (order[:, np.newaxis] * self._shape[1] + np.arange(self._shape[1])).flatten()
+        self._points_flat = self._points_flat[order]
+        self._i_points = self._i_points[order]
 
     def _mutate_plot(self, entry, i_point, point, mean):
         """Mutates datasets for dimension 0 plots and dimension 1 plots"""
@@ -1877,11 +3405,9 @@ class Scan2D(Scan):
                 # perform a fit over the dimension 1 data
                 fit_performed = False
                 try:
-                    fit_performed, fit_valid, saved, errormsg = self._fit(entry,
-                                                                              save=None,
-                                                                              use_mirror=None,
-                                                                              dimension=1,
-                                                                              i=i_point[0])
+                    with self._timer.time('fit_data'):
+                        fit_performed, fit_valid, saved, errormsg = self._fit(entry, save=None, use_mirror=None,
+                                                                              dimension=1, i=i_point[0])
 
                 # handle cases when fit fails to converge so the scan doesn't just halt entirely with an
                 # unhandeled error
@@ -1904,12 +3430,11 @@ class Scan2D(Scan):
                     param, error = self.calculate_dim0(dim1_model)
 
                     # find the dimension 0 model
-                    for entry2 in self._model_registry:
-                        if entry2['dimension'] == 0:
-                            dim0_model = entry2['model']
+                    for entry2 in self._dimension_models.get(0, ()):
+                        dim0_model = entry2['model']
 
-                            # mutate the dimension 0 plot
-                            dim0_model.mutate_plot(i_point=i_point, x=point[0], y=param, error=error, dim=0)
+                        # mutate the dimension 0 plot
+                        dim0_model.mutate_plot(i_point=i_point, x=point[0], y=param, error=error, dim=0)
 
             # --- Redraw Plots ---
             # tell the current_scan applet to redraw itself
@@ -1982,6 +3507,23 @@ class Scan2D(Scan):
         entry['model'].write_datasets(dimension=entry['dimension'])
         entry['datasets_written'] = True
 
+    def _rebroadcast_datasets(self, entry):
+        entry['model'].write_datasets(dimension=entry['dimension'], which='mirror')
+
+    @portable
+    def _load_window(self, start):
+        # rpc to host
+        points = self._get_point_chunk(start)
+        i_points = self._get_i_point_chunk(start)
+        n = len(points) // 2
+        for i in range(n):
+            self._window_points[i][0] = points[2 * i]
+            self._window_points[i][1] = points[2 * i + 1]
+            self._window_i_points[i][0] = i_points[2 * i]
+            self._window_i_points[i][1] = i_points[2 * i + 1]
+        self._window_start = start
+        self._window_end = start + n
+
 
 # NOTE: MetaScan has been deprecated by Scan2D
 class MetaScan(Scan1D):
@@ -2004,6 +3546,8 @@ class MetaScan(Scan1D):
                 raise Exception("Cannot register the scan named '{0}' the name has already been used.  "
                                 "You must pick a unique name to register this scan under.".format(name))
             scan.enable_pausing = enable_pausing
+            # progress is reported by the top level scan
+            scan.enable_progress = False
             self.scan_registry[name] = scan
             self.logger.debug('registered scan \'{0}\' of type \'{1}\''.format(name, scan.__class__.__name__))
         else:
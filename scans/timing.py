@@ -0,0 +1,167 @@
+# Timing of the phases of a scan (see Scan.enable_instrumentation).
+#
+# Phases that run on the host are timed with the host clock.  Phases that run on the core device are timed with the
+# RTIO counter of the core, buffered on the core, and sent to the host in batches.  All durations are in seconds.
+#
+# A Tracer additionally keeps the start time of each execution of each phase so the timeline of a scan can be viewed
+# in a trace viewer (e.g. chrome://tracing or https://ui.perfetto.dev).
+from contextlib import contextmanager
+from time import perf_counter
+import threading
+import json
+import numpy as np
+
+# phases timed on the core device, identified by their index in CORE_PHASES
+PHASE_BEFORE_PASS = 0
+PHASE_SET_SCAN_POINT = 1
+PHASE_MEASURE = 2
+PHASE_SCAN_POINT = 3
+PHASE_WARMUP = 4
+CORE_PHASES = ['before_pass', 'set_scan_point', 'do_measure', 'scan_point', 'warmup']
+
+# percentiles reported for each phase
+PERCENTILES = [50, 90, 99]
+
+# edges of the histogram bins of each phase: 4 bins per decade from 1 us to 100 s
+BIN_EDGES = np.logspace(-6, 2, 33)
+
+
+class PhaseTimer:
+    """Records the duration of each execution of each phase of a scan.
+
+    :param enabled: Set to False to ignore all durations passed to the timer.
+    :param tracer: Optional Tracer that is passed each execution of each phase.
+    """
+
+    def __init__(self, enabled=True, tracer=None):
+        self.enabled = enabled
+        self.tracer = tracer
+        self.durations = {}
+        self._lock = threading.Lock()
+
+    def _add(self, phase, duration):
+        with self._lock:
+            self.durations.setdefault(phase, []).append(duration)
+
+    def add(self, phase, duration):
+        """Record a single execution of a phase on the host that took :code:`duration` seconds and has just ended"""
+        if self.enabled:
+            self._add(phase, duration)
+            if self.tracer is not None:
+                self.tracer.add_host(phase, perf_counter() - duration, duration)
+
+    def add_core(self, phase, start, duration):
+        """Record a single execution of a phase on the core that started at time :code:`start` of the core's clock and
+        took :code:`duration` seconds"""
+        if self.enabled:
+            self._add(phase, duration)
+            if self.tracer is not None:
+                self.tracer.add_core(phase, start, duration)
+
+    def sync(self, core_time):
+        """Relate the core's clock to the host's clock.  Called when the host receives a message from the core that was
+        sent at time :code:`core_time` of the core's clock."""
+        if self.enabled and self.tracer is not None:
+            self.tracer.sync(core_time, perf_counter())
+
+    @contextmanager
+    def time(self, phase):
+        """Context manager that records the duration of the code it wraps as a single execution of a phase"""
+        if not self.enabled:
+            yield
+            return
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, perf_counter() - t0)
+
+    def stats(self, phase):
+        """Returns the number of executions, total, mean, min, percentiles (see PERCENTILES), and max of the durations
+        of a phase as a single array."""
+        d = np.array(self.durations[phase], dtype=np.float64)
+        return np.concatenate([[len(d), d.sum(), d.mean(), d.min()], np.percentile(d, PERCENTILES), [d.max()]])
+
+    def histogram(self, phase):
+        """Returns the number of executions of a phase with a duration in each bin of BIN_EDGES.  Durations outside of
+        the bins are counted in the first or last bin."""
+        d = np.clip(self.durations[phase], BIN_EDGES[0], BIN_EDGES[-1])
+        return np.histogram(d, bins=BIN_EDGES)[0].astype(np.int32)
+
+    def stats_columns(self):
+        """Returns a label for each value returned by stats()"""
+        return ['count', 'total', 'mean', 'min'] + ['p{0}'.format(p) for p in PERCENTILES] + ['max']
+
+    def summary(self):
+        """Returns one line of text per phase summarizing its durations, sorted by the total time spent in each
+        phase."""
+        lines = []
+        phases = sorted(self.durations, key=lambda p: -sum(self.durations[p]))
+        for phase in phases:
+            n, total, mean, min_, p50, p90, p99, max_ = self.stats(phase)
+            lines.append('{0}: n={1:d} total={2:.3g} s mean={3:.3g} s p50={4:.3g} s p99={5:.3g} s max={6:.3g} s'.format(
+                phase, int(n), total, mean, p50, p99, max_))
+        return lines
+
+
+class Tracer:
+    """Timeline of the phases of a scan that is written to a file in the Chrome Trace Event Format.
+
+    The timeline has one track for the phases that run on the core device and one track for each thread of the host
+    that runs phases of the scan (e.g. the thread that receives RPCs and the host worker thread).
+    """
+
+    def __init__(self):
+        self.host_events = []
+        self.core_events = []
+        self.offset = None
+        self._lock = threading.Lock()
+
+    def add_host(self, phase, start, duration):
+        """Add an execution of a phase on the host that started at :code:`start` of the host's clock"""
+        with self._lock:
+            self.host_events.append((phase, threading.current_thread().name, start, duration))
+
+    def add_core(self, phase, start, duration):
+        """Add an execution of a phase on the core that started at :code:`start` of the core's clock"""
+        with self._lock:
+            self.core_events.append((phase, start, duration))
+
+    def sync(self, core_time, host_time):
+        """Relate the core's clock to the host's clock.  Messages from the core arrive some time after they are sent, so
+        the smallest difference between the clocks seen so far is the best estimate of the offset between the clocks."""
+        offset = host_time - core_time
+        if self.offset is None or offset < self.offset:
+            self.offset = offset
+
+    def events(self):
+        """Returns the timeline as a list of events in the Chrome Trace Event Format"""
+        offset = self.offset if self.offset is not None else 0.0
+        core_events = [(phase, start + offset, duration) for phase, start, duration in self.core_events]
+        starts = [e[2] for e in self.host_events] + [e[1] for e in core_events]
+        t0 = min(starts) if starts else 0.0
+
+        def us(t):
+            return (t - t0) * 1e6
+
+        events = [
+            {'name': 'process_name', 'ph': 'M', 'pid': 0, 'args': {'name': 'core'}},
+            {'name': 'process_name', 'ph': 'M', 'pid': 1, 'args': {'name': 'host'}},
+        ]
+        for phase, start, duration in core_events:
+            events.append({'name': phase, 'ph': 'X', 'pid': 0, 'tid': 0, 'ts': us(start), 'dur': duration * 1e6})
+
+        threads = {}
+        for phase, thread, start, duration in self.host_events:
+            if thread not in threads:
+                threads[thread] = len(threads)
+                events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': threads[thread],
+                               'args': {'name': thread}})
+            events.append({'name': phase, 'ph': 'X', 'pid': 1, 'tid': threads[thread], 'ts': us(start),
+                           'dur': duration * 1e6})
+        return events
+
+    def write(self, path):
+        """Write the timeline to a JSON file that can be opened in a trace viewer"""
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events(), 'displayTimeUnit': 'ms'}, f)
@@ -1,5 +1,6 @@
 from artiq.experiment import *
 from artiq.experiment import *
+from scan_framework.scans.compile_cache import kernel_cache
 import logging
 
 
@@ -120,6 +121,12 @@ class CoreScanRunner(HasEnvironment):
             self.scan._analyzed = False
             self.scan._analyze()
 
+    def run_and_fit_cached(self):
+        """Executes run_and_fit(), reusing the kernel compiled for a previous run when neither the kernel code nor any
+        value embedded in the kernel has changed since that run."""
+        classes = [type(self.scan)] + [type(entry['model']) for entry in self.scan._model_registry]
+        kernel_cache.run(self.scan.core, type(self).run_and_fit, (self,), classes=classes)
+
     # --- helpers ---
     def make_dynamic(self, attributes):
         """Transforms scan attributes into dynamic variables that an be changed on the core"""
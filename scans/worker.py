@@ -0,0 +1,69 @@
+# Background thread that performs host side work of a scan (e.g. model updates) off of the RPC receive path.
+#
+# RPCs from the core device are served by the main thread of the experiment.  When the host takes longer to process
+# an RPC than the core takes to collect the data for the next scan point, the core stalls until the RPC has been
+# handled.  With a worker, the RPC handler only places the data on a bounded queue and returns immediately, while
+# the worker thread processes the queued tasks in the order they were submitted.
+import threading
+import queue
+
+
+class HostWorker:
+    """Executes tasks submitted by the main thread in order on a single background thread.
+
+    All tasks run while holding :code:`lock`.  Code running in the main thread that must not run concurrently with a
+    task (e.g. code that communicates with the ARTIQ master) should also hold the lock.
+
+    :param maxsize: Maximum number of tasks waiting in the queue.  :code:`submit()` blocks while the queue is full.
+    :param name: Name of the worker thread.
+    """
+
+    def __init__(self, maxsize=100, name='scan_host_worker'):
+        self.lock = threading.RLock()
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                # stop the worker
+                if task is None:
+                    return
+
+                # tasks submitted after a task has failed are skipped, the error is raised by drain()
+                if self._error is None:
+                    func, args, kwargs = task
+                    with self.lock:
+                        func(*args, **kwargs)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    @property
+    def backlog(self):
+        """Number of tasks waiting in the queue."""
+        return self._queue.qsize()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue :code:`func(*args, **kwargs)` for execution on the worker thread.  Blocks while the queue is full."""
+        if not self._thread.is_alive():
+            raise RuntimeError('The host worker has been stopped.')
+        self._queue.put((func, args, kwargs))
+
+    def drain(self):
+        """Block until all submitted tasks have been executed.  Re-raises the first exception raised by a task."""
+        self._queue.join()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def stop(self):
+        """Execute all submitted tasks and stop the worker thread.  Exceptions raised by tasks are not re-raised, call
+        :code:`drain()` first to handle them."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
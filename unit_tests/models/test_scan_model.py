@@ -1,8 +1,11 @@
 from scan_framework.models.scan_model import *
 from scan_framework.scans.scan import Scan
+from scan_framework.scans.raw_store import RawStore
 import scan_framework.analysis.curvefits as curvefits
 from scan_framework.unit_tests.test_case import *
 import math
+import os
+import tempfile
 import numpy as np
 
 
@@ -44,6 +47,154 @@ class TestScanModel(TestCase):
         self.assertEqual(points[1], 2)
         self.assertEqual(mean[1], 4)
 
+    def test_mutate_repeats(self):
+        self.scan.enable_adaptive_repeats = True
+        self.model.init_datasets(shape=100, plot_shape=100, points=np.linspace(0, 1, 100), dimension=0)
+        self.model.mutate_datasets(i_point=0, point=1, counts=[2, 3])
+        self.model.mutate_repeats(i_point=0, nrepeats=2)
+        mean = self.model.get('stats.mean')
+        repeats = self.model.get('stats.repeats')
+
+        # tests
+        self.assertEqual(mean[0], 2.5)
+        self.assertEqual(repeats[0], 2)
+        self.assertEqual(repeats[1], 0)
+
+    def test_skipped_repeats(self):
+        self.scan.enable_adaptive_repeats = True
+        self.model.init_datasets(shape=100, plot_shape=100, points=np.linspace(0, 1, 100), dimension=0)
+        self.model.mutate_datasets(i_point=0, point=1, counts=[2, 3, np.nan])
+        counts = self.model.stat_model.get('counts')
+
+        # tests
+        self.assertEqual(self.model.get('stats.mean')[0], 2.5)
+        self.assertEqual(list(counts[0][:2]), [2, 3])
+        self.assertTrue(math.isnan(counts[0][2]))
+
+    def test_rebroadcast(self):
+        self.model.init_datasets(shape=100, plot_shape=100, points=np.linspace(0, 1, 100), dimension=0)
+        self.model.mutate_datasets(i_point=0, point=1, counts=[2, 3, 4])
+
+        # resume
+        self.model.write_datasets(dimension=0, which='mirror')
+
+        # record the datasets that are set or mutated
+        keys = []
+        stat_model = self.model.stat_model
+        set_dataset, mutate_dataset = stat_model.set_dataset, stat_model.mutate_dataset
+        stat_model.set_dataset = lambda key, *args, **kwargs: keys.append(key) or set_dataset(key, *args, **kwargs)
+        stat_model.mutate_dataset = lambda key, *args: keys.append(key) or mutate_dataset(key, *args)
+        self.model.mutate_datasets(i_point=1, point=2, counts=[3, 4, 5])
+
+        # tests
+        self.assertEqual(stat_model.get('mean', mirror=True)[1], 4)
+        self.assertEqual(list(stat_model.get('counts')[1]), [3, 4, 5])
+        self.assertIn(stat_model.key('counts'), keys)
+        self.assertNotIn(stat_model.key('counts', mirror=True), keys)
+
+        # scan completes
+        del keys[:]
+        self.model.write_mirror()
+        self.assertEqual(keys, [stat_model.key('counts', mirror=True)])
+        self.assertEqual(list(stat_model.get('counts', mirror=True)[1]), [3, 4, 5])
+
+    def test_mutate_pass(self):
+        self.scan.npasses = 2
+        self.model.attach(self.scan)
+        self.model.init_datasets(shape=100, plot_shape=100, points=np.linspace(0, 1, 100), dimension=0)
+        self.model.mutate_datasets_pass(i_point=0, point=1, offset=0, counts=[2, 3, 4])
+        self.model.mutate_datasets_pass(i_point=0, point=1, offset=3, counts=[5, 6, 7])
+        counts = self.model.stat_model.get('counts')
+
+        # tests
+        self.assertEqual(list(counts[0]), [2, 3, 4, 5, 6, 7])
+        self.assertAlmostEqual(self.model.get('stats.mean')[0], 4.5)
+        self.assertAlmostEqual(self.model.get('stats.error')[0], np.std([2, 3, 4, 5, 6, 7]) / np.sqrt(6))
+
+    def test_mutate_pass_again(self):
+        self.scan.npasses = 2
+        self.model.attach(self.scan)
+        self.model.init_datasets(shape=100, plot_shape=100, points=np.linspace(0, 1, 100), dimension=0)
+        self.model.mutate_datasets_pass(i_point=0, point=1, offset=0, counts=[2, 3, 4])
+        self.model.mutate_datasets_pass(i_point=0, point=1, offset=3, counts=[5, 6, 7])
+
+        # the second pass is measured again after the scan is rewound
+        self.model.mutate_datasets_pass(i_point=0, point=1, offset=3, counts=[8, 8, 8])
+        self.assertAlmostEqual(self.model.get('stats.mean')[0], 5.5)
+
+    def test_raw_data_last_pass(self):
+        self.scan.npasses = 2
+        self.model.raw_data = 'last_pass'
+        self.model.attach(self.scan)
+        self.model.init_datasets(shape=100, plot_shape=100, points=np.linspace(0, 1, 100), dimension=0)
+        self.model.mutate_datasets(i_point=0, point=1, counts=[2, 3, 4, 5, 6, 7])
+        counts = self.model.stat_model.get('counts')
+
+        # tests
+        self.assertEqual(counts.shape, (100, 3))
+        self.assertEqual(list(counts[0]), [5, 6, 7])
+        self.assertAlmostEqual(self.model.get('stats.mean')[0], 4.5)
+
+    def test_raw_data_last_pass_offset(self):
+        self.scan.npasses = 2
+        self.model.raw_data = 'last_pass'
+        self.model.attach(self.scan)
+        self.model.init_datasets(shape=100, plot_shape=100, points=np.linspace(0, 1, 100), dimension=0)
+        self.model.mutate_datasets(i_point=0, point=1, counts=[2, 3, 4, 5, 6, 7], offset=3)
+        self.model.mutate_datasets(i_point=1, point=2, counts=[2, 3, 4, 5], offset=3)
+        counts = self.model.stat_model.get('counts')
+
+        # tests
+        self.assertEqual(list(counts[0]), [5, 6, 7])
+        self.assertEqual(list(counts[1]), [5, 0, 0])
+
+    def test_raw_data_last_pass_skipped_repeats(self):
+        self.scan.npasses = 2
+        self.scan.enable_adaptive_repeats = True
+        self.model.raw_data = 'last_pass'
+        self.model.attach(self.scan)
+        self.model.init_datasets(shape=100, plot_shape=100, points=np.linspace(0, 1, 100), dimension=0)
+        self.model.mutate_datasets(i_point=0, point=1, counts=[2, 3, 4, 5], offset=3)
+        counts = self.model.stat_model.get('counts')
+
+        # tests
+        self.assertEqual(counts[0][0], 5)
+        self.assertTrue(math.isnan(counts[0][1]))
+        self.assertTrue(math.isnan(counts[0][2]))
+
+    def test_raw_data_summary(self):
+        self.scan.npasses = 2
+        self.model.raw_data = 'summary'
+        self.model.attach(self.scan)
+        self.model.init_datasets(shape=100, plot_shape=100, points=np.linspace(0, 1, 100), dimension=0)
+        self.model.mutate_datasets_pass(i_point=0, point=1, offset=0, counts=[2, 3, 4], all_counts=[2, 3, 4])
+        self.model.mutate_datasets_pass(i_point=0, point=1, offset=3, counts=[5, 6, 7],
+                                        all_counts=[2, 3, 4, 5, 6, 7])
+
+        # tests
+        self.assertIsNone(self.model.stat_model.counts)
+        self.assertEqual(self.model.get('stats.nvalues')[0], 6)
+        self.assertEqual(self.model.get('stats.sum')[0], 27)
+        self.assertAlmostEqual(self.model.get('stats.mean')[0], 4.5)
+
+    def test_counts_in_raw_store(self):
+        with tempfile.TemporaryDirectory() as dir:
+            self.scan._raw_store = RawStore(os.path.join(dir, 'scan.raw'))
+            self.model.init_datasets(shape=100, plot_shape=100, points=np.linspace(0, 1, 100), dimension=0)
+            self.model.mutate_datasets(i_point=1, point=2, counts=[3, 4, 5])
+            self.scan._raw_store.flush()
+
+            # tests
+            self.assertEqual(self.model.get('stats.mean')[1], 4)
+            self.assertEqual(self.model.get('stats.counts_key'), 'unit_tests.counts')
+            counts = RawStore(self.model.get('stats.counts_file'), mode='r').array('unit_tests.counts')
+            self.assertEqual(list(counts[1]), [3, 4, 5])
+
+            # a summary of the raw values is published instead of the counts dataset
+            self.assertEqual(self.model.get('stats.nvalues')[1], 3)
+            self.assertEqual(self.model.get('stats.sum')[1], 12)
+            self.assertEqual(self.model.get('stats.sum_sq')[1], 50)
+
     def test_fit(self):
         self.model.init_datasets(shape=100, plot_shape=100, points=np.linspace(0, 1, 100), dimension=0)
 
@@ -0,0 +1,50 @@
+# benchmarks the setup of scan points and storage (scans/grid.py and Scan._init_storage())
+#
+# Compares the time to build the scan points and the counts storage of a 2D scan with nested Python loops, as was done
+# before scans/grid.py, against the NumPy implementation.  Run with:
+#
+#     python -m scan_framework.unit_tests.scans.benchmark_grid
+from time import perf_counter
+import numpy as np
+from scan_framework.scans.grid import scan_values, grid_points
+
+NREPEATS = 1000
+
+
+def setup_loops(n):
+    values = [x for x in np.linspace(0, 1, n)]
+    points = np.array([[[x1, x2] for x2 in values] for x1 in values], dtype=np.float64)
+    points_flat = np.array([[x1, x2] for x1 in values for x2 in values], dtype=np.float64)
+    i_points = np.array([(i1, i2) for i1 in range(n) for i2 in range(n)], dtype=np.int64)
+    data = np.array([[[np.int32(0) for k in range(NREPEATS)] for j in range(1)] for i in range(n * n)],
+                    dtype=np.int32)
+    return points, points_flat, i_points, data
+
+
+def setup_numpy(n):
+    values = scan_values(np.linspace(0, 1, n))
+    points, points_flat, i_points = grid_points(values, values)
+    data = np.zeros((n * n, 1, NREPEATS), dtype=np.int32)
+    return points, points_flat, i_points, data
+
+
+def best_time(func, n, runs=3):
+    times = []
+    for _ in range(runs):
+        t0 = perf_counter()
+        func(n)
+        times.append(perf_counter() - t0)
+    return min(times)
+
+
+def main(sizes=(10, 50, 100, 200)):
+    print('{0:>10} {1:>12} {2:>12} {3:>9}'.format('grid', 'loops (s)', 'numpy (s)', 'speedup'))
+    for n in sizes:
+        t_loops = best_time(setup_loops, n, runs=1 if n > 100 else 3)
+        t_numpy = best_time(setup_numpy, n)
+        print('{0:>10} {1:>12.4f} {2:>12.4f} {3:>8.0f}x'.format('{0}x{0}'.format(n), t_loops, t_numpy,
+                                                                 t_loops / t_numpy))
+
+
+if __name__ == '__main__':
+    main()
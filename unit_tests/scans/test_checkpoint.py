@@ -0,0 +1,88 @@
+# tests scans/checkpoint.py
+import os
+import tempfile
+import unittest
+import numpy as np
+from scan_framework.scans.checkpoint import Checkpoint, checkpoint_progress
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'scan.checkpoint.h5')
+
+        # 4 scan points executed in reverse order, 1 measurement, 2 passes of 3 repeats
+        self.points = np.array([0.3, 0.2, 0.1, 0.0])
+        self.i_points = np.array([3, 2, 1, 0])
+        self.data = np.zeros((4, 1, 6), dtype=np.int32)
+        self.repeats = np.full((4, 2), 3, dtype=np.int32)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def create(self):
+        checkpoint = Checkpoint(self.path)
+        checkpoint.create(self.points, self.i_points, self.data, self.repeats, ['main'],
+                          attrs={'npasses': 2, 'nrepeats': 3})
+        return checkpoint
+
+    def test_roundtrip(self):
+        checkpoint = self.create()
+        checkpoint.update(3, 0, [[1, 2, 3, 0, 0, 0]], [3, 3])
+        checkpoint.write()
+
+        state = Checkpoint(self.path).load()
+        np.testing.assert_array_equal(state['points'], self.points)
+        np.testing.assert_array_equal(state['i_points'], self.i_points)
+        np.testing.assert_array_equal(state['data'][0], [[1, 2, 3, 0, 0, 0]])
+        np.testing.assert_array_equal(state['passes'], [1, 0, 0, 0])
+        self.assertEqual(state['attrs']['measurements'], ['main'])
+        self.assertEqual(state['attrs']['npasses'], 2)
+
+    def test_only_updated_points_are_written(self):
+        checkpoint = self.create()
+        checkpoint.update(3, 0, [[1, 1, 1, 0, 0, 0]], [3, 3])
+        checkpoint.write()
+        self.assertEqual(checkpoint.pending, 0)
+
+        # a second write leaves the first scan point as it was
+        checkpoint.update(2, 0, [[2, 2, 2, 0, 0, 0]], [3, 3])
+        self.assertEqual(checkpoint.pending, 1)
+        checkpoint.write()
+
+        state = Checkpoint(self.path).load()
+        np.testing.assert_array_equal(state['data'][:2, 0, :3], [[1, 1, 1], [2, 2, 2]])
+        np.testing.assert_array_equal(state['passes'], [1, 1, 0, 0])
+
+    def test_updates_are_not_written_until_write(self):
+        checkpoint = self.create()
+        checkpoint.update(3, 0, [[1, 1, 1, 0, 0, 0]], [3, 3])
+        state = Checkpoint(self.path).load()
+        np.testing.assert_array_equal(state['passes'], [0, 0, 0, 0])
+
+    def test_is_last(self):
+        checkpoint = self.create()
+        # scan points are executed in reverse order
+        self.assertTrue(checkpoint.is_last(0))
+        self.assertFalse(checkpoint.is_last(3))
+
+
+class TestCheckpointProgress(unittest.TestCase):
+
+    def test_not_started(self):
+        self.assertEqual(checkpoint_progress([0, 0, 0], 2), (0, 0))
+
+    def test_within_pass(self):
+        self.assertEqual(checkpoint_progress([1, 1, 0], 2), (0, 2))
+        self.assertEqual(checkpoint_progress([2, 1, 1], 2), (1, 1))
+
+    def test_pass_completed(self):
+        self.assertEqual(checkpoint_progress([1, 1, 1], 2), (1, 0))
+
+    def test_scan_completed(self):
+        self.assertEqual(checkpoint_progress([2, 2, 2], 2), (2, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
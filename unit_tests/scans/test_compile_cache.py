@@ -0,0 +1,118 @@
+# tests scans/compile_cache.py
+import unittest
+from artiq.experiment import *
+from scan_framework.scans.compile_cache import KernelCache
+
+
+class InstanceType:
+
+    def __init__(self, attributes):
+        self.attributes = dict((attr, None) for attr in attributes)
+
+
+class EmbeddingMap:
+
+    def __init__(self, objects, embedded=None):
+        self.object_forward_map = dict(enumerate(objects))
+        self.type_map = {}
+        if embedded is not None:
+            self.type_map = dict((type(obj), (InstanceType(embedded), None)) for obj in objects)
+
+
+class Comm:
+
+    def __init__(self):
+        self.served = 0
+
+    def load(self, library):
+        pass
+
+    def run(self):
+        pass
+
+    def serve(self, embedding_map, symbolizer, demangler):
+        self.served += 1
+
+
+class Core:
+
+    def __init__(self, embedded=None):
+        self.comm = Comm()
+        self.compiled = 0
+        self.embedded = embedded
+
+    def compile(self, function, args, kwargs):
+        self.compiled += 1
+        return EmbeddingMap([args[0]], self.embedded), b'', None, None
+
+    def run(self, function, args, kwargs):
+        self.compiled += 1
+        self.comm.served += 1
+
+
+class Experiment:
+
+    def __init__(self):
+        self.npoints = 10
+        self.host_only = 0
+
+    @kernel
+    def run(self, resume=False):
+        for i in range(self.npoints):
+            pass
+
+
+class TestKernelCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = KernelCache()
+        self.cache.supported = True
+        self.core = Core(embedded=['npoints'])
+        self.experiment = Experiment()
+
+    def run_kernel(self, resume=False):
+        self.cache.run(self.core, Experiment.run, (self.experiment, resume))
+
+    def test_reuse(self):
+        self.run_kernel()
+        self.run_kernel()
+        self.assertEqual(self.core.compiled, 1)
+        self.assertEqual(self.core.comm.served, 2)
+
+    def test_attribute_changed(self):
+        self.run_kernel()
+        self.experiment.npoints = 20
+        self.run_kernel()
+        self.assertEqual(self.core.compiled, 2)
+
+    def test_attribute_not_embedded_changed(self):
+        self.run_kernel()
+        self.experiment.host_only = 1
+        self.run_kernel()
+        self.assertEqual(self.core.compiled, 1)
+
+    def test_embedded_attributes_unknown(self):
+        # every attribute is compared when the compiler does not report the embedded attributes
+        self.core.embedded = None
+        self.run_kernel()
+        self.experiment.host_only = 1
+        self.run_kernel()
+        self.assertEqual(self.core.compiled, 2)
+        self.run_kernel()
+        self.assertEqual(self.core.compiled, 2)
+
+    def test_unsupported_artiq_version(self):
+        self.cache.supported = False
+        self.run_kernel()
+        self.run_kernel()
+        self.assertEqual(self.core.compiled, 2)
+        self.assertEqual(self.core.comm.served, 2)
+
+    def test_arguments_changed(self):
+        self.run_kernel(resume=False)
+        self.run_kernel(resume=True)
+        self.assertEqual(self.core.compiled, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
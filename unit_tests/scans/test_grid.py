@@ -0,0 +1,64 @@
+# tests scans/grid.py
+import unittest
+import numpy as np
+from scan_framework.scans.grid import scan_values, grid_points
+
+
+class RangeScan:
+    """Has the attributes of an ARTIQ RangeScan"""
+
+    def __init__(self, start, stop, npoints, randomize=False):
+        self.start = start
+        self.stop = stop
+        self.npoints = npoints
+        self.randomize = randomize
+        self.sequence = list(np.linspace(start, stop, npoints)[::-1] if randomize else np.linspace(start, stop, npoints))
+
+    def __iter__(self):
+        return iter(self.sequence)
+
+
+class TestScanValues(unittest.TestCase):
+
+    def test_list(self):
+        values = scan_values([1, 2, 3])
+        self.assertEqual(values.dtype, np.float64)
+        np.testing.assert_array_equal(values, [1, 2, 3])
+
+    def test_array_is_copied(self):
+        points = np.array([1.0, 2.0])
+        values = scan_values(points)
+        values += 1
+        np.testing.assert_array_equal(points, [1.0, 2.0])
+
+    def test_range_scan(self):
+        np.testing.assert_allclose(scan_values(RangeScan(0, 1, 5)), [0, 0.25, 0.5, 0.75, 1])
+        np.testing.assert_array_equal(scan_values(RangeScan(2, 3, 1)), [2])
+
+    def test_randomized_range_scan(self):
+        np.testing.assert_allclose(scan_values(RangeScan(0, 1, 3, randomize=True)), [1, 0.5, 0])
+
+    def test_iterable(self):
+        np.testing.assert_array_equal(scan_values(x for x in range(3)), [0, 1, 2])
+
+
+class TestGridPoints(unittest.TestCase):
+
+    def test_matches_nested_loops(self):
+        values0 = np.array([0.1, 0.2, 0.3])
+        values1 = np.array([1.0, 2.0])
+        points, points_flat, i_points = grid_points(values0, values1)
+
+        np.testing.assert_array_equal(points, [[[x0, x1] for x1 in values1] for x0 in values0])
+        np.testing.assert_array_equal(points_flat, [[x0, x1] for x0 in values0 for x1 in values1])
+        np.testing.assert_array_equal(i_points, [(i0, i1) for i0 in range(3) for i1 in range(2)])
+        self.assertEqual(i_points.dtype, np.int64)
+
+    def test_flat_points_are_not_shared(self):
+        points, points_flat, _ = grid_points([0.0, 1.0], [0.0])
+        points_flat += 1
+        np.testing.assert_array_equal(points[:, 0, 0], [0.0, 1.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
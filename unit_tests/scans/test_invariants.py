@@ -0,0 +1,75 @@
+# tests scans/invariants.py
+import unittest
+import numpy as np
+from artiq.experiment import *
+from scan_framework.scans.invariants import *
+
+
+class Model:
+
+    def __init__(self):
+        self.scale = 2.0
+        self.offset = 0.0
+
+    @portable
+    def transform(self, value):
+        self.offset += value
+        return self.scale * value
+
+
+class Experiment:
+    kernel_invariants = {'npoints'}
+
+    def __init__(self):
+        self.npoints = 10
+        self.nrepeats = 100
+        self.points = np.linspace(0, 1, 10)
+        self.data = np.zeros(10)
+        self.i_point = 0
+        self.name = 'experiment'
+        self.model = Model()
+
+    @kernel
+    def run(self):
+        for i in range(self.npoints):
+            self.i_point = i
+            for j in range(self.nrepeats):
+                self.data[i] += self.model.transform(self.points[i])
+        self.model.scale = 1.0
+
+    def host(self):
+        self.nrepeats = 1
+
+
+class OverridingExperiment(Experiment):
+
+    @kernel
+    def run(self):
+        super().run()
+
+
+class TestInferKernelInvariants(unittest.TestCase):
+
+    def test_infer_kernel_invariants(self):
+        experiment = Experiment()
+        inferred = dict((id(obj), attrs) for obj, attrs in infer_kernel_invariants([experiment, experiment.model]))
+        # read but never assigned to by kernel code, npoints is already an invariant
+        self.assertEqual(inferred[id(experiment)], {'nrepeats', 'points'})
+        # scale is assigned to by the kernel code of the experiment
+        self.assertNotIn(id(experiment.model), inferred)
+
+    def test_overridden_base_class_methods(self):
+        experiment = OverridingExperiment()
+        inferred = dict((id(obj), attrs) for obj, attrs in infer_kernel_invariants([experiment, experiment.model]))
+        # Experiment.run() is still analyzed since it can be called with super()
+        self.assertEqual(inferred[id(experiment)], {'nrepeats', 'points'})
+        self.assertNotIn(id(experiment.model), inferred)
+
+    def test_exclude(self):
+        experiment = Experiment()
+        inferred = dict((id(obj), attrs) for obj, attrs in infer_kernel_invariants([experiment], exclude=['points']))
+        self.assertEqual(inferred[id(experiment)], {'nrepeats'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+# tests scans/ordering.py
+import unittest
+from scan_framework.scans.ordering import *
+
+
+class TestPointOrders(unittest.TestCase):
+
+    def assertPermutation(self, order, npoints):
+        self.assertEqual(sorted(order.tolist()), list(range(npoints)))
+
+    def test_orders_are_permutations(self):
+        for name, order in point_orders.items():
+            for npoints in [0, 1, 2, 3, 7, 8, 9, 100]:
+                self.assertPermutation(order(npoints), npoints)
+
+    def test_bit_reversed_order(self):
+        self.assertEqual(bit_reversed_order(8).tolist(), [0, 4, 2, 6, 1, 5, 3, 7])
+        self.assertEqual(bit_reversed_order(5).tolist(), [0, 4, 2, 1, 3])
+
+    def test_coarse_to_fine_order(self):
+        self.assertEqual(coarse_to_fine_order(9).tolist(), [0, 8, 4, 2, 6, 1, 3, 5, 7])
+        # the last scan point is part of the first pass
+        self.assertEqual(coarse_to_fine_order(10).tolist(), [0, 8, 9, 4, 2, 6, 1, 3, 5, 7])
+
+    def test_stratified_order(self):
+        order = stratified_order(100, nstrata=10, seed=0)
+        # the first 10 points visit every stratum once
+        self.assertEqual(sorted(i // 10 for i in order[:10]), list(range(10)))
+        self.assertEqual(order.tolist(), stratified_order(100, nstrata=10, seed=0).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
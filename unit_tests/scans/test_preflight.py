@@ -0,0 +1,61 @@
+# tests scans/preflight.py
+import unittest
+from scan_framework.scans.preflight import estimate_resources, format_bytes
+
+
+class TestEstimateResources(unittest.TestCase):
+
+    def test_core_data(self):
+        r = estimate_resources(npoints=100, nmeasurements=2, npasses=3, nrepeats=10)
+        # data and repeats of every pass at every scan point
+        self.assertEqual(r['core_data_bytes'], 100 * (2 * 3 * 10 + 3) * 4)
+        self.assertEqual(r['core_points_bytes'], 100 * 16)
+
+        r = estimate_resources(npoints=100, nmeasurements=2, npasses=3, nrepeats=10, pass_only_data=True)
+        # data of the current pass and repeats of every pass at every scan point
+        self.assertEqual(r['core_data_bytes'], 100 * (2 * 10 + 3) * 4)
+
+        r = estimate_resources(npoints=100, nmeasurements=2, npasses=3, nrepeats=10, pass_only_data=True,
+                               mutate=False)
+        # data of every pass when no data is sent to the host
+        self.assertEqual(r['core_data_bytes'], 100 * (2 * 3 * 10 + 3) * 4)
+
+    def test_data_ring(self):
+        r = estimate_resources(npoints=100, nmeasurements=2, npasses=3, nrepeats=10, ring_size=4)
+        # the ring only holds the current pass
+        self.assertEqual(r['core_data_bytes'], 4 * (2 * 10 + 3) * 4)
+        self.assertEqual(r['core_points_bytes'], 100 * 16)
+
+    def test_incremental_stats(self):
+        r = estimate_resources(npoints=100, nmeasurements=2, npasses=3, nrepeats=10, incremental_stats=True)
+        r_all = estimate_resources(npoints=100, nmeasurements=2, npasses=3, nrepeats=10)
+        self.assertEqual(r_all['broadcast_bytes_per_point'] - r['broadcast_bytes_per_point'], (3 - 1) * 10 * 4)
+
+    def test_point_chunks(self):
+        r = estimate_resources(npoints=100, nmeasurements=1, npasses=2, nrepeats=1, point_dim=2, chunk_size=10,
+                               pausing=False, mutate=False)
+        self.assertEqual(r['core_points_bytes'], 10 * 2 * 16)
+        # two rpcs per chunk and pass
+        self.assertEqual(r['rpcs'], 2 * 2 * 10)
+
+    def test_host_copies(self):
+        r = estimate_resources(npoints=10, nmeasurements=1, npasses=1, nrepeats=100, nmodels=1)
+        # the scan, the model, and the counts dataset and its mirror
+        self.assertEqual(r['host_copies'], 4)
+        self.assertEqual(r['host_bytes'], 4 * 10 * 100 * 4)
+
+        r = estimate_resources(npoints=10, nmeasurements=1, npasses=1, nrepeats=100, nmodels=1, raw_store=True)
+        self.assertEqual(r['host_copies'], 0)
+
+    def test_rpcs(self):
+        r = estimate_resources(npoints=100, nmeasurements=1, npasses=2, nrepeats=1, batch_points=10,
+                               pause_check_points=50)
+        self.assertEqual(r['rpcs'], 20 + 4)
+
+    def test_format_bytes(self):
+        self.assertEqual(format_bytes(512), '512 B')
+        self.assertEqual(format_bytes(2500000), '2.5 MB')
+
+
+if __name__ == '__main__':
+    unittest.main()
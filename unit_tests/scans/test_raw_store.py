@@ -0,0 +1,69 @@
+# tests scans/raw_store.py
+import os
+import tempfile
+import unittest
+import numpy as np
+from scan_framework.scans.raw_store import RawStore, ALIGNMENT
+
+
+class TestRawStore(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'scan.raw')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_allocated_arrays_are_zero(self):
+        store = RawStore(self.path)
+        counts = store.allocate('counts', (10, 3), np.int32)
+        self.assertEqual(counts.shape, (10, 3))
+        self.assertEqual(counts.dtype, np.int32)
+        self.assertTrue(np.all(counts == 0))
+
+    def test_arrays_are_written_to_file(self):
+        store = RawStore(self.path)
+        counts = store.allocate('counts', (4, 2), np.int32)
+        means = store.allocate('means', 4, np.float64)
+        counts[1] = [5, 6]
+        means[:] = 0.5
+        store.flush()
+
+        store = RawStore(self.path, mode='r')
+        self.assertEqual(sorted(store.keys()), ['counts', 'means'])
+        np.testing.assert_array_equal(store.array('counts')[1], [5, 6])
+        np.testing.assert_array_equal(store.array('means'), [0.5] * 4)
+
+    def test_arrays_are_aligned(self):
+        store = RawStore(self.path)
+        store.allocate('a', 3, np.int8)
+        store.allocate('b', 3, np.int8)
+        with open(store.index_path) as f:
+            self.assertIn('"offset": {0}'.format(ALIGNMENT), f.read())
+
+    def test_add_arrays_to_existing_file(self):
+        store = RawStore(self.path)
+        store.allocate('a', 2, np.int32)[:] = [1, 2]
+        store.flush()
+
+        store = RawStore(self.path, mode='r+')
+        store.allocate('b', 2, np.int32)[:] = [3, 4]
+        store.flush()
+        np.testing.assert_array_equal(RawStore(self.path, mode='r').array('a'), [1, 2])
+        np.testing.assert_array_equal(RawStore(self.path, mode='r').array('b'), [3, 4])
+
+    def test_duplicate_key(self):
+        store = RawStore(self.path)
+        store.allocate('a', 2)
+        with self.assertRaises(KeyError):
+            store.allocate('a', 2)
+
+    def test_read_only(self):
+        RawStore(self.path).allocate('a', 2)
+        with self.assertRaises(ValueError):
+            RawStore(self.path, mode='r').allocate('b', 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
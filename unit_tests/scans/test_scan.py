@@ -0,0 +1,707 @@
+# tests scans/scan.py
+from artiq.experiment import *
+from scan_framework.scans.scan import Scan, Scan1D
+from scan_framework.models.scan_model import ScanModel
+from scan_framework.unit_tests.test_case import *
+import numpy as np
+
+
+class PipelinedScan(Scan1D, EnvExperiment):
+    run_on_core = False
+    enable_fitting = False
+    enable_pausing = False
+    enable_reporting = False
+
+    def build(self):
+        super().build()
+        self.scan_arguments(npasses={'default': 2}, nrepeats={'default': 2}, nbins={'default': 2})
+        self.events = []
+
+    def prepare(self):
+        self.register_model(ScanModel(self, namespace='unit_tests'), measurement=True)
+
+    def get_scan_points(self):
+        return [1.0, 2.0, 3.0]
+
+    def prepare_next_point(self, i_point, point):
+        self.events.append(('prepare', int(i_point), float(point)))
+
+    def set_scan_point(self, i_point, point):
+        self.events.append(('set', int(i_point), float(point)))
+
+    def measure(self, point):
+        self.events.append(('measure', float(point)))
+        return 1
+
+
+class StorageScan(Scan1D, EnvExperiment):
+    run_on_core = False
+    enable_fitting = False
+    enable_pausing = False
+    enable_reporting = False
+
+    def build(self):
+        super().build()
+        self.scan_arguments(npasses={'default': 2}, nrepeats={'default': 2}, nbins={'default': 2})
+        self.rows = []
+
+    def prepare(self):
+        self.register_model(ScanModel(self, namespace='unit_tests'), measurement=True)
+
+    def get_scan_points(self):
+        return [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    def measure(self, point):
+        self.rows.append((int(self._idx), int(self._window_start), int(self._data_row)))
+        return int(point) * 10 + int(self._i_pass)
+
+
+class TestStorage(TestCase):
+    """Data of every scan point and pass must reach the host when the core only holds some of them"""
+
+    def run_storage(self, **attrs):
+        scan = StorageScan(self)
+        for key, value in attrs.items():
+            setattr(scan, key, value)
+        self.run_experiment(scan)
+        return scan
+
+    def assert_data(self, scan):
+        data, repeats = scan._scan_data()
+        expected = [[10 * p, 10 * p, 10 * p + 1, 10 * p + 1] for p in range(1, 6)]
+        self.assertEqual(data[:, 0, :].tolist(), expected)
+        self.assertEqual(repeats.tolist(), [[2, 2]] * 5)
+
+    def rows(self, scan):
+        # one entry per repeat
+        return scan.rows[::2]
+
+    def test_all_points_on_core(self):
+        scan = self.run_storage()
+        self.assert_data(scan)
+        self.assertEqual(self.rows(scan), [(idx, 0, idx) for idx in range(5)] * 2)
+
+    def test_all_passes_on_core(self):
+        # by default the core holds the data of every pass and the host does not hold a copy
+        scan = self.run_storage()
+        self.assertEqual(scan._data.shape, (5, 1, 4))
+        self.assertIsNone(scan._host_data)
+
+    def test_pass_only_data(self):
+        scan = self.run_storage(enable_pass_only_data=True)
+        self.assert_data(scan)
+        self.assertEqual(scan._data.shape, (5, 1, 2))
+        self.assertEqual(scan._host_data.shape, (5, 1, 4))
+
+    def test_chunks(self):
+        scan = self.run_storage(point_chunk_size=2)
+        self.assert_data(scan)
+        starts = [0, 0, 2, 2, 4]
+        self.assertEqual(self.rows(scan), [(idx, starts[idx], idx - starts[idx]) for idx in range(5)] * 2)
+
+    def test_ring(self):
+        scan = self.run_storage(data_ring_size=2)
+        self.assert_data(scan)
+        self.assertEqual(self.rows(scan), [(idx, 0, idx % 2) for idx in range(5)] * 2)
+
+    def test_ring_and_chunks(self):
+        scan = self.run_storage(point_chunk_size=3, data_ring_size=2)
+        self.assert_data(scan)
+        starts = [0, 0, 0, 3, 3]
+        self.assertEqual(self.rows(scan), [(idx, starts[idx], idx % 2) for idx in range(5)] * 2)
+
+    def test_batched_ring(self):
+        scan = self.run_storage(data_ring_size=3, batch_points=2)
+        self.assert_data(scan)
+
+    def test_merge_full_width_rows(self):
+        # rows on the core hold every pass when the core keeps the data of the whole scan
+        scan = Scan(self, nrepeats=2, nbins=50, npasses=2, npoints=1)
+        scan._pass_only = False
+        scan._point_index = {(0,): 0}
+        scan._host_data = np.zeros((1, 1, 4), dtype=np.int32)
+        scan._host_repeats = np.full((1, 2), 2, dtype=np.int32)
+        scan._merge_point_data(0, 1, [[1, 2, 3, 4]], [2, 2])
+        self.assertEqual(scan._host_data[0, 0].tolist(), [0, 0, 3, 4])
+
+        # otherwise rows on the core only hold the current pass
+        scan._pass_only = True
+        scan._merge_point_data(0, 0, [[5, 6]], [2, 2])
+        self.assertEqual(scan._host_data[0, 0].tolist(), [5, 6, 3, 4])
+
+
+class BatchScan(Scan1D, EnvExperiment):
+    run_on_core = False
+    enable_fitting = False
+    enable_pausing = False
+    enable_reporting = False
+
+    def build(self):
+        super().build()
+        self.scan_arguments(npasses={'default': 2}, nrepeats={'default': 3}, nbins={'default': 5})
+        self.measurements = ['m1', 'm2']
+        self.nmeasured = 0
+        self.batches = []
+
+        # time on the host clock, which advances by one second at each measurement
+        self.t_mu = np.int64(0)
+
+    def prepare(self):
+        self.register_model(ScanModel(self, namespace='unit_tests.m1'), measurement='m1')
+        self.register_model(ScanModel(self, namespace='unit_tests.m2'), measurement='m2')
+
+    def get_scan_points(self):
+        return [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]
+
+    def measure(self, point):
+        self.nmeasured += 1
+        self.t_mu += self.core.seconds_to_mu(1.0)
+        return (self.nmeasured * self.nmeasured + int(point)) % 5
+
+    def _timestamp_mu(self):
+        return self.t_mu
+
+    def _mutate_batch(self, start, i_pass, data):
+        self.batches.append(len(data))
+        super()._mutate_batch(start, i_pass, data)
+
+
+class TestBatching(TestCase):
+    """Datasets must be the same whether the data of each scan point is sent to the host on its own or in batches"""
+
+    def run_batched(self, **attrs):
+        """Returns every dataset written by the scan and the number of scan points in each batch"""
+        self.setUp()
+        scan = BatchScan(self)
+        for key, value in attrs.items():
+            setattr(scan, key, value)
+        self.run_experiment(scan)
+        datasets = self._HasEnvironment__dataset_mgr.local
+        return {key: np.array(value) for key, value in datasets.items()}, scan.batches
+
+    def assert_same_datasets(self, datasets, expected):
+        self.assertEqual(sorted(datasets), sorted(expected))
+        for key in ['unit_tests.m1.stats.mean', 'unit_tests.m2.stats.error', 'unit_tests.m2.stats.hist',
+                    'unit_tests.m1.plots.y']:
+            self.assertIn(key, datasets)
+        for key in expected:
+            if datasets[key].dtype.kind in 'fc':
+                np.testing.assert_array_equal(datasets[key], expected[key], err_msg=key)
+            else:
+                self.assertEqual(datasets[key].tolist(), expected[key].tolist(), key)
+
+    def test_batch_points(self):
+        expected, batches = self.run_batched()
+        self.assertEqual(batches, [])
+        datasets, batches = self.run_batched(batch_points=3)
+        # the last batch of each pass only holds one scan point
+        self.assertEqual(batches, [3, 3, 1] * 2)
+        self.assert_same_datasets(datasets, expected)
+
+    def test_batch_time(self):
+        expected, batches = self.run_batched()
+        # every scan point takes 6 s, a batch is sent once its first scan point is more than 10 s old
+        datasets, batches = self.run_batched(batch_points=5, batch_time=10.0)
+        self.assertEqual(batches, [3, 3, 1] * 2)
+        self.assert_same_datasets(datasets, expected)
+
+
+class TwoMeasurementScan(Scan1D, EnvExperiment):
+    run_on_core = False
+    enable_fitting = False
+    enable_pausing = False
+    enable_reporting = False
+
+    def build(self):
+        super().build()
+        self.scan_arguments(npasses={'default': 3}, nrepeats={'default': 2}, nbins={'default': 5})
+        self.measurements = ['rsb', 'bsb']
+        self.nmeasured = 0
+
+    def prepare(self):
+        self.rsb_model = ScanModel(self, namespace='unit_tests.rsb')
+        self.bsb_model = ScanModel(self, namespace='unit_tests.bsb')
+        self.register_model(self.rsb_model, measurement='rsb')
+        self.register_model(self.bsb_model, measurement='bsb')
+
+    def get_scan_points(self):
+        return [1.0, 2.0]
+
+    def measure(self, point):
+        # values between 0 and 4 that differ by measurement, scan point, pass, and repeat
+        self.nmeasured += 1
+        if self.measurement == 'rsb':
+            return (self.nmeasured * 3) % 5
+        return (self.nmeasured * self.nmeasured) % 5
+
+
+class TestIncrementalStats(TestCase):
+    """Models updated from running sums must produce the same datasets as models given every value"""
+
+    def run_scan(self, incremental):
+        """Returns the hist, mean, error, and aggregate histogram datasets of each model.  Every scan writes the same
+        datasets."""
+        scan = TwoMeasurementScan(self)
+        scan.enable_incremental_stats = incremental
+        self.run_experiment(scan)
+        datasets = {}
+        for name in ['rsb_model', 'bsb_model']:
+            model = getattr(scan, name)
+            datasets[name] = {key: np.array(model.stat_model.get(key)) for key in ['hist', 'mean', 'error']}
+            datasets[name]['aggregate_bins'] = np.array(model.hist_model.get('aggregate_bins'))
+        return datasets
+
+    def test_mirrored_models(self):
+        full = self.run_scan(incremental=False)
+        incremental = self.run_scan(incremental=True)
+        for name in ['rsb_model', 'bsb_model']:
+            self.assertEqual(incremental[name]['hist'].tolist(), full[name]['hist'].tolist())
+            # every value measured at each scan point is binned once
+            self.assertEqual(incremental[name]['hist'].sum(axis=1).tolist(), [6, 6])
+            for key in ['mean', 'error']:
+                np.testing.assert_allclose(incremental[name][key], full[name][key])
+
+            # the aggregate histogram also bins every value once, instead of binning the values of the previous passes
+            # again at each pass
+            self.assertEqual(incremental[name]['aggregate_bins'].tolist(), full[name]['hist'].sum(axis=0).tolist())
+
+
+class WarmupScan(Scan1D, EnvExperiment):
+    run_on_core = False
+    enable_fitting = False
+    enable_reporting = False
+
+    def build(self):
+        super().build()
+        self.scan_arguments(npasses={'default': 2}, nrepeats={'default': 1}, nbins={'default': 2})
+        self.events = []
+        self.due = []
+
+    def prepare(self):
+        self.register_model(ScanModel(self, namespace='unit_tests'), measurement=True)
+
+    def get_scan_points(self):
+        return [1.0, 2.0, 3.0]
+
+    def get_warmup_points(self):
+        return [0.0]
+
+    def warmup(self, point):
+        self.events.append(('warmup', int(self._i_pass), int(self._idx)))
+
+    def warmup_due(self, i_pass, resumed):
+        self.due.append((int(i_pass), bool(resumed)))
+        return i_pass == 1
+
+    def measure(self, point):
+        self.events.append(('measure', int(self._i_pass), int(self._idx)))
+        return 1
+
+
+class TestWarmupPolicy(TestCase):
+    """The scan is paused once, before the second scan point of the first pass, and then resumes"""
+
+    def run_warmup(self, policy):
+        scan = WarmupScan(self)
+        scan.warmup_policy = policy
+        checks = []
+
+        def check_pause():
+            checks.append(True)
+            return len(checks) == 2
+
+        scan.scheduler.check_pause = check_pause
+        scan.scheduler.pause = lambda: None
+        self.run_experiment(scan)
+        return scan
+
+    def expected(self, warmups):
+        """Events of the scan, with warm-up points run before the scan points at the (i_pass, idx) in warmups"""
+        events = []
+        for i_pass, idx in [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2)]:
+            if (i_pass, idx) in warmups:
+                events.append(('warmup', i_pass, idx))
+            events.append(('measure', i_pass, idx))
+        return events
+
+    def test_every_pass(self):
+        scan = self.run_warmup('every_pass')
+        self.assertEqual(scan.events, self.expected(warmups=[(0, 0), (0, 1), (1, 0)]))
+
+    def test_first_pass(self):
+        scan = self.run_warmup('first_pass')
+        self.assertEqual(scan.events, self.expected(warmups=[(0, 0)]))
+
+    def test_resume(self):
+        scan = self.run_warmup('resume')
+        self.assertEqual(scan.events, self.expected(warmups=[(0, 0), (0, 1)]))
+
+    def test_custom(self):
+        scan = self.run_warmup('custom')
+        self.assertEqual(scan.events, self.expected(warmups=[(1, 0)]))
+        # warmup_due() is asked before every pass and is told when the scan has just resumed
+        self.assertEqual(scan.due, [(0, False), (0, True), (1, False)])
+
+
+class PauseCheckScan(Scan1D, EnvExperiment):
+    run_on_core = False
+    enable_fitting = False
+    enable_reporting = False
+
+    def build(self):
+        super().build()
+        self.scan_arguments(npasses={'default': 2}, nrepeats={'default': 1}, nbins={'default': 2})
+        self.checks = []
+
+        # time on the host clock, which advances by one second at each measurement
+        self.t_mu = np.int64(0)
+
+    def prepare(self):
+        self.register_model(ScanModel(self, namespace='unit_tests'), measurement=True)
+
+    def get_scan_points(self):
+        return [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    def measure(self, point):
+        self.t_mu += self.core.seconds_to_mu(1.0)
+        return 1
+
+    def _timestamp_mu(self):
+        return self.t_mu
+
+
+class TestPauseCheck(TestCase):
+    """Pause must be checked at the configured cadence and at the first scan point of each pass"""
+
+    def run_pause_check(self, **attrs):
+        """Returns the (i_pass, idx) of each scan point at which pause was checked"""
+        scan = PauseCheckScan(self)
+        for key, value in attrs.items():
+            setattr(scan, key, value)
+
+        def check_pause():
+            scan.checks.append((int(scan._i_pass), int(scan._idx)))
+            return False
+
+        scan.scheduler.check_pause = check_pause
+        self.run_experiment(scan)
+        return scan.checks
+
+    def test_every_point(self):
+        self.assertEqual(self.run_pause_check(), [(i_pass, idx) for i_pass in range(2) for idx in range(5)])
+
+    def test_points(self):
+        # the count of scan points since the last check starts again at each pass
+        self.assertEqual(self.run_pause_check(pause_check_points=3), [(0, 0), (0, 3), (1, 0), (1, 3)])
+
+    def test_time(self):
+        # every scan point takes 1 s, pause is checked once 1.5 s have elapsed since the last check
+        self.assertEqual(self.run_pause_check(pause_check_time=1.5, pause_check_points=2),
+                         [(0, 0), (0, 2), (0, 4), (1, 0), (1, 2), (1, 4)])
+
+    def test_time_between_passes(self):
+        # pause is checked when the second pass starts, although only 2 s have elapsed since the last check
+        self.assertEqual(self.run_pause_check(pause_check_time=2.5), [(0, 0), (0, 3), (1, 0), (1, 3)])
+
+
+class CountMonitorScan(Scan1D, EnvExperiment):
+    run_on_core = False
+    enable_fitting = False
+    enable_pausing = False
+    enable_reporting = False
+
+    def build(self):
+        super().build()
+        self.scan_arguments(npasses={'default': 1}, nrepeats={'default': 2}, nbins={'default': 2})
+        self.nmeasured = 0
+        self.writes = []
+
+        # time on the host clock, which advances by one second at each measurement
+        self.t_mu = np.int64(0)
+
+    def prepare(self):
+        self.register_model(ScanModel(self, namespace='unit_tests'), measurement=True)
+
+    def get_scan_points(self):
+        return [3.0, 1.0, 2.0, 5.0, 4.0]
+
+    def measure(self, point):
+        # the average value at each scan point is 10*point + 0.5
+        self.nmeasured += 1
+        self.t_mu += self.core.seconds_to_mu(1.0)
+        return int(point) * 10 + self.nmeasured % 2
+
+    def _timestamp_mu(self):
+        return self.t_mu
+
+    def set_dataset(self, key, value, *args, **kwargs):
+        if key in ['counts', 'counts_min', 'counts_max']:
+            self.writes.append((key, value, kwargs.get('persist', False)))
+        super().set_dataset(key, value, *args, **kwargs)
+
+
+class TestCountMonitor(TestCase):
+
+    def run_count_monitor(self, interval):
+        scan = CountMonitorScan(self)
+        scan.count_monitor_interval = interval
+        self.run_experiment(scan)
+        return scan.writes
+
+    def updates(self, writes):
+        """Returns the (counts, counts_min, counts_max) of each update of the count monitor datasets"""
+        values = [value for key, value, persist in writes if not persist]
+        return [tuple(values[i:i + 3]) for i in range(0, len(values), 3)]
+
+    def test_every_point(self):
+        writes = self.run_count_monitor(interval=0)
+        means = [30.5, 10.5, 20.5, 50.5, 40.5]
+        self.assertEqual(self.updates(writes), [(mean, mean, mean) for mean in means])
+
+    def test_interval(self):
+        # every scan point takes 2 s, the datasets are updated once 3 s have elapsed since the last update and once the
+        # scan completes
+        writes = self.run_count_monitor(interval=3.0)
+        self.assertEqual(self.updates(writes), [(20.5, 10.5, 30.5), (35.5, 20.5, 50.5), (40.5, 40.5, 40.5)])
+
+    def test_persisted_once(self):
+        writes = self.run_count_monitor(interval=3.0)
+        # counts is only persisted once the scan completes, with its last value
+        self.assertEqual([w for w in writes if w[2]], [('counts', 40.5, True)])
+        self.assertEqual(writes[-1], ('counts', 40.5, True))
+
+
+class ProgressScan(Scan1D, EnvExperiment):
+    run_on_core = False
+    enable_fitting = False
+    enable_reporting = False
+    enable_progress = True
+    progress_interval = 0.0
+
+    def build(self):
+        super().build()
+        self.scan_arguments(npasses={'default': 2}, nrepeats={'default': 2}, nbins={'default': 2})
+        self.progress = []
+
+        # time on the host clock, which advances by one second at each measurement
+        self.t_mu = np.int64(0)
+
+    def prepare(self):
+        self.register_model(ScanModel(self, namespace='unit_tests'), measurement=True)
+
+    def get_scan_points(self):
+        return [1.0, 2.0, 3.0, 4.0]
+
+    def measure(self, point):
+        self.t_mu += self.core.seconds_to_mu(1.0)
+        return 1
+
+    def _timestamp_mu(self):
+        return self.t_mu
+
+    def _set_progress(self, key, value):
+        self.progress.append((key, value))
+        super()._set_progress(key, value)
+
+
+class TestProgress(TestCase):
+    """Each scan point takes 2 s: two repeats of 1 s each"""
+
+    def run_progress(self, pause_at=None):
+        """Returns the values written to each progress dataset.  The scan is paused at the pause_at-th check of pause
+        and resumes immediately."""
+        scan = ProgressScan(self)
+        checks = []
+
+        def check_pause():
+            checks.append(True)
+            return len(checks) == pause_at
+
+        scan.scheduler.check_pause = check_pause
+        scan.scheduler.pause = lambda: None
+        self.run_experiment(scan)
+        progress = {}
+        for key, value in scan.progress:
+            progress.setdefault(key, []).append(value)
+        return progress
+
+    def test_passes(self):
+        progress = self.run_progress()
+        # the fraction of the scan points of both passes completed when the scan starts, after each scan point, and once
+        # the scan completes
+        self.assertEqual(progress['completed'], [i / 8 for i in range(9)] + [1.0])
+        np.testing.assert_allclose(progress['points_per_second'], [0.5] * 8)
+        np.testing.assert_allclose(progress['seconds_per_pass'], [8.0] * 8)
+        np.testing.assert_allclose(progress['eta'], [2.0 * (8 - i) for i in range(1, 9)] + [0.0])
+
+    def test_resume(self):
+        # the scan pauses before the third scan point of the first pass
+        progress = self.run_progress(pause_at=3)
+        # the scan points completed before the scan paused are counted when it resumes
+        self.assertEqual(progress['completed'], [0.0, 1 / 8, 2 / 8, 2 / 8] + [i / 8 for i in range(3, 9)] + [1.0])
+        np.testing.assert_allclose(progress['points_per_second'], [0.5] * 8)
+        np.testing.assert_allclose(progress['eta'], [2.0 * (8 - i) for i in range(1, 9)] + [0.0])
+
+
+class HookScan(Scan1D, EnvExperiment):
+    run_on_core = False
+    enable_fitting = False
+    enable_pausing = False
+    enable_reporting = False
+
+    def build(self):
+        super().build()
+        self.scan_arguments(npasses={'default': 1}, nrepeats={'default': 2}, nbins={'default': 2})
+        self.events = []
+
+    def prepare(self):
+        self.register_model(ScanModel(self, namespace='unit_tests'), measurement=True)
+
+    def get_scan_points(self):
+        return [1.0, 2.0]
+
+    def measure(self, point):
+        return 1
+
+    def after_measure(self, point, measurement):
+        self.events.append('after_measure')
+
+
+class TestSpecializeLoop(TestCase):
+
+    def run_hooks(self, **attrs):
+        scan = HookScan(self)
+        for key, value in attrs.items():
+            setattr(scan, key, value)
+
+        # callbacks assigned to the instance are not overrides of the scan class
+        scan.before_measure = lambda point, measurement: scan.events.append('before_measure')
+        scan.after_scan_point = lambda i_point, point: scan.events.append('after_scan_point')
+        self.run_experiment(scan)
+        return scan
+
+    def test_hooks_not_overridden_are_elided(self):
+        scan = self.run_hooks()
+        self.assertTrue(scan._has_after_measure)
+        self.assertFalse(scan._has_before_measure)
+        self.assertFalse(scan._has_after_scan_point)
+        self.assertFalse(scan._has_prepare_next_point)
+        # only the overridden callback is called by the scan loop, once per repeat
+        self.assertEqual(scan.events, ['after_measure'] * 4)
+
+    def test_flags_are_kernel_invariants(self):
+        scan = self.run_hooks(batch_points=2, enable_count_monitor=False)
+        flags = {
+            'enable_mutate': True, 'enable_pausing': False, 'enable_count_monitor': False,
+            'enable_adaptive_repeats': False, 'enable_progress': False, '_batching': True, '_chunked': False,
+            '_ring_size': 0, '_has_before_measure': False, '_has_after_measure': True,
+            '_has_after_scan_point': False, '_has_prepare_next_point': False
+        }
+        for name, value in flags.items():
+            self.assertIn(name, scan.kernel_invariants)
+            self.assertEqual(getattr(scan, name), value, name)
+
+        # the invariants of the scan class are not changed
+        self.assertNotIn('_batching', getattr(HookScan, 'kernel_invariants', set()))
+
+    def test_flags_follow_configuration(self):
+        scan = self.run_hooks(point_chunk_size=1, data_ring_size=1)
+        self.assertTrue(scan._chunked)
+        self.assertEqual(scan._ring_size, 1)
+        self.assertFalse(scan._batching)
+
+
+class TestPointData(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.scan = Scan(self, nrepeats=3, nbins=50, npasses=2, npoints=10)
+
+    def test_all_repeats(self):
+        data = np.arange(6)
+        self.assertEqual(list(self.scan._get_point_data(data, 0, [3, 3])), [0, 1, 2])
+        self.assertEqual(list(self.scan._get_point_data(data, 1, [3, 3])), [0, 1, 2, 3, 4, 5])
+
+    def test_skipped_repeats_keep_their_columns(self):
+        self.scan.enable_adaptive_repeats = True
+        values = self.scan._get_point_data(np.arange(6), 1, [2, 3])
+        self.assertEqual(len(values), 6)
+        self.assertTrue(np.isnan(values[2]))
+        self.assertEqual(list(values[[0, 1, 3, 4, 5]]), [0, 1, 3, 4, 5])
+
+
+class LegacyModel(ScanModel):
+    """Model that overrides mutate_datasets() without the offset parameter"""
+
+    def mutate_datasets(self, i_point, point, counts):
+        return super().mutate_datasets(i_point, point, counts)
+
+
+class TestModelRegistry(TestCase):
+
+    def test_offset_is_resolved_once(self):
+        scan = Scan(self, nrepeats=3, nbins=50, npasses=2, npoints=10)
+        scan.register_model(ScanModel(scan, namespace='unit_tests'), measurement='m1')
+        scan.register_model(LegacyModel(scan, namespace='unit_tests'), measurement='m2')
+        scan._compile_model_registry()
+        self.assertEqual([entry['accepts_offset'] for entry in scan._model_registry], [True, False])
+
+
+class TestPrepareNextPoint(TestCase):
+
+    def run_pipelined(self, **attrs):
+        scan = PipelinedScan(self)
+        for key, value in attrs.items():
+            setattr(scan, key, value)
+        self.run_experiment(scan)
+        return scan.events
+
+    def expected(self, pipelined):
+        """Events of a pass over the scan points.  Scan points in pipelined are prepared during the previous scan
+        point."""
+        events = []
+        for i_point, point in enumerate([1.0, 2.0, 3.0]):
+            if i_point not in pipelined:
+                events.append(('prepare', i_point, point))
+            events += [('set', i_point, point), ('measure', point), ('measure', point)]
+            if i_point + 1 in pipelined:
+                events.append(('prepare', i_point + 1, point + 1))
+        return events
+
+    def test_next_point_is_prepared_after_last_measurement(self):
+        events = self.run_pipelined()
+        self.assertEqual(events, self.expected(pipelined=[1, 2]) * 2)
+
+    def test_point_is_prepared_once_before_it_is_set(self):
+        events = self.run_pipelined()
+        for i_point in range(3):
+            prepares = [i for i, e in enumerate(events) if e[:2] == ('prepare', i_point)]
+            sets = [i for i, e in enumerate(events) if e[:2] == ('set', i_point)]
+            self.assertEqual(len(prepares), len(sets))
+            for i_prepare, i_set in zip(prepares, sets):
+                self.assertLess(i_prepare, i_set)
+
+    def test_first_point_of_chunk_is_prepared_when_executed(self):
+        events = self.run_pipelined(point_chunk_size=2)
+        self.assertEqual(events, self.expected(pipelined=[1]) * 2)
+
+    def test_point_is_prepared_again_after_resume(self):
+        # the scan pauses before the second scan point of the first pass, after it was prepared
+        scan = PipelinedScan(self)
+        scan.enable_pausing = True
+        checks = []
+
+        def check_pause():
+            checks.append(True)
+            return len(checks) == 2
+
+        scan.scheduler.check_pause = check_pause
+        scan.scheduler.pause = lambda: None
+        self.run_experiment(scan)
+        first_pass = self.expected(pipelined=[1, 2])
+        first_pass.insert(first_pass.index(('set', 1, 2.0)), ('prepare', 1, 2.0))
+        self.assertEqual(scan.events, first_pass + self.expected(pipelined=[1, 2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# tests scans/timing.py
+import unittest
+import json
+import os
+import tempfile
+from scan_framework.scans.timing import *
+
+
+class TestPhaseTimer(unittest.TestCase):
+
+    def test_stats(self):
+        timer = PhaseTimer()
+        for duration in [1.0, 2.0, 3.0, 4.0]:
+            timer.add('measure', duration)
+        stats = dict(zip(timer.stats_columns(), timer.stats('measure')))
+        self.assertEqual(stats['count'], 4)
+        self.assertEqual(stats['total'], 10.0)
+        self.assertEqual(stats['mean'], 2.5)
+        self.assertEqual(stats['min'], 1.0)
+        self.assertEqual(stats['max'], 4.0)
+        self.assertEqual(stats['p50'], 2.5)
+
+    def test_histogram(self):
+        timer = PhaseTimer()
+        for duration in [1e-9, 1e-3, 1e3]:
+            timer.add('measure', duration)
+        hist = timer.histogram('measure')
+        self.assertEqual(len(hist), len(BIN_EDGES) - 1)
+        self.assertEqual(hist.sum(), 3)
+        self.assertEqual(hist[0], 1)
+        self.assertEqual(hist[-1], 1)
+
+    def test_time(self):
+        timer = PhaseTimer()
+        with timer.time('analyze'):
+            pass
+        self.assertEqual(len(timer.durations['analyze']), 1)
+        self.assertEqual(len(timer.summary()), 1)
+
+    def test_disabled(self):
+        timer = PhaseTimer(enabled=False)
+        timer.add('measure', 1.0)
+        with timer.time('analyze'):
+            pass
+        self.assertEqual(timer.durations, {})
+
+
+class TestTracer(unittest.TestCase):
+
+    def test_core_events_are_aligned_to_host_clock(self):
+        tracer = Tracer()
+        tracer.add_host('mutate_datasets', 100.0, 1.0)
+        tracer.add_core('do_measure', 10.0, 0.5)
+        # the smallest offset between the clocks is used
+        tracer.sync(10.5, 101.0)
+        tracer.sync(10.5, 100.5)
+        events = [e for e in tracer.events() if e['ph'] == 'X']
+        host = [e for e in events if e['pid'] == 1][0]
+        core = [e for e in events if e['pid'] == 0][0]
+        self.assertEqual(core['ts'], 0.0)
+        self.assertEqual(core['dur'], 0.5e6)
+        self.assertEqual(host['ts'], 0.0)
+
+    def test_timer_passes_phases_to_tracer(self):
+        tracer = Tracer()
+        timer = PhaseTimer(tracer=tracer)
+        with timer.time('analyze'):
+            pass
+        timer.add_core('do_measure', 0.0, 1e-6)
+        self.assertEqual(len(tracer.host_events), 1)
+        self.assertEqual(len(tracer.core_events), 1)
+
+    def test_write(self):
+        tracer = Tracer()
+        tracer.add_host('analyze', 0.0, 1.0)
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'trace.json')
+            tracer.write(path)
+            with open(path) as f:
+                trace = json.load(f)
+        self.assertIn('traceEvents', trace)
+
+
+if __name__ == '__main__':
+    unittest.main()
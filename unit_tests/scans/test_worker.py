@@ -0,0 +1,40 @@
+# tests scans/worker.py
+import unittest
+from scan_framework.scans.worker import HostWorker
+
+
+class TestHostWorker(unittest.TestCase):
+
+    def test_tasks_run_in_order(self):
+        worker = HostWorker(maxsize=2)
+        done = []
+        for i in range(20):
+            worker.submit(done.append, i)
+        worker.drain()
+        self.assertEqual(done, list(range(20)))
+        worker.stop()
+
+    def test_drain_raises_task_error(self):
+        worker = HostWorker()
+        done = []
+
+        def fail():
+            raise ValueError('task failed')
+
+        worker.submit(fail)
+        worker.submit(done.append, 1)
+        with self.assertRaises(ValueError):
+            worker.drain()
+        # tasks after the failed task are skipped
+        self.assertEqual(done, [])
+        worker.stop()
+
+    def test_submit_after_stop(self):
+        worker = HostWorker()
+        worker.stop()
+        with self.assertRaises(RuntimeError):
+            worker.submit(print)
+
+
+if __name__ == '__main__':
+    unittest.main()